@@ -0,0 +1,111 @@
+"""
+Load test for the live event stream: open many concurrent SSE connections
+on the ASGI application, publish one delta and time its fan-out.
+
+Streams are driven in-process through config.asgi (no socket), against a
+throwaway test database:
+
+    python benchmarks/sse_subscribers.py            # 1k and 5k streams
+    python benchmarks/sse_subscribers.py 500 2000
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django
+django.setup()
+
+from django.db import connection
+from django.utils import timezone
+from config.asgi import application
+from jury_api.models import Event
+from jury_api.pubsub import event_channel, get_broker
+
+
+def rss_mb():
+    with open('/proc/self/status') as handle:
+        for line in handle:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+class Stream:
+    def __init__(self, path):
+        self.scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+            'method': 'GET', 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+            'root_path': '', 'query_string': b'', 'headers': [(b'host', b'localhost')],
+            'client': ('127.0.0.1', 0), 'server': ('localhost', 80),
+        }
+        self.opened = asyncio.Event()
+        self.delivered = asyncio.Event()
+        self.disconnect = asyncio.Event()
+        self.requested = False
+        self.received_at = None
+
+    async def receive(self):
+        if not self.requested:
+            self.requested = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await self.disconnect.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(self, message):
+        if message['type'] != 'http.response.body':
+            return
+        body = message.get('body', b'')
+        if body.startswith(b'retry:'):
+            self.opened.set()
+        elif body.startswith(b'event:'):
+            self.received_at = time.perf_counter()
+            self.delivered.set()
+
+    async def run(self):
+        await application(self.scope, self.receive, self.send)
+
+
+async def measure(event_id, size):
+    broker = get_broker()
+    streams = [Stream(f'/api/events/{event_id}/stream/') for _ in range(size)]
+    base_rss = rss_mb()
+
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(stream.run()) for stream in streams]
+    await asyncio.gather(*(stream.opened.wait() for stream in streams))
+    open_time = time.perf_counter() - start
+    per_stream_kb = (rss_mb() - base_rss) * 1024 / size
+
+    published_at = time.perf_counter()
+    broker.publish(event_channel(event_id), {'type': 'ranking_changed', 'data': {'event_id': event_id}})
+    await asyncio.gather(*(stream.delivered.wait() for stream in streams))
+    latencies = sorted(stream.received_at - published_at for stream in streams)
+
+    for stream in streams:
+        stream.disconnect.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(f"{size:>6} streams  open {open_time:6.2f}s  "
+          f"fan-out p50 {p50:7.1f}ms  p99 {p99:7.1f}ms  max {latencies[-1] * 1000:7.1f}ms  "
+          f"~{per_stream_kb:5.1f} KB/stream  "
+          f"left subscribed {broker.subscriber_count(event_channel(event_id))}")
+
+
+def main(sizes):
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        event = Event.objects.create(name="Live benchmark", date=timezone.now())
+        for size in sizes:
+            asyncio.run(measure(event.id, size))
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 5000])
@@ -0,0 +1,65 @@
+"""
+Compare the per-row team import with the bulk import pipeline.
+
+Runs against a throwaway test database:
+
+    python benchmarks/team_import.py            # 1k and 10k rows
+    python benchmarks/team_import.py 500 2000
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django
+django.setup()
+
+from django.db import connection
+from django.utils import timezone
+from jury_api.imports import import_teams
+from jury_api.models import Event
+from jury_api.serializers import TeamSerializer
+
+
+def legacy_import(event, rows):
+    """The previous bulk_create endpoint: one serializer and INSERT per row"""
+    created = 0
+    for row in rows:
+        serializer = TeamSerializer(data={**row, 'event': event.id})
+        if serializer.is_valid():
+            serializer.save()
+            created += 1
+    return created
+
+
+def make_rows(size, prefix):
+    return [
+        {'name': f"{prefix} team {i}", 'email': f"team{i}@example.com",
+         'generated_email': f"team{i}+{prefix}_team_{i}@example.com"}
+        for i in range(size)
+    ]
+
+
+def timed(label, size, func):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<8} {size:>7} rows  {elapsed:8.2f}s  {size / elapsed:10.0f} rows/s")
+
+
+def main(sizes):
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        for size in sizes:
+            legacy_event = Event.objects.create(name=f"legacy {size}", date=timezone.now())
+            bulk_event = Event.objects.create(name=f"bulk {size}", date=timezone.now())
+            timed("legacy", size, lambda: legacy_import(legacy_event, make_rows(size, 'legacy')))
+            timed("bulk", size, lambda: import_teams(bulk_event, make_rows(size, 'bulk')))
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 10000])
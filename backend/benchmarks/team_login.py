@@ -0,0 +1,87 @@
+"""
+Concurrent team logins against a throwaway test database.
+
+Every team of the event logs in within the same few minutes; this fires
+that burst at the team-login endpoint, once with the default password
+hasher cost and once with TEAM_PASSWORD_ITERATIONS:
+
+    python benchmarks/team_login.py             # 500 logins, 32 threads
+    python benchmarks/team_login.py 1000 64
+"""
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.db import connection, connections
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from jury_api.imports import import_teams
+from jury_api.models import Event
+
+
+def make_rows(size):
+    return [
+        {'name': f"Team {i}", 'email': f"team{i}@example.com", 'generated_email': f"team{i}+bench@example.com"}
+        for i in range(size)
+    ]
+
+
+def login(email, password):
+    start = time.perf_counter()
+    try:
+        response = APIClient().post('/api/auth/team-login/', {'email': email, 'password': password})
+        assert response.status_code == 200, response.data
+    finally:
+        connections.close_all()
+    return time.perf_counter() - start
+
+
+def burst(label, credentials, threads):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        latencies = sorted(pool.map(lambda item: login(*item), credentials))
+    elapsed = time.perf_counter() - start
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{label:<28} {len(credentials):>5} logins  {elapsed:7.2f}s  "
+          f"{len(credentials) / elapsed:8.0f}/s  p50 {statistics.median(latencies) * 1000:7.1f}ms  "
+          f"p95 {p95 * 1000:7.1f}ms")
+
+
+def main(size, threads):
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        event = Event.objects.create(name="login burst", date=timezone.now())
+        import_teams(event, make_rows(size))
+        client = APIClient()
+        emails = [row['generated_email'] for row in make_rows(size)]
+        credentials = [
+            (email, client.post('/api/auth/team-login/', {'email': email}).data['generatedPassword'])
+            for email in emails
+        ]
+
+        # The first password login links the team's user (writes run one
+        # at a time: SQLite's test database locks on concurrent writers)
+        burst("first password login", credentials, 1)
+        burst(f"{settings.TEAM_PASSWORD_ITERATIONS} iterations", credentials, threads)
+        with override_settings(TEAM_PASSWORD_ITERATIONS=PBKDF2PasswordHasher.iterations):
+            # Each login rehashes once at the new cost, then reads again
+            burst("rehash to default cost", credentials, 1)
+            burst(f"{PBKDF2PasswordHasher.iterations} iterations", credentials, threads)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*(args + [500, 32][len(args):]))
@@ -1,7 +1,15 @@
+from django.utils.cache import patch_vary_headers
 from django.utils.deprecation import MiddlewareMixin
 
 class NoCacheMiddleware(MiddlewareMixin):
     def process_response(self, request, response):
+        if response.has_header('ETag'):
+            # Versioned responses may be kept, but must be revalidated on every use
+            user = getattr(request, 'user', None)
+            private = 'HTTP_AUTHORIZATION' in request.META or (user is not None and user.is_authenticated)
+            response['Cache-Control'] = 'private, no-cache' if private else 'no-cache'
+            patch_vary_headers(response, ['Authorization', 'Cookie'])
+            return response
         response['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
         response['Pragma'] = 'no-cache'
         response['Expires'] = '0'
@@ -4,6 +4,7 @@ Django settings for config project.
 
 from pathlib import Path
 import os
+import sys
 import dj_database_url
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -70,10 +71,15 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'config.wsgi.application'
 
+# The Procfile serves config.asgi, where each sync view runs in its own
+# thread: persistent connections would be opened per thread and never
+# reused until Postgres refuses new ones (Django ticket #33497). Connections
+# are therefore closed after each request; DB_CONN_MAX_AGE only makes sense
+# behind a WSGI server or with a pooler (PgBouncer) in front of Postgres.
 DATABASES = {
     'default': dj_database_url.config(
         default=f"postgresql://{os.getenv('DB_USER', 'postgres')}:{os.getenv('DB_PASSWORD', 'postgres')}@{os.getenv('DB_HOST', 'localhost')}:{os.getenv('DB_PORT', '5432')}/{os.getenv('DB_NAME', 'juryhack_db')}",
-        conn_max_age=600,
+        conn_max_age=int(os.getenv('DB_CONN_MAX_AGE', '0')),
         conn_health_checks=True,
     )
 }
@@ -93,6 +99,22 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Cost of the account password hashes (PBKDF2 iterations); changing it
+# rehashes each password at its next login
+PASSWORD_HASH_ITERATIONS = int(os.getenv('PASSWORD_HASH_ITERATIONS', '1000000'))
+
+PASSWORD_HASHERS = [
+    'jury_api.hashers.PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+# Processes hashing the passwords of bulk-provisioned accounts (0: one per CPU)
+PROVISIONING_HASH_WORKERS = int(os.getenv('PROVISIONING_HASH_WORKERS', '0'))
+
 LANGUAGE_CODE = 'fr-fr'
 TIME_ZONE = 'Africa/Nairobi'
 USE_I18N = True
@@ -108,7 +130,7 @@ AUTH_USER_MODEL = 'jury_api.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'jury_api.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -134,9 +156,73 @@ CORS_ALLOW_HEADERS = [
     'x-requested-with',
 ]
 
+CORS_EXPOSE_HEADERS = [
+    'x-results-stale',
+]
+
+# Shared cache: gunicorn workers must see the same results/version keys.
+# CACHE_URL examples:
+#   file:///var/tmp/juryhack-cache   (default, no extra service needed)
+#   db://jury_cache                  (run `manage.py createcachetable` first)
+#   redis://localhost:6379/0         (requires the `redis` package)
+#   memcached://127.0.0.1:11211      (requires the `pymemcache` package)
+#   locmem://                        (per-process, tests/dev only)
+CACHE_BACKENDS = {
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'db': 'django.core.cache.backends.db.DatabaseCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+    'rediss': 'django.core.cache.backends.redis.RedisCache',
+    'memcached': 'django.core.cache.backends.memcached.PyMemcacheCache',
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+}
+
+
+def cache_config(url):
+    scheme, _, location = url.partition('://')
+    if scheme in ('redis', 'rediss'):
+        location = url
+    elif scheme == 'locmem':
+        location = location or 'unique-snowflake'
+    elif scheme == 'file':
+        location = location or '/var/tmp/juryhack-cache'
+        # The file cache deletes a third of its entries (version stamps
+        # included) past MAX_ENTRIES, 300 by default
+        return {
+            'BACKEND': CACHE_BACKENDS[scheme], 'LOCATION': location,
+            'OPTIONS': {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', '20000'))},
+        }
+    return {'BACKEND': CACHE_BACKENDS[scheme], 'LOCATION': location}
+
+
 CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
-    }
+    'default': cache_config(os.getenv('CACHE_URL', 'file:///var/tmp/juryhack-cache')),
 }
+
+# Seconds of quiet after the last score write before results are rebuilt in
+# the background (empty to disable)
+RESULTS_REBUILD_DELAY = os.getenv('RESULTS_REBUILD_DELAY', '2')
+RESULTS_REBUILD_DELAY = float(RESULTS_REBUILD_DELAY) if RESULTS_REBUILD_DELAY else None
+
+# Broker for the live event streams: empty for in-process fan-out (streams and
+# writes served by the same ASGI process), or a redis:// URL to share it
+LIVE_BROKER_URL = os.getenv('LIVE_BROKER_URL', '')
+
+# Audit entries are written in batches by a background thread; synchronous
+# under `manage.py test`, where other threads cannot see the test transaction
+TESTING = sys.argv[1:2] == ['test']
+AUDIT_LOG_ASYNC = os.getenv('AUDIT_LOG_ASYNC', str(not TESTING)) == 'True'
+
+# Retention of the audit log: older entries are moved to gzipped JSONL
+# archives by `manage.py archive_audit_logs`
+AUDIT_LOG_RETENTION_DAYS = int(os.getenv('AUDIT_LOG_RETENTION_DAYS', '365'))
+AUDIT_ARCHIVE_DIR = os.getenv('AUDIT_ARCHIVE_DIR', str(BASE_DIR / 'audit_archives'))
+
+# Token authentication: per-worker LRU of recently seen tokens, and an
+# optional token lifetime (empty: tokens never expire)
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv('AUTH_TOKEN_CACHE_SIZE', '10000'))
+AUTH_TOKEN_CACHE_TTL = int(os.getenv('AUTH_TOKEN_CACHE_TTL', '60'))
+AUTH_TOKEN_EXPIRY_HOURS = int(os.getenv('AUTH_TOKEN_EXPIRY_HOURS') or 0) or None
+
+# Cost of the team password hashes (PBKDF2 iterations). Team passwords are
+# random, and every team logs in during the opening minutes
+TEAM_PASSWORD_ITERATIONS = int(os.getenv('TEAM_PASSWORD_ITERATIONS', '20000'))
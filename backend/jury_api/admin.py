@@ -1,5 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from .audit import ACTIONS, TARGET_TYPES
 from .models import User, Criterion, Team, TeamScore, AuditLog
 
 
@@ -36,16 +37,46 @@ class TeamScoreAdmin(admin.ModelAdmin):
     search_fields = ['jury__username', 'team__name']
     ordering = ['-created_at']
     readonly_fields = ['created_at', 'updated_at']
+    list_select_related = ['jury', 'team']
     
     def get_total(self, obj):
-        return obj.get_total()
+        return obj.weighted_total
     get_total.short_description = 'Total Score'
 
 
+class AuditActionFilter(admin.SimpleListFilter):
+    """Fixed choices: the default filter would run a DISTINCT over the whole table"""
+    title = 'action'
+    parameter_name = 'action'
+    values = ACTIONS
+
+    def lookups(self, request, model_admin):
+        return [(value, value) for value in self.values]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(action=self.value())
+        return queryset
+
+
+class AuditTargetFilter(AuditActionFilter):
+    title = 'target type'
+    parameter_name = 'target_type'
+    values = TARGET_TYPES
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(target_type=self.value())
+        return queryset
+
+
 @admin.register(AuditLog)
 class AuditLogAdmin(admin.ModelAdmin):
     list_display = ['action', 'user', 'target_type', 'target_id', 'timestamp']
-    list_filter = ['action', 'target_type', 'timestamp']
-    search_fields = ['user__username', 'target_id', 'action']
+    list_filter = [AuditActionFilter, AuditTargetFilter, 'timestamp']
+    # Exact matches use the indexes; icontains would scan every row
+    search_fields = ['=target_id', '=user__username']
     readonly_fields = ['timestamp', 'changes']
     ordering = ['-timestamp']
+    list_select_related = ['user']
+    show_full_result_count = False
@@ -0,0 +1,147 @@
+"""
+Batched audit logging.
+
+log_action() only builds an AuditLog row and hands it to an in-process
+queue once the current transaction commits; a daemon thread writes the
+queued rows with bulk_create every AUDIT_FLUSH_INTERVAL seconds or every
+AUDIT_BATCH_SIZE rows, and the queue is drained at interpreter exit.
+When the queue is full (the writer cannot keep up) the row is written
+synchronously instead of being dropped. With AUDIT_LOG_ASYNC disabled
+(the test settings) every row is written synchronously.
+"""
+import atexit
+import logging
+import queue
+import threading
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Model
+from django.utils import timezone
+from .models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+AUDIT_QUEUE_SIZE = 10000
+AUDIT_BATCH_SIZE = 200
+AUDIT_FLUSH_INTERVAL = 1.0
+# Written as REDACTED: the logs are readable in the admin and kept in the archives
+SENSITIVE_FIELDS = frozenset({'password'})
+REDACTED = '***'
+
+
+def _json_value(value):
+    if isinstance(value, Model):
+        return value.pk
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_json_value(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): _json_value(item) for key, item in value.items()}
+    return str(value)
+
+
+def changed_fields(instance, data):
+    """
+    ``{field: [old, new]}`` for the fields of ``data`` that differ on
+    ``instance`` (call before saving). Sensitive fields are only recorded
+    as set, never with their value.
+    """
+    changes = {}
+    for field, new in data.items():
+        if field in SENSITIVE_FIELDS:
+            changes[field] = REDACTED
+            continue
+        old = getattr(instance, field, None)
+        if old != new:
+            changes[field] = [_json_value(old), _json_value(new)]
+    return changes
+
+
+class AuditPipeline:
+    def __init__(self, maxsize=AUDIT_QUEUE_SIZE, batch_size=AUDIT_BATCH_SIZE, interval=AUDIT_FLUSH_INTERVAL):
+        self.queue = queue.Queue(maxsize)
+        self.batch_size = batch_size
+        self.interval = interval
+        self._thread = None
+        self._start_lock = threading.Lock()
+        # Serialises flushes between the writer thread and the exit hook
+        self._flush_lock = threading.Lock()
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='audit-log-writer', daemon=True)
+                self._thread.start()
+
+    def submit(self, entry):
+        self.start()
+        try:
+            self.queue.put_nowait(entry)
+        except queue.Full:
+            write_entries([entry])
+
+    def _take_batch(self, block):
+        batch = []
+        try:
+            batch.append(self.queue.get(timeout=self.interval) if block else self.queue.get_nowait())
+            while len(batch) < self.batch_size:
+                batch.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def flush(self):
+        """Write everything queued so far"""
+        with self._flush_lock:
+            while True:
+                batch = self._take_batch(block=False)
+                if not batch:
+                    return
+                write_entries(batch)
+
+    def _run(self):
+        while True:
+            batch = self._take_batch(block=True)
+            if not batch:
+                continue
+            with self._flush_lock:
+                write_entries(batch)
+            if self.queue.empty():
+                connections.close_all()
+
+
+def write_entries(entries):
+    try:
+        AuditLog.objects.bulk_create(entries, batch_size=AUDIT_BATCH_SIZE)
+    except Exception:
+        logger.exception("Could not write %d audit log entries", len(entries))
+
+
+pipeline = AuditPipeline()
+atexit.register(pipeline.flush)
+
+
+# Every action and target type written by log_action; the admin filters
+# offer these (add new ones here)
+ACTIONS = [
+    'CREATE', 'UPDATE', 'DELETE', 'LOCK', 'RESET', 'BATCH_SAVE', 'CLEAR_CONVERSATION',
+    'PROVISION', 'SCHEDULE', 'CLEAR_SCHEDULE', 'ADVANCE_QUEUE',
+]
+TARGET_TYPES = ['Criterion', 'Event', 'Message', 'Team', 'TeamScore', 'User']
+
+
+def log_action(user, action, target_type, target_id=None, changes=None):
+    entry = AuditLog(
+        user=user if user and user.is_authenticated else None,
+        action=action,
+        target_type=target_type,
+        target_id=str(target_id) if target_id else None,
+        changes=_json_value(changes or {}),
+        timestamp=timezone.now(),
+    )
+    if getattr(settings, 'AUDIT_LOG_ASYNC', True):
+        transaction.on_commit(lambda: pipeline.submit(entry), robust=True)
+    else:
+        write_entries([entry])
@@ -0,0 +1,133 @@
+"""
+Token authentication with an in-process cache.
+
+DRF's TokenAuthentication runs a Token/User join on every request. Here
+each worker keeps the last AUTH_TOKEN_CACHE_SIZE tokens it has seen in an
+LRU, each entry living AUTH_TOKEN_CACHE_TTL seconds. logout_view and the
+user endpoints evict the entries of the worker that handles them and, once
+their transaction commits, bump the user's auth stamp in the shared cache:
+every worker checks that stamp (one cache read) on each hit and reloads
+the token when it changed, so a logged-out token, a deactivated user or a
+changed role is refused everywhere at once.
+
+With AUTH_TOKEN_EXPIRY_HOURS set, tokens older than that are refused and
+deleted, and the login views hand out a fresh one.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+class TokenCache:
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """``(token, auth stamp it was loaded under)``, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            token, stamp, cached_at = entry
+            if time.monotonic() - cached_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return token, stamp
+
+    def set(self, key, token, stamp=None):
+        with self._lock:
+            self._entries[key] = (token, stamp, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for key in [key for key, (token, _, _) in self._entries.items() if token.user_id == user_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache(
+    maxsize=getattr(settings, 'AUTH_TOKEN_CACHE_SIZE', 10000),
+    ttl=getattr(settings, 'AUTH_TOKEN_CACHE_TTL', 60),
+)
+
+
+def auth_stamp_key(user_id):
+    return f'auth_stamp_{user_id}'
+
+
+def get_auth_stamp(user_id):
+    # None until the user's first invalidation (or once culled: the cached
+    # entries then no longer match and are reloaded)
+    return cache.get(auth_stamp_key(user_id))
+
+
+def token_expired(token):
+    hours = getattr(settings, 'AUTH_TOKEN_EXPIRY_HOURS', None)
+    return bool(hours) and token.created < timezone.now() - timedelta(hours=hours)
+
+
+def issue_token(user):
+    """The user's token, replaced by a new one if it has expired"""
+    token, _ = Token.objects.get_or_create(user=user)
+    if token_expired(token):
+        token_cache.invalidate(token.key)
+        token.delete()
+        token = Token.objects.create(user=user)
+    return token
+
+
+def invalidate_user_tokens(user_id):
+    """
+    Evict the user's tokens here, and on every worker once the current
+    transaction commits (a worker reloading before that would cache the old
+    user under the new stamp).
+    """
+    token_cache.invalidate_user(user_id)
+    transaction.on_commit(lambda: cache.set(auth_stamp_key(user_id), time.time_ns(), None))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        entry = token_cache.get(key)
+        if entry is not None:
+            token, stamp = entry
+            if get_auth_stamp(token.user_id) != stamp:
+                # Invalidated by another worker
+                token_cache.invalidate(key)
+                entry = None
+        if entry is None:
+            user, token = super().authenticate_credentials(key)
+            if token_expired(token):
+                token.delete()
+                raise exceptions.AuthenticationFailed('Token has expired.')
+            token_cache.set(key, token, get_auth_stamp(user.id))
+        elif token_expired(token):
+            token_cache.invalidate(key)
+            Token.objects.filter(key=key).delete()
+            raise exceptions.AuthenticationFailed('Token has expired.')
+        # Views get their own copy: the cached user is shared between requests
+        return copy.copy(token.user), token
@@ -0,0 +1,253 @@
+"""
+Versioned results cache shared by every worker.
+
+Each event has a version counter stored in the shared cache. Results are
+cached under a key that embeds the current version, so bumping the counter
+invalidates the entry for every worker at once, even if one of them is in
+the middle of writing the previous version back.
+
+Rebuilds are single-flight: on a miss only the worker holding the rebuild
+lock computes the results, while the others serve the last known value
+(flagged as stale) or wait briefly for the fresh one. A burst of
+invalidations is followed by one debounced background rebuild.
+
+The same cache also holds data versions: per-event stamps for teams,
+criteria, scores and messages that drive the ETags of the list endpoints.
+"""
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.filebased import FileBasedCache
+from django.db import connections, transaction
+from .results import compute_event_results
+from .pubsub import event_channel, get_broker
+
+RESULTS_TIMEOUT = 300
+VERSION_TIMEOUT = None
+STALE_TIMEOUT = 24 * 3600
+LOCK_TIMEOUT = 30
+WAIT_TIMEOUT = 2.0
+WAIT_INTERVAL = 0.05
+
+
+def results_version_key(event_id):
+    return f'results_version_{event_id}'
+
+
+def get_results_version(event_id):
+    key = results_version_key(event_id)
+    version = cache.get(key)
+    if version is None:
+        # Never set, or culled by the file cache: a new clock stamp, so the
+        # results are rebuilt rather than an old entry reused
+        add_once(key, time.time_ns(), VERSION_TIMEOUT)
+        version = cache.get(key)
+    return version
+
+
+def results_cache_key(event_id, version=None):
+    if version is None:
+        version = get_results_version(event_id)
+    return f'results_{event_id}_v{version}'
+
+
+def results_lock_key(event_id):
+    return f'results_lock_{event_id}'
+
+
+def results_stale_key(event_id):
+    return f'results_last_{event_id}'
+
+
+def _lock_file(key):
+    backend = caches['default']
+    if isinstance(backend, FileBasedCache):
+        return os.path.join(backend._dir, f'{key}.lock')
+    return None
+
+
+def acquire_lock(key, timeout):
+    """
+    Take a cross-worker lock. cache.add() is atomic on the Redis, Memcached,
+    database and local-memory backends but not on the file cache, which
+    gets an exclusive lock file instead.
+    """
+    path = _lock_file(key)
+    if path is None:
+        return cache.add(key, True, timeout)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        if time.time() - os.path.getmtime(path) > timeout:
+            os.remove(path)
+    except OSError:
+        pass
+    try:
+        os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    except FileExistsError:
+        return False
+    return True
+
+
+def release_lock(key):
+    path = _lock_file(key)
+    if path is None:
+        cache.delete(key)
+        return
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def add_once(key, value, timeout):
+    """cache.add() that is atomic on the file cache too (workers racing to initialise a key agree)"""
+    if _lock_file(key) is None:
+        return cache.add(key, value, timeout)
+    lock_key = f'{key}_add'
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while not acquire_lock(lock_key, LOCK_TIMEOUT):
+        if time.monotonic() > deadline:
+            return cache.add(key, value, timeout)
+        time.sleep(0.001)
+    try:
+        return cache.add(key, value, timeout)
+    finally:
+        release_lock(lock_key)
+
+
+def set_cached_results(event_id, results, version=None):
+    cache.set(results_cache_key(event_id, version), results, RESULTS_TIMEOUT)
+    cache.set(results_stale_key(event_id), results, STALE_TIMEOUT)
+
+
+def _rebuild(event_id, version):
+    results = compute_event_results(event_id)
+    set_cached_results(event_id, results, version)
+    return results
+
+
+def get_or_compute_results(event_id):
+    """
+    Return ``(results, is_stale)`` for an event.
+
+    Only one worker rebuilds a missing entry at a time; the others get the
+    last known results with ``is_stale=True``, or wait up to WAIT_TIMEOUT
+    for the rebuild when no previous value exists.
+    """
+    # Read the version once so a concurrent invalidation is never overwritten
+    version = get_results_version(event_id)
+    cache_key = results_cache_key(event_id, version)
+    results = cache.get(cache_key)
+    if results is not None:
+        return results, False
+
+    lock_key = results_lock_key(event_id)
+    if acquire_lock(lock_key, LOCK_TIMEOUT):
+        try:
+            return _rebuild(event_id, version), False
+        finally:
+            release_lock(lock_key)
+
+    stale = cache.get(results_stale_key(event_id))
+    if stale is not None:
+        return stale, True
+
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(WAIT_INTERVAL)
+        results = cache.get(cache_key)
+        if results is not None:
+            return results, False
+
+    # The lock holder is too slow (or died): compute without it
+    return _rebuild(event_id, version), False
+
+
+def bump_results_version(event_id):
+    # A fresh clock stamp, not incr(): on the file cache incr() is a read
+    # then a write, so two concurrent bumps could both store v+1 and leave
+    # results built between them cached under the "new" version
+    cache.set(results_version_key(event_id), time.time_ns(), VERSION_TIMEOUT)
+
+
+_rebuild_timers = {}
+_rebuild_timers_lock = threading.Lock()
+
+
+def _background_rebuild(event_id, timer):
+    with _rebuild_timers_lock:
+        if _rebuild_timers.get(event_id) is timer:
+            del _rebuild_timers[event_id]
+    try:
+        get_or_compute_results(event_id)
+    finally:
+        connections.close_all()
+
+
+def schedule_results_rebuild(event_id):
+    """
+    Rebuild the results in the background once invalidations for the event
+    have stopped for RESULTS_REBUILD_DELAY seconds (disabled when None).
+    """
+    delay = getattr(settings, 'RESULTS_REBUILD_DELAY', None)
+    if delay is None:
+        return
+    with _rebuild_timers_lock:
+        previous = _rebuild_timers.pop(event_id, None)
+        if previous is not None:
+            previous.cancel()
+        timer = threading.Timer(delay, lambda: _background_rebuild(event_id, timer))
+        timer.daemon = True
+        _rebuild_timers[event_id] = timer
+        timer.start()
+
+
+def _invalidate_now(event_id):
+    bump_results_version(event_id)
+    schedule_results_rebuild(event_id)
+    get_broker().publish(event_channel(event_id), {
+        'type': 'ranking_changed', 'data': {'event_id': event_id}
+    })
+
+
+def invalidate_results(event_id):
+    """Invalidate the cached results of an event once the current transaction commits"""
+    if event_id:
+        transaction.on_commit(lambda: _invalidate_now(event_id))
+
+
+# --- Data versions ----------------------------------------------------------
+
+DATA_SCOPES = ('teams', 'criteria', 'scores', 'messages')
+
+
+def data_version_key(scope, event_id=None):
+    return f'data_version_{scope}_{event_id or "all"}'
+
+
+def get_data_versions(scopes, event_id=None):
+    """Current stamps of ``scopes`` for an event (or across events), in one cache read"""
+    keys = [data_version_key(scope, event_id) for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            add_once(key, time.time_ns(), VERSION_TIMEOUT)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def _bump_data_version_now(scope, event_id):
+    stamp = time.time_ns()
+    cache.set_many({data_version_key(scope, event_id): stamp, data_version_key(scope): stamp}, VERSION_TIMEOUT)
+
+
+def bump_data_version(scope, event_id=None):
+    """
+    Change the stamp of ``scope`` for the event and across events once the
+    current transaction commits (bumping earlier could let a reader pair the
+    new stamp with the old rows).
+    """
+    transaction.on_commit(lambda: _bump_data_version_now(scope, event_id))
@@ -0,0 +1,55 @@
+"""
+Conditional GET for the polled endpoints.
+
+ETags are derived from the data versions kept in the shared cache (see
+caching.py) plus the request path and the user, so an unchanged poll is
+answered with 304 Not Modified before any queryset or serializer runs.
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from .caching import get_data_versions
+
+
+def request_event_id(request):
+    event_id = request.query_params.get('event_id')
+    return event_id if event_id and event_id.isdigit() else None
+
+
+def data_etag(request, scopes, event_id=None, extra=()):
+    user = request.user
+    identity = user.pk if user and user.is_authenticated else 'anonymous'
+    parts = [request.get_full_path(), identity, *get_data_versions(scopes, event_id), *extra]
+    return '"%s"' % hashlib.md5('|'.join(map(str, parts)).encode()).hexdigest()
+
+
+def not_modified(request, etag):
+    """Return a 304 response when the client already holds ``etag``, else None"""
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        response['ETag'] = etag
+    return response
+
+
+class ConditionalGetMixin:
+    """Adds ETags and 304 answers to list/retrieve, keyed on ``etag_scopes``"""
+    etag_scopes = ()
+
+    def get_etag(self, request):
+        return data_etag(request, self.etag_scopes, request_event_id(request))
+
+    def _conditional(self, request, handler, *args, **kwargs):
+        etag = self.get_etag(request)
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            response['ETag'] = etag
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional(request, super().retrieve, *args, **kwargs)
@@ -0,0 +1,119 @@
+"""
+Event-scoped conversations between staff and the other users.
+
+An admin talks with each jury/team (the counterpart) and the Staff inbox
+(counterpart ``None``); juries and teams have a single conversation with
+Staff. Pages are cut with keyset cursors on ``(created_at, id)``, so
+fetching older messages or only the ones since the last cursor never
+counts or skips rows.
+"""
+import base64
+from datetime import datetime
+
+from django.db.models import Case, F, IntegerField, Q, Sum, Value, When, Window
+from django.db.models.functions import RowNumber
+from .models import Message
+
+CONVERSATION_PAGE_SIZE = 50
+CONVERSATION_MAX_PAGE_SIZE = 200
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(message):
+    raw = f'{message.created_at.isoformat()}|{message.id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        created_at, message_id = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(message_id)
+    except (ValueError, UnicodeError):
+        raise InvalidCursor("Invalid cursor")
+
+
+def _counterpart(user):
+    if user.role == 'admin':
+        # The non-staff side of the message (None for messages posted to Staff)
+        return Case(
+            When(sender__role='admin', then=F('recipient_id')),
+            default=F('sender_id'),
+            output_field=IntegerField(),
+        )
+    return Value(None, output_field=IntegerField())
+
+
+def _unread_for(user):
+    if user.role == 'admin':
+        return Q(is_read=False) & ~Q(sender__role='admin')
+    return Q(is_read=False, recipient=user)
+
+
+def user_messages(user, event_id):
+    messages = Message.objects.filter(event_id=event_id)
+    if user.role != 'admin':
+        messages = messages.filter(Q(sender=user) | Q(recipient=user))
+    return messages
+
+
+def conversation_messages(user, event_id, counterpart_id=None):
+    """Messages of one conversation of ``user`` (``counterpart_id`` None: the Staff inbox)"""
+    messages = user_messages(user, event_id)
+    if user.role != 'admin':
+        return messages
+    if counterpart_id is None:
+        return messages.filter(recipient__isnull=True, sender__role='admin')
+    return messages.filter(Q(sender_id=counterpart_id) | Q(recipient_id=counterpart_id))
+
+
+def conversation_page(messages, before=None, after=None, limit=CONVERSATION_PAGE_SIZE):
+    """
+    One page of ``messages``, oldest first.
+
+    Without cursor: the latest ``limit`` messages. ``before``: the ones just
+    older than that cursor. ``after``: the ones newer than it (incremental
+    refresh). ``has_more`` tells whether the cut left messages out.
+    """
+    limit = max(1, min(limit, CONVERSATION_MAX_PAGE_SIZE))
+    messages = messages.select_related('sender', 'recipient', 'broadcast')
+    if after:
+        created_at, message_id = decode_cursor(after)
+        messages = messages.filter(
+            Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=message_id)
+        ).order_by('created_at', 'id')
+        page = list(messages[:limit + 1])
+        has_more = len(page) > limit
+        page = page[:limit]
+    else:
+        if before:
+            created_at, message_id = decode_cursor(before)
+            messages = messages.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=message_id))
+        page = list(messages.order_by('-created_at', '-id')[:limit + 1])
+        has_more = len(page) > limit
+        page = page[:limit][::-1]
+    return page, has_more
+
+
+def conversation_summaries(user, event_id):
+    """
+    Last message and unread count of every conversation of ``user``, newest
+    first, in one query (window functions over the event's messages).
+    """
+    partition = [F('counterpart')]
+    return list(
+        user_messages(user, event_id)
+        .annotate(counterpart=_counterpart(user))
+        .annotate(
+            position=Window(RowNumber(), partition_by=partition, order_by=[F('created_at').desc(), F('id').desc()]),
+            unread_count=Window(
+                Sum(Case(When(_unread_for(user), then=1), default=0, output_field=IntegerField())),
+                partition_by=partition,
+            ),
+        )
+        .filter(position=1)
+        .select_related('sender', 'recipient', 'broadcast')
+        .order_by('-created_at', '-id')
+    )
@@ -0,0 +1,140 @@
+import csv
+import tempfile
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from .models import Criterion, User
+from .results import ranked_teams
+
+EXPORT_CHUNK_SIZE = 2000
+# CSV lines / file blocks handed to the event loop per thread hop
+CSV_BATCH_SIZE = 500
+FILE_BLOCK_SIZE = 64 * 1024
+FILE_BATCH_SIZE = 4
+
+
+def iter_results_rows(event_id):
+    """
+    Yield the results sheet of an event row by row.
+
+    One row per jury score (raw score per criterion and weighted total),
+    followed by a TOTAL row per team. Teams come in the ranking of the
+    results page, teams nobody scored included, and only the scores of the
+    current juries are listed, as there. The rows are read through
+    ``iterator()`` (a server-side cursor on PostgreSQL), so memory use does
+    not depend on the event size.
+    """
+    criteria = list(Criterion.objects.filter(event_id=event_id).values_list('id', 'name'))
+    criterion_keys = [str(criterion_id) for criterion_id, _ in criteria]
+
+    yield (
+        ['Rang', 'Projet', 'Track', 'Jury']
+        + [name for _, name in criteria]
+        + ['Total pondéré', 'Verrouillé']
+    )
+
+    juries = dict(User.objects.filter(role='jury', event_id=event_id).values_list('id', 'username'))
+    # Left join: a team without scores still gets its (empty) TOTAL row
+    rows = ranked_teams(event_id).order_by(
+        '-total_score', 'passage_order', 'created_at', 'id', 'teamscore__jury__username'
+    ).values_list(
+        'id', 'name', 'track', 'total_score', 'result__locked_count', 'result__scores_count',
+        'teamscore__jury_id', 'teamscore__scores', 'teamscore__weighted_total', 'teamscore__locked',
+    )
+
+    rank = 0
+    current = None
+    for (team_id, team_name, track, team_total, locked_count, scores_count, jury_id, team_scores,
+         weighted_total, locked) in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        if current is None or current['id'] != team_id:
+            if current is not None:
+                yield _total_row(rank, current)
+            rank += 1
+            current = {'id': team_id, 'name': team_name, 'track': track, 'total': team_total,
+                       'locked': locked_count or 0, 'scored': scores_count or 0,
+                       'sums': [0] * len(criterion_keys)}
+        if jury_id not in juries:
+            # No score, or one from a jury no longer in the event
+            continue
+
+        values = [team_scores.get(key, '') for key in criterion_keys]
+        for index, value in enumerate(values):
+            if value != '':
+                current['sums'][index] += value
+        yield [rank, team_name, track or '', juries[jury_id]] + values + [weighted_total, 'oui' if locked else 'non']
+
+    if current is not None:
+        yield _total_row(rank, current)
+
+
+def _total_row(rank, team):
+    return (
+        [rank, team['name'], team['track'] or '', 'TOTAL'] + team['sums']
+        + [team['total'] or 0, f"{team['locked']}/{team['scored']}"]
+    )
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to the csv writer"""
+    def write(self, value):
+        return value
+
+
+def iter_results_csv(event_id):
+    writer = csv.writer(_Echo(), delimiter=';')
+    # BOM so Excel opens the accents correctly
+    yield '\ufeff'
+    for row in iter_results_rows(event_id):
+        yield writer.writerow(row)
+
+
+def write_results_xlsx(event_id):
+    """
+    Write the results sheet to a temporary .xlsx file and return it, opened.
+
+    openpyxl's write-only mode flushes rows to disk as they are appended.
+    """
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Résultats')
+    for row in iter_results_rows(event_id):
+        sheet.append(row)
+    handle = tempfile.TemporaryFile(suffix='.xlsx')
+    workbook.save(handle)
+    handle.seek(0)
+    return handle
+
+
+def iter_file(handle, block_size=FILE_BLOCK_SIZE):
+    with handle:
+        yield from iter(lambda: handle.read(block_size), b'')
+
+
+async def aiter_sync(iterator, batch_size):
+    """
+    Async iterator over a sync one, ``batch_size`` items (joined) per step.
+
+    Under ASGI Django reads a sync streaming body whole, with
+    sync_to_async(list), before sending any of it; this keeps the export
+    streamed. The steps run in the request's sync thread, so a server-side
+    cursor stays on its connection.
+    """
+    next_batch = sync_to_async(lambda: list(islice(iterator, batch_size)))
+    try:
+        while True:
+            batch = await next_batch()
+            if not batch:
+                return
+            yield batch[0][:0].join(batch)
+    finally:
+        close = getattr(iterator, 'close', None)
+        if close is not None:
+            await sync_to_async(close)()
+
+
+def streaming_body(request, iterator, batch_size):
+    """``iterator`` as the body of a StreamingHttpResponse for ``request`` (WSGI or ASGI)"""
+    if isinstance(request, ASGIRequest):
+        return aiter_sync(iterator, batch_size)
+    return iterator
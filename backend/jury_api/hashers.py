@@ -0,0 +1,25 @@
+"""
+Password hashers whose cost is a deployment setting.
+
+PasswordHasher is the first entry of PASSWORD_HASHERS: it writes
+standard pbkdf2_sha256 hashes at PASSWORD_HASH_ITERATIONS, and, like
+Django's own hasher, rehashes a password at the next login when the
+setting changes. encode_password is the process pool worker of the bulk
+provisioning (see provisioning.py); it uses no settings, so the pool can
+run in fresh interpreters.
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class PasswordHasher(PBKDF2PasswordHasher):
+    iterations_setting = 'PASSWORD_HASH_ITERATIONS'
+
+    @property
+    def iterations(self):
+        return getattr(settings, self.iterations_setting, None) or PBKDF2PasswordHasher.iterations
+
+
+def encode_password(job):
+    password, salt, iterations = job
+    return PBKDF2PasswordHasher().encode(password, salt, iterations)
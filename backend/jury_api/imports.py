@@ -0,0 +1,274 @@
+import csv
+import os
+import re
+import tempfile
+import threading
+import uuid
+
+from django.core.cache import cache
+from django.db import connections, transaction
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import as_serializer_error
+from .caching import bump_data_version
+from .models import Event, Team
+from .serializers import TeamImportSerializer
+
+IMPORT_BATCH_SIZE = 500
+
+
+def _duplicate_errors(event, teams):
+    """
+    Flag rows whose name or generated email is already used in the event,
+    or appears earlier in the same import. Costs a single query.
+    """
+    existing = Team.objects.filter(event=event).values_list('name', 'generated_email')
+    seen_names = {name.strip().lower() for name, _ in existing}
+    seen_emails = {email.lower() for _, email in existing if email}
+
+    errors = {}
+    for index, data in teams:
+        name = data['name'].strip().lower()
+        email = (data.get('generated_email') or '').lower()
+        details = {}
+        if name in seen_names:
+            details['name'] = ['A team with this name already exists in this event.']
+        if email and email in seen_emails:
+            details['generated_email'] = ['This login email is already used in this event.']
+        if details:
+            errors[index] = details
+            continue
+        seen_names.add(name)
+        if email:
+            seen_emails.add(email)
+    return errors
+
+
+def import_teams(event, rows, dry_run=False, batch_size=IMPORT_BATCH_SIZE, imported_from='manual', start_index=0):
+    """
+    Validate and insert many teams for an event.
+
+    All rows are validated in memory before anything is written; the valid
+    ones are then inserted with ``bulk_create`` in one transaction. Returns
+    the same report as the per-row endpoint, plus ``dry_run``. Error indexes
+    are offset by ``start_index`` when ``rows`` is one chunk of a larger file.
+    """
+    # One serializer instance binds its fields once and validates every row
+    serializer = TeamImportSerializer()
+    valid = []
+    errors = []
+    for index, row in enumerate(rows):
+        try:
+            valid.append((index, serializer.run_validation(row)))
+        except ValidationError as exc:
+            errors.append({
+                'index': index,
+                'name': row.get('name', 'Unknown') if isinstance(row, dict) else 'Unknown',
+                'details': as_serializer_error(exc)
+            })
+
+    duplicates = _duplicate_errors(event, valid)
+    for index, details in duplicates.items():
+        errors.append({'index': index, 'name': rows[index].get('name', 'Unknown'), 'details': details})
+    errors.sort(key=lambda error: error['index'])
+    for error in errors:
+        error['index'] += start_index
+
+    teams = [
+        Team(event=event, imported_from=imported_from, **data)
+        for index, data in valid if index not in duplicates
+    ]
+    if not dry_run:
+        with transaction.atomic():
+            teams = Team.objects.bulk_create(teams, batch_size=batch_size)
+            bump_data_version('teams', event.id)
+
+    return {
+        'created_count': len(teams),
+        'teams': TeamImportSerializer(teams, many=True).data,
+        'errors_count': len(errors),
+        'errors': errors if errors else None,
+        'dry_run': dry_run
+    }
+
+
+# --- File imports -----------------------------------------------------------
+
+IMPORT_JOB_TIMEOUT = 3600
+IMPORT_MAX_REPORTED_ERRORS = 200
+
+
+class ImportFileError(Exception):
+    pass
+
+
+def import_job_key(job_id):
+    return f'team_import_{job_id}'
+
+
+def get_import_job(job_id):
+    return cache.get(import_job_key(job_id))
+
+
+def _save_import_job(job_id, job):
+    cache.set(import_job_key(job_id), job, IMPORT_JOB_TIMEOUT)
+
+
+def iter_csv_rows(path):
+    with open(path, newline='', encoding='utf-8-sig') as handle:
+        sample = handle.read(4096)
+        handle.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+        except csv.Error:
+            dialect = csv.excel
+        yield from csv.reader(handle, dialect)
+
+
+def iter_xlsx_rows(path):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFileError("XLSX imports require the openpyxl package")
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for row in workbook.worksheets[0].iter_rows(values_only=True):
+            yield row
+    finally:
+        workbook.close()
+
+
+FILE_READERS = {
+    '.csv': iter_csv_rows,
+    '.xlsx': iter_xlsx_rows,
+}
+
+
+def platform_email(base_email, team_name):
+    """Server-side twin of the frontend generatePlatformEmail()"""
+    if not base_email or '@' not in base_email:
+        return ''
+    local_part, domain = base_email.split('@')[:2]
+    platform_name = re.sub(r'\s+', '_', team_name)
+    return f"{local_part}+{platform_name}@{domain}"
+
+
+def _cell(row, index):
+    if index == -1 or index >= len(row) or row[index] is None:
+        return ''
+    return str(row[index]).strip()
+
+
+def extract_teams(rows, name_column=None, description_column=None, email_column=None,
+                  track_column=None, generate_emails=True):
+    """
+    Stream team dicts out of spreadsheet rows, like extractTeamsFromColumn().
+
+    The first row holds the headers (``Colonne N`` when blank). Columns are
+    picked by header name; the name column defaults to the first one and
+    the email column to the first header mentioning "mail".
+    """
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        return
+    headers = [str(h) if h else f'Colonne {idx + 1}' for idx, h in enumerate(first)]
+
+    def column(header):
+        if header is None:
+            return -1
+        if header not in headers:
+            raise ImportFileError(f"Column '{header}' not found")
+        return headers.index(header)
+
+    if email_column is None:
+        email_column = next((h for h in headers if 'mail' in h.lower()), None)
+    name_index = column(name_column or headers[0])
+    desc_index = column(description_column)
+    email_index = column(email_column)
+    track_index = column(track_column)
+
+    for row in rows:
+        name = _cell(row, name_index)
+        if not name:
+            continue
+        team = {'name': name}
+        if desc_index != -1:
+            team['description'] = _cell(row, desc_index)
+        # Like the admin import, the description doubles as the contact email
+        email = _cell(row, email_index) or team.get('description', '')
+        if email:
+            team['email'] = email
+            if generate_emails:
+                team['generated_email'] = platform_email(email, name) or None
+        if track_index != -1:
+            team['track'] = _cell(row, track_index) or None
+        yield team
+
+
+def run_team_import(job_id, event_id, path, extension, options, dry_run=False, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Import a CSV/XLSX file row by row, in fixed-size batches.
+
+    Only one batch is held in memory at a time; progress is published to the
+    shared cache after every batch so any worker can answer status polls.
+    """
+    job = {
+        'job_id': job_id, 'status': 'running', 'dry_run': dry_run,
+        'processed_count': 0, 'created_count': 0, 'errors_count': 0, 'errors': [],
+    }
+    _save_import_job(job_id, job)
+
+    def flush(batch):
+        report = import_teams(
+            event, batch, dry_run=dry_run, batch_size=batch_size,
+            imported_from='excel', start_index=job['processed_count'],
+        )
+        job['processed_count'] += len(batch)
+        job['created_count'] += report['created_count']
+        job['errors_count'] += report['errors_count']
+        room = IMPORT_MAX_REPORTED_ERRORS - len(job['errors'])
+        job['errors'].extend((report['errors'] or [])[:max(room, 0)])
+        _save_import_job(job_id, job)
+
+    try:
+        event = Event.objects.get(id=event_id)
+        batch = []
+        for team in extract_teams(FILE_READERS[extension](path), **options):
+            batch.append(team)
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch = []
+        if batch:
+            flush(batch)
+        job['status'] = 'completed'
+    except Exception as e:
+        job['status'] = 'failed'
+        job['error'] = str(e)
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+        _save_import_job(job_id, job)
+    return job
+
+
+def start_team_import(event, uploaded_file, options, dry_run=False):
+    """Spool the upload to disk and import it in a background thread"""
+    extension = os.path.splitext(uploaded_file.name)[1].lower()
+    if extension not in FILE_READERS:
+        raise ImportFileError("Unsupported file type, use .csv or .xlsx")
+
+    with tempfile.NamedTemporaryFile(suffix=extension, delete=False) as handle:
+        for chunk in uploaded_file.chunks():
+            handle.write(chunk)
+
+    job_id = uuid.uuid4().hex
+    _save_import_job(job_id, {'job_id': job_id, 'status': 'pending', 'dry_run': dry_run})
+
+    def target():
+        try:
+            run_team_import(job_id, event.id, handle.name, extension, options, dry_run=dry_run)
+        finally:
+            connections.close_all()
+
+    threading.Thread(target=target, daemon=True).start()
+    return job_id
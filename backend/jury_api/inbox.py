@@ -0,0 +1,85 @@
+"""
+Unread message counters.
+
+Every inbox has an UnreadCounter row: one per user for direct messages,
+one per event for the Staff inbox (messages without recipient, read by
+every admin) and one Staff total across events. Single messages are
+counted by signals; bulk writes go through mark_read() and add_unread().
+"""
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import F, Sum
+from django.db.models.functions import Greatest
+from .caching import bump_data_version
+from .models import UnreadCounter
+
+
+def user_inbox(user_id):
+    return f'user_{user_id}'
+
+
+def staff_inbox(event_id=None):
+    return f'staff_{event_id or "all"}'
+
+
+def message_inboxes(recipient_id, event_id):
+    if recipient_id:
+        return [user_inbox(recipient_id)]
+    return [staff_inbox(event_id), staff_inbox()]
+
+
+def user_inboxes(user, event_id=None):
+    """Inboxes counted for ``user``: admins also read the Staff inbox"""
+    keys = [user_inbox(user.id)]
+    if user.role == 'admin':
+        keys.append(staff_inbox(event_id))
+    return keys
+
+
+def adjust_unread(deltas):
+    """Apply ``{inbox: delta}`` to the counters: two queries per distinct delta, whatever the number of inboxes"""
+    by_delta = defaultdict(list)
+    for key, delta in deltas.items():
+        if delta:
+            by_delta[delta].append(key)
+    for delta, keys in by_delta.items():
+        # Missing rows start at 0; existing ones are left alone
+        UnreadCounter.objects.bulk_create([UnreadCounter(key=key) for key in keys], ignore_conflicts=True)
+        UnreadCounter.objects.filter(key__in=keys).update(count=Greatest(F('count') + delta, 0))
+
+
+def inbox_deltas(rows, sign):
+    """Count ``(recipient_id, event_id)`` rows per inbox"""
+    deltas = Counter()
+    for recipient_id, event_id in rows:
+        for key in message_inboxes(recipient_id, event_id):
+            deltas[key] += sign
+    return deltas
+
+
+def add_unread(messages):
+    """Count messages created without signals (bulk_create)"""
+    adjust_unread(inbox_deltas(
+        [(m.recipient_id, m.event_id) for m in messages if not m.is_read], 1
+    ))
+
+
+def mark_read(queryset):
+    """Mark the unread messages of ``queryset`` as read and update the counters"""
+    with transaction.atomic():
+        rows = list(queryset.filter(is_read=False).select_for_update().values_list('id', 'recipient_id', 'event_id'))
+        if not rows:
+            return 0
+        count = queryset.model.objects.filter(id__in=[row[0] for row in rows]).update(is_read=True)
+        adjust_unread(inbox_deltas([row[1:] for row in rows], -1))
+        # The ETags of the event-scoped lists too, not only the "all" stamp
+        for event_id in {row[2] for row in rows}:
+            bump_data_version('messages', event_id)
+    return count
+
+
+def unread_count(user, event_id=None):
+    """Unread messages of ``user``: one indexed lookup on the counters"""
+    total = UnreadCounter.objects.filter(key__in=user_inboxes(user, event_id)).aggregate(total=Sum('count'))['total']
+    return total or 0
@@ -0,0 +1,160 @@
+"""
+Live presentation queue.
+
+Each event has one QueueState row: the passage_order of the slot on stage
+and the number of juries. Reading the queue is that row plus two indexed
+range reads on teams (the current slot and the next few), with each
+team's locked-score count taken from its TeamResult rollup (which only
+counts the event's current juries); nothing scans the scores.
+
+The row changes when scores lock or are reset (once every jury has locked
+every team of the current slot, the queue moves on by itself), when a jury
+joins or leaves the event, when the admin advances it, and when the
+passage order is drawn again (it then restarts at the first slot). Each
+change bumps its version and is pushed to the event's live stream as a
+``queue`` message.
+"""
+from django.db import transaction
+from django.db.models import Max, Min
+from .models import Event, QueueState, Team, User
+from .pubsub import publish_to_event
+
+DEFAULT_UPCOMING = 5
+MAX_UPCOMING = 50
+
+
+def _scheduled(event_id):
+    return Team.objects.filter(event_id=event_id, passage_order__isnull=False)
+
+
+def first_slot(event_id):
+    return _scheduled(event_id).aggregate(order=Min('passage_order'))['order']
+
+
+def next_slot(event_id, after):
+    return _scheduled(event_id).filter(passage_order__gt=after).aggregate(order=Min('passage_order'))['order']
+
+
+def previous_slot(event_id, before):
+    teams = _scheduled(event_id)
+    if before is not None:
+        teams = teams.filter(passage_order__lt=before)
+    return teams.aggregate(order=Max('passage_order'))['order']
+
+
+def count_juries(event_id):
+    return User.objects.filter(role='jury', event_id=event_id).count()
+
+
+def get_queue_state(event_id):
+    """The event's state, started at the first slot on first use; None for an unknown event"""
+    state = QueueState.objects.filter(event_id=event_id).first()
+    if state is None:
+        if not Event.objects.filter(id=event_id).exists():
+            return None
+        state, _ = QueueState.objects.get_or_create(event_id=event_id, defaults={
+            'current_order': first_slot(event_id), 'jury_count': count_juries(event_id)
+        })
+    return state
+
+
+def _locked_state(event_id):
+    get_queue_state(event_id)
+    return QueueState.objects.select_for_update().get(event_id=event_id)
+
+
+def _save(state):
+    state.version += 1
+    state.save()
+    publish_to_event(state.event_id, 'queue', {'current_order': state.current_order, 'version': state.version})
+
+
+def _locked_count(team):
+    return team.result.locked_count if hasattr(team, 'result') else 0
+
+
+def slot_complete(event_id, order, jury_count):
+    teams = list(Team.objects.filter(event_id=event_id, passage_order=order).select_related('result'))
+    return jury_count > 0 and bool(teams) and all(_locked_count(team) >= jury_count for team in teams)
+
+
+def scores_changed(event_id, team_ids):
+    """After scores of ``team_ids`` were locked or reset"""
+    with transaction.atomic():
+        state = _locked_state(event_id)
+        state.jury_count = count_juries(event_id)
+        if (
+            state.current_order is not None
+            and Team.objects.filter(id__in=team_ids, passage_order=state.current_order).exists()
+            and slot_complete(event_id, state.current_order, state.jury_count)
+        ):
+            state.current_order = next_slot(event_id, state.current_order)
+        _save(state)
+    return state
+
+
+def recount_juries(event_id):
+    """After a jury joined or left the event (its rollups already follow)"""
+    with transaction.atomic():
+        state = QueueState.objects.select_for_update().filter(event_id=event_id).first()
+        if state is None:
+            # Counted when first used
+            return None
+        state.jury_count = count_juries(event_id)
+        # Leaving can complete the current slot
+        if state.current_order is not None and slot_complete(event_id, state.current_order, state.jury_count):
+            state.current_order = next_slot(event_id, state.current_order)
+        _save(state)
+    return state
+
+
+def advance_queue(event_id, direction='next', passage_order=None):
+    """Move to the next or previous slot, or to ``passage_order``"""
+    with transaction.atomic():
+        state = _locked_state(event_id)
+        if passage_order is not None:
+            state.current_order = passage_order
+        elif direction == 'previous':
+            state.current_order = previous_slot(event_id, state.current_order)
+        elif state.current_order is not None:
+            state.current_order = next_slot(event_id, state.current_order)
+        state.jury_count = count_juries(event_id)
+        _save(state)
+    return state
+
+
+def reset_queue(event_id):
+    """The passage order changed: start again from the first slot on next use"""
+    QueueState.objects.filter(event_id=event_id).delete()
+
+
+def _team_entry(team, jury_count):
+    locked = _locked_count(team)
+    return {
+        'id': team.id,
+        'name': team.name,
+        'track': team.track,
+        'passage_order': team.passage_order,
+        'passage_time': team.passage_time,
+        'locked_count': locked,
+        'complete': jury_count > 0 and locked >= jury_count,
+    }
+
+
+def queue_snapshot(state, upcoming=DEFAULT_UPCOMING):
+    current, following = [], []
+    if state.current_order is not None:
+        teams = Team.objects.filter(event_id=state.event_id).select_related('result').only(
+            'id', 'name', 'track', 'passage_order', 'passage_time', 'created_at', 'result__locked_count'
+        )
+        current = list(teams.filter(passage_order=state.current_order))
+        following = list(teams.filter(passage_order__gt=state.current_order)[:upcoming])
+    return {
+        'event_id': state.event_id,
+        'current_order': state.current_order,
+        'jury_count': state.jury_count,
+        'version': state.version,
+        'updated_at': state.updated_at,
+        'current': [_team_entry(team, state.jury_count) for team in current],
+        'next': [_team_entry(team, state.jury_count) for team in following],
+    }
@@ -0,0 +1,64 @@
+import gzip
+import json
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+from jury_api.models import AuditLog
+
+ARCHIVE_FIELDS = ['id', 'timestamp', 'user_id', 'user__username', 'action', 'target_type', 'target_id', 'changes']
+
+
+class Command(BaseCommand):
+    help = (
+        "Move audit log entries older than --days into a gzipped JSONL archive, "
+        "deleting them in chunks (run daily, e.g. from cron)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.AUDIT_LOG_RETENTION_DAYS,
+                            help="Keep this many days in the table (default: AUDIT_LOG_RETENTION_DAYS)")
+        parser.add_argument('--output-dir', default=settings.AUDIT_ARCHIVE_DIR,
+                            help="Directory of the archives (default: AUDIT_ARCHIVE_DIR)")
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument('--dry-run', action='store_true', help="Only count the entries to archive")
+
+    def handle(self, *args, **options):
+        if options['days'] < 0 or options['chunk_size'] < 1:
+            raise CommandError("--days must be >= 0 and --chunk-size >= 1")
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        expired = AuditLog.objects.filter(timestamp__lt=cutoff)
+
+        if options['dry_run']:
+            self.stdout.write(f"{expired.count()} entries older than {cutoff:%Y-%m-%d %H:%M} would be archived")
+            return
+
+        os.makedirs(options['output_dir'], exist_ok=True)
+        path = os.path.join(
+            options['output_dir'], f"audit_logs_before_{cutoff:%Y%m%dT%H%M%S}_{timezone.now():%Y%m%dT%H%M%S}.jsonl.gz"
+        )
+        archived = 0
+        with gzip.open(path, 'wt', encoding='utf-8') as archive:
+            while True:
+                # Oldest first through the timestamp index; each chunk is deleted once written
+                rows = list(expired.order_by('timestamp', 'id').values(*ARCHIVE_FIELDS)[:options['chunk_size']])
+                if not rows:
+                    break
+                for row in rows:
+                    row['username'] = row.pop('user__username')
+                    archive.write(json.dumps(row, cls=DjangoJSONEncoder) + '\n')
+                # Flushed (and readable) before the rows go away
+                archive.flush()
+                with transaction.atomic():
+                    AuditLog.objects.filter(id__in=[row['id'] for row in rows]).delete()
+                archived += len(rows)
+
+        if not archived:
+            os.remove(path)
+            self.stdout.write("Nothing to archive")
+            return
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} entries to {path}"))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from jury_api.models import Event
+
+
+class Command(BaseCommand):
+    help = "Persist event statuses derived from their date (run daily, e.g. from cron)"
+
+    def handle(self, *args, **options):
+        count = Event.objects.update_statuses()
+        self.stdout.write(self.style.SUCCESS(f"Updated {count} event(s)"))
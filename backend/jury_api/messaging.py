@@ -0,0 +1,57 @@
+from django.db import transaction
+from .caching import bump_data_version
+from .inbox import add_unread
+from .models import Broadcast, Message, User
+from .pubsub import publish_new_message
+
+# Above this audience the content is stored once, on a Broadcast row
+BROADCAST_CONTENT_THRESHOLD = 50
+BROADCAST_BATCH_SIZE = 500
+
+
+def resolve_recipients(ids=None, role=None, event_id=None, track=None):
+    """
+    Select the recipients of a broadcast in one query.
+
+    ``ids`` picks users explicitly; ``role``, ``event_id`` and ``track``
+    narrow the selection (e.g. every jury of one track). Returns
+    ``(users, skipped ids)``, skipped ids being the ones that matched nobody.
+    """
+    users = User.objects.all()
+    if ids is not None:
+        users = users.filter(id__in=ids)
+    if role:
+        users = users.filter(role=role)
+    if event_id:
+        users = users.filter(event_id=event_id)
+    if track:
+        users = users.filter(track=track)
+    users = list(users.only('id'))
+
+    found = {user.id for user in users}
+    skipped = [user_id for user_id in dict.fromkeys(ids or []) if user_id not in found]
+    return users, skipped
+
+
+def broadcast_message(sender, event, content, recipients):
+    """
+    Send ``content`` to every user of ``recipients`` with a single INSERT
+    (per batch). Large audiences share one Broadcast row: their Message rows
+    only carry the per-recipient read state.
+    """
+    broadcast = None
+    with transaction.atomic():
+        if len(recipients) > BROADCAST_CONTENT_THRESHOLD:
+            broadcast = Broadcast.objects.create(
+                sender=sender, event=event, content=content, recipients_count=len(recipients)
+            )
+            content = ''
+        messages = Message.objects.bulk_create([
+            Message(sender=sender, recipient=recipient, event=event, content=content, broadcast=broadcast)
+            for recipient in recipients
+        ], batch_size=BROADCAST_BATCH_SIZE)
+        add_unread(messages)
+        bump_data_version('messages', event.id)
+    for message in messages:
+        publish_new_message(message)
+    return broadcast, messages
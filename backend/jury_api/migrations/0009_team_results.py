@@ -0,0 +1,59 @@
+# Generated by Django 5.2.9 on 2026-10-17 10:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_aggregates(apps, schema_editor):
+    Criterion = apps.get_model('jury_api', 'Criterion')
+    TeamScore = apps.get_model('jury_api', 'TeamScore')
+    TeamResult = apps.get_model('jury_api', 'TeamResult')
+
+    weights = {c.id: float(c.weight) for c in Criterion.objects.all()}
+    results = {}
+    team_scores = list(TeamScore.objects.all())
+    for team_score in team_scores:
+        team_score.weighted_total = sum(
+            float(score) * weights.get(int(criterion_id), 1.0)
+            for criterion_id, score in team_score.scores.items()
+        )
+        result = results.setdefault(team_score.team_id, TeamResult(
+            team_id=team_score.team_id, event_id=team_score.event_id
+        ))
+        result.total_score += team_score.weighted_total
+        result.scores_count += 1
+        result.locked_count += int(team_score.locked)
+
+    TeamScore.objects.bulk_update(team_scores, ['weighted_total'], batch_size=500)
+    TeamResult.objects.bulk_create(results.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jury_api', '0008_alter_user_event'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='teamscore',
+            name='weighted_total',
+            field=models.FloatField(default=0),
+        ),
+        migrations.CreateModel(
+            name='TeamResult',
+            fields=[
+                ('team', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='result', serialize=False, to='jury_api.team')),
+                ('total_score', models.FloatField(default=0)),
+                ('scores_count', models.IntegerField(default=0)),
+                ('locked_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='team_results', to='jury_api.event')),
+            ],
+            options={
+                'db_table': 'team_results',
+                'ordering': ['-total_score'],
+            },
+        ),
+        migrations.RunPython(backfill_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.9 on 2026-10-17 10:11
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('jury_api', '0009_team_results'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['recipient', 'is_read'], name='messages_recipient_read_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='team',
+            index=models.Index(fields=['event', 'passage_order', 'created_at'], name='teams_event_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='team',
+            index=models.Index(fields=['generated_email'], name='teams_gen_email_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='team',
+            index=models.Index(django.db.models.functions.text.Upper('generated_email'), name='teams_gen_email_upper_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teamscore',
+            index=models.Index(fields=['event', 'locked'], name='team_scores_event_locked_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teamscore',
+            index=models.Index(fields=['jury', 'event', 'locked'], name='team_scores_jury_event_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['role', 'event'], name='users_role_event_idx'),
+        ),
+    ]
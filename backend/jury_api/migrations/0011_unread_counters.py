@@ -0,0 +1,42 @@
+# Generated by Django 5.2.9 on 2026-10-17 10:23
+
+from collections import Counter
+
+from django.db import migrations, models
+
+
+def backfill_counters(apps, schema_editor):
+    Message = apps.get_model('jury_api', 'Message')
+    UnreadCounter = apps.get_model('jury_api', 'UnreadCounter')
+
+    counts = Counter()
+    for recipient_id, event_id in Message.objects.filter(is_read=False).values_list('recipient_id', 'event_id'):
+        if recipient_id:
+            counts[f'user_{recipient_id}'] += 1
+        else:
+            counts[f'staff_{event_id}'] += 1
+            counts['staff_all'] += 1
+    UnreadCounter.objects.bulk_create(
+        [UnreadCounter(key=key, count=count) for key, count in counts.items()], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jury_api', '0010_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UnreadCounter',
+            fields=[
+                ('key', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'unread_counters',
+            },
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
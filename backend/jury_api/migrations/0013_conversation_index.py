@@ -0,0 +1,17 @@
+# Generated by Django 5.2.9 on 2026-10-17 10:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jury_api', '0012_broadcasts'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['event', 'created_at', 'id'], name='messages_event_created_idx'),
+        ),
+    ]
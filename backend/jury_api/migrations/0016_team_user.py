@@ -0,0 +1,50 @@
+# Generated by Django 5.2.9 on 2026-10-17 10:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, identify_hasher, make_password
+from django.db import migrations, models
+
+
+def team_hasher():
+    # The cost jury_api.team_auth uses, so the first login needs no rehash
+    hasher = PBKDF2PasswordHasher()
+    hasher.iterations = getattr(settings, 'TEAM_PASSWORD_ITERATIONS', None) or PBKDF2PasswordHasher.iterations
+    return hasher
+
+
+def hash_passwords_and_link_users(apps, schema_editor):
+    Team = apps.get_model('jury_api', 'Team')
+    User = apps.get_model('jury_api', 'User')
+
+    hasher = team_hasher()
+    teams = list(Team.objects.all())
+    users = {
+        user.username: user.id
+        for user in User.objects.filter(role='team', team__isnull=True)
+    }
+    for team in teams:
+        if team.password:
+            try:
+                identify_hasher(team.password)
+            except ValueError:
+                # Stored in clear text until now
+                team.password = make_password(team.password, hasher=hasher)
+        team.user_id = users.pop(team.generated_email or team.email or '', None)
+    Team.objects.bulk_update(teams, ['password', 'user'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jury_api', '0015_audit_log_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='team',
+            name='user',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='team', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(hash_passwords_and_link_users, migrations.RunPython.noop),
+    ]
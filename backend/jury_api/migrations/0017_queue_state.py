@@ -0,0 +1,27 @@
+# Generated by Django 5.2.9 on 2026-10-17 10:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jury_api', '0016_team_user'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueueState',
+            fields=[
+                ('event', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='queue_state', serialize=False, to='jury_api.event')),
+                ('current_order', models.IntegerField(blank=True, null=True)),
+                ('jury_count', models.IntegerField(default=0)),
+                ('version', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'queue_states',
+            },
+        ),
+    ]
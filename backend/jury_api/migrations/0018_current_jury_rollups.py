@@ -0,0 +1,30 @@
+from django.db import migrations
+from django.db.models import Count, F, Q, Sum
+
+
+def rebuild_rollups(apps, schema_editor):
+    """The rollups now only count the scores of each event's current juries"""
+    TeamScore = apps.get_model('jury_api', 'TeamScore')
+    TeamResult = apps.get_model('jury_api', 'TeamResult')
+
+    rollups = TeamScore.objects.filter(jury__role='jury', jury__event_id=F('event_id')).values(
+        'team_id', 'event_id'
+    ).annotate(
+        total_score=Sum('weighted_total'),
+        scores_count=Count('id'),
+        locked_count=Count('id', filter=Q(locked=True)),
+    ).order_by()
+
+    TeamResult.objects.all().delete()
+    TeamResult.objects.bulk_create([TeamResult(**row) for row in rollups], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jury_api', '0017_queue_state'),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_rollups, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,46 @@
+from datetime import datetime, time, timedelta, timezone as dt_timezone
 from django.db import models
+from django.db.models.functions import Upper
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MinValueValidator
+from django.utils import timezone
 import json
 
 
+class EventQuerySet(models.QuerySet):
+    @staticmethod
+    def day_bounds():
+        """Start of today and of tomorrow (UTC), the boundaries between statuses"""
+        today = datetime.combine(timezone.now().date(), time.min, tzinfo=dt_timezone.utc)
+        return today, today + timedelta(days=1)
+
+    def with_current_status(self):
+        """
+        Annotate ``current_status`` from the event date, without writing it back.
+
+        A status stored as 'completed' is kept; otherwise past events are
+        completed, today's are ongoing and future ones are upcoming.
+        """
+        today, tomorrow = self.day_bounds()
+        return self.annotate(current_status=models.Case(
+            models.When(status='completed', then=models.Value('completed')),
+            models.When(date__lt=today, then=models.Value('completed')),
+            models.When(date__lt=tomorrow, then=models.Value('ongoing')),
+            default=models.Value('upcoming'),
+            output_field=models.CharField(),
+        ))
+
+    def update_statuses(self):
+        """Persist the date-derived status with bulk UPDATEs; returns the rows changed"""
+        today, tomorrow = self.day_bounds()
+        pending = self.exclude(status='completed')
+        return (
+            pending.filter(date__lt=today).update(status='completed')
+            + pending.filter(date__gte=today, date__lt=tomorrow).exclude(status='ongoing').update(status='ongoing')
+            + pending.filter(date__gte=tomorrow).exclude(status='upcoming').update(status='upcoming')
+        )
+
+
 class Event(models.Model):
     STATUS_CHOICES = [
         ('upcoming', 'Upcoming'),
@@ -20,6 +57,8 @@ class Event(models.Model):
     presentation_duration = models.IntegerField(default=10, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = EventQuerySet.as_manager()
+
     class Meta:
         db_table = 'events'
         ordering = ['-date']
@@ -42,6 +81,9 @@ class User(AbstractUser):
     
     class Meta:
         db_table = 'users'
+        indexes = [
+            models.Index(fields=['role', 'event'], name='users_role_event_idx'),
+        ]
 
 
 class Criterion(models.Model):
@@ -67,8 +109,10 @@ class Team(models.Model):
     description = models.TextField(blank=True, null=True)
     email = models.EmailField(blank=True, null=True)
     generated_email = models.EmailField(blank=True, null=True)
+    # Hashed (see team_auth); empty until the first login generates it
     password = models.CharField(max_length=128, blank=True, null=True)
     has_logged_in = models.BooleanField(default=False)
+    user = models.OneToOneField('User', on_delete=models.SET_NULL, null=True, blank=True, related_name='team')
     passage_order = models.IntegerField(null=True, blank=True)
     passage_time = models.CharField(max_length=100, null=True, blank=True)
     track = models.CharField(max_length=100, blank=True, null=True)
@@ -78,6 +122,12 @@ class Team(models.Model):
     class Meta:
         db_table = 'teams'
         ordering = ['passage_order', 'created_at']
+        indexes = [
+            models.Index(fields=['event', 'passage_order', 'created_at'], name='teams_event_order_idx'),
+            models.Index(fields=['generated_email'], name='teams_gen_email_idx'),
+            # Case-insensitive lookups (generated_email__iexact)
+            models.Index(Upper('generated_email'), name='teams_gen_email_upper_idx'),
+        ]
     
     def __str__(self):
         return self.name
@@ -92,6 +142,7 @@ class TeamScore(models.Model):
     global_comments = models.TextField(blank=True, null=True)
     locked = models.BooleanField(default=False)
     submitted_at = models.DateTimeField(null=True, blank=True)
+    weighted_total = models.FloatField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -99,20 +150,54 @@ class TeamScore(models.Model):
         db_table = 'team_scores'
         unique_together = [['jury', 'team']]
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['event', 'locked'], name='team_scores_event_locked_idx'),
+            models.Index(fields=['jury', 'event', 'locked'], name='team_scores_jury_event_idx'),
+        ]
     
     def __str__(self):
         return f"{self.jury.username} -> {self.team.name}"
     
-    def get_total(self):
+    def get_total(self, weights=None):
         """Calculate total score with weights"""
-        total = 0
-        from .models import Criterion
-        criteria_map = {c.id: c.weight for c in Criterion.objects.filter(event=self.event)}
-        
-        for criterion_id, score in self.scores.items():
-            weight = criteria_map.get(int(criterion_id), 1.0)
-            total += float(score) * float(weight)
-        return total
+        from .results import get_criteria_weights, weighted_total
+        if weights is None:
+            weights = get_criteria_weights(self.event_id)
+        return weighted_total(self.scores, weights)
+
+
+class TeamResult(models.Model):
+    """Per-team rollup of the weighted TeamScore totals, maintained by signals"""
+    team = models.OneToOneField(Team, on_delete=models.CASCADE, primary_key=True, related_name='result')
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='team_results')
+    total_score = models.FloatField(default=0)
+    scores_count = models.IntegerField(default=0)
+    locked_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'team_results'
+        ordering = ['-total_score']
+
+    def __str__(self):
+        return f"{self.team.name}: {self.total_score}"
+
+
+class QueueState(models.Model):
+    """Where the presentations of an event are, kept by live_queue.py"""
+    event = models.OneToOneField(Event, on_delete=models.CASCADE, primary_key=True, related_name='queue_state')
+    # passage_order of the slot on stage; empty once the last slot is done
+    current_order = models.IntegerField(null=True, blank=True)
+    jury_count = models.IntegerField(default=0)
+    # Bumped on every change (part of the queue's ETag)
+    version = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'queue_states'
+
+    def __str__(self):
+        return f"{self.event_id}: {self.current_order}"
 
 
 class AuditLog(models.Model):
@@ -121,28 +206,70 @@ class AuditLog(models.Model):
     target_type = models.CharField(max_length=100)
     target_id = models.CharField(max_length=100, blank=True, null=True)
     changes = models.JSONField(default=dict)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when the action happens, not when the batch is written
+    timestamp = models.DateTimeField(default=timezone.now)
 
     class Meta:
         db_table = 'audit_logs'
         ordering = ['-timestamp']
+        indexes = [
+            # Changelist ordering, date filter and retention cut-off
+            models.Index(fields=['timestamp'], name='audit_logs_timestamp_idx'),
+            models.Index(fields=['action', 'timestamp'], name='audit_logs_action_ts_idx'),
+            models.Index(fields=['target_type', 'timestamp'], name='audit_logs_target_ts_idx'),
+            models.Index(fields=['target_id'], name='audit_logs_target_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.action} on {self.target_type} at {self.timestamp}"
 
 
+class Broadcast(models.Model):
+    """Content of a message sent to a large audience, shared by its per-recipient Message rows"""
+    sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='broadcasts')
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='broadcasts')
+    content = models.TextField()
+    recipients_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'broadcasts'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.sender.username} -> {self.recipients_count} recipients"
+
+
 class Message(models.Model):
     sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sent_messages')
     recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='received_messages', null=True, blank=True)
     event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='messages', null=False, blank=False)
     content = models.TextField()
+    # Set on the read receipts of a large broadcast, whose content stays on the Broadcast
+    broadcast = models.ForeignKey(Broadcast, on_delete=models.CASCADE, related_name='receipts', null=True, blank=True)
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         db_table = 'messages'
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['recipient', 'is_read'], name='messages_recipient_read_idx'),
+            models.Index(fields=['event', 'created_at', 'id'], name='messages_event_created_idx'),
+        ]
 
     def __str__(self):
         recipient_name = self.recipient.username if self.recipient else "Staff"
         return f"{self.sender.username} -> {recipient_name}"
+
+
+class UnreadCounter(models.Model):
+    """Unread messages of one inbox (a user, or the Staff inbox of an event), maintained by signals"""
+    key = models.CharField(max_length=50, primary_key=True)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'unread_counters'
+
+    def __str__(self):
+        return f"{self.key}: {self.count}"
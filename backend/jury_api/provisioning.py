@@ -0,0 +1,112 @@
+"""
+Bulk account provisioning.
+
+Creates the jury accounts of an event in one request: the passwords are
+generated here and hashed in parallel across a process pool (PBKDF2 holds
+the GIL, so threads would not help), then every account is inserted with
+one bulk_create inside a single transaction. The generated credentials are
+only ever returned in that response. Team accounts are not provisioned:
+a team's User is created and linked to its Team by the team login flow.
+"""
+import multiprocessing
+import os
+import re
+import secrets
+import string
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher
+from django.db import transaction
+from .hashers import PasswordHasher, encode_password
+from .models import User
+
+GENERATED_PASSWORD_LENGTH = 12
+# Below this, starting the pool costs more than it saves
+PARALLEL_HASH_THRESHOLD = 4
+
+
+class ProvisioningError(Exception):
+    pass
+
+
+def generate_password():
+    alphabet = string.ascii_letters + string.digits
+    return ''.join(secrets.choice(alphabet) for _ in range(GENERATED_PASSWORD_LENGTH))
+
+
+def hash_workers(count):
+    workers = getattr(settings, 'PROVISIONING_HASH_WORKERS', 0) or os.cpu_count() or 1
+    return min(workers, count)
+
+
+def hash_passwords(passwords):
+    """Hashes of ``passwords`` with the default hasher, computed across a process pool"""
+    hasher = get_hasher()
+    workers = hash_workers(len(passwords))
+    if workers <= 1 or len(passwords) < PARALLEL_HASH_THRESHOLD or not isinstance(hasher, PasswordHasher):
+        return [hasher.encode(password, hasher.salt()) for password in passwords]
+
+    jobs = [(password, hasher.salt(), hasher.iterations) for password in passwords]
+    # Fresh interpreters: forking a worker that runs threads (audit writer,
+    # live broker) could copy a held lock into the children
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        return list(pool.map(encode_password, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+
+
+def username_base(account, role):
+    base = account.get('username') or re.sub(r'[^a-z0-9]', '', (account.get('name') or '').lower())
+    return base or role
+
+
+def assign_usernames(accounts, role):
+    """
+    Explicit usernames must be free; generated ones (from the name) get the
+    first free numeric suffix.
+    """
+    bases = [username_base(account, role) for account in accounts]
+    taken = set(User.objects.filter(
+        username__regex=r'^(%s)\d*$' % '|'.join(re.escape(base) for base in set(bases))
+    ).values_list('username', flat=True))
+
+    usernames = []
+    for account, base in zip(accounts, bases):
+        if account.get('username'):
+            if base in taken:
+                raise ProvisioningError(f"Username '{base}' already exists")
+            username = base
+        else:
+            suffix = 1
+            username = f"{base}{suffix:02d}"
+            while username in taken:
+                suffix += 1
+                username = f"{base}{suffix:02d}"
+        taken.add(username)
+        usernames.append(username)
+    return usernames
+
+
+def provision_users(event, role, accounts, track=None):
+    """
+    Create the ``accounts`` (dicts with a name, and optionally a username,
+    email and track) of ``event``; returns the users and their passwords.
+    """
+    passwords = [generate_password() for _ in accounts]
+    # Hashed before the transaction: the slow part holds no lock
+    hashes = hash_passwords(passwords)
+
+    with transaction.atomic():
+        usernames = assign_usernames(accounts, role)
+        users = User.objects.bulk_create([
+            User(
+                username=username,
+                password=password_hash,
+                role=role,
+                event=event,
+                first_name=account.get('name', ''),
+                email=account.get('email', ''),
+                track=account.get('track') or track,
+            )
+            for account, username, password_hash in zip(accounts, usernames, hashes)
+        ])
+    return users, passwords
@@ -0,0 +1,175 @@
+"""
+Publish/subscribe fan-out for the live event streams.
+
+Views publish small deltas (score locked, ranking changed, passage order
+updated, new message) on named channels; every open event stream holds a
+Subscription with a bounded queue. The default InProcessBroker only reaches
+streams served by the same process. Set LIVE_BROKER_URL to a redis:// URL
+to fan out through Redis when writes and streams run in different processes.
+"""
+import asyncio
+import json
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+SUBSCRIPTION_QUEUE_SIZE = 100
+
+
+def event_channel(event_id):
+    return f'event_{event_id}'
+
+
+def user_channel(user_id):
+    return f'user_{user_id}'
+
+
+def staff_channel(event_id):
+    return f'staff_{event_id}'
+
+
+class Subscription:
+    """Messages of some channels, queued for one stream (oldest dropped when full)"""
+
+    def __init__(self, broker, channels, maxsize=SUBSCRIPTION_QUEUE_SIZE):
+        self.broker = broker
+        self.channels = list(channels)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+
+    def deliver(self, message):
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    def __init__(self):
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, channels):
+        """Must be called from the event loop that will consume the subscription"""
+        subscription = Subscription(self, channels)
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscriptions.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscriptions[channel]
+
+    def subscriber_count(self, channel):
+        with self._lock:
+            return len(self._subscriptions.get(channel, ()))
+
+    def publish(self, channel, message):
+        """Thread-safe: wakes each subscribing event loop once, whatever its number of streams"""
+        with self._lock:
+            subscribers = list(self._subscriptions.get(channel, ()))
+        by_loop = defaultdict(list)
+        for subscription in subscribers:
+            by_loop[subscription.loop].append(subscription)
+        for loop, subscriptions in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(_deliver_all, subscriptions, message)
+            except RuntimeError:
+                # The loop is closed; its streams are gone
+                for subscription in subscriptions:
+                    self.unsubscribe(subscription)
+
+
+def _deliver_all(subscriptions, message):
+    for subscription in subscriptions:
+        subscription.deliver(message)
+
+
+class RedisBroker:
+    """
+    Shared broker: messages go through Redis pub/sub and each process relays
+    them to its local streams with a single pattern subscription.
+    """
+    PREFIX = 'juryhack:'
+
+    def __init__(self, url):
+        import redis
+        self.url = url
+        self._redis = redis.Redis.from_url(url)
+        self._local = InProcessBroker()
+        self._listeners = {}
+
+    def publish(self, channel, message):
+        self._redis.publish(self.PREFIX + channel, json.dumps(message, cls=DjangoJSONEncoder))
+
+    def subscribe(self, channels):
+        loop = asyncio.get_running_loop()
+        if loop not in self._listeners:
+            self._listeners[loop] = loop.create_task(self._listen())
+        return self._local.subscribe(channels)
+
+    def unsubscribe(self, subscription):
+        self._local.unsubscribe(subscription)
+
+    def subscriber_count(self, channel):
+        return self._local.subscriber_count(channel)
+
+    async def _listen(self):
+        import redis.asyncio
+        client = redis.asyncio.Redis.from_url(self.url)
+        async with client.pubsub() as pubsub:
+            await pubsub.psubscribe(self.PREFIX + '*')
+            async for item in pubsub.listen():
+                if item['type'] != 'pmessage':
+                    continue
+                channel = item['channel'].decode()[len(self.PREFIX):]
+                self._local.publish(channel, json.loads(item['data']))
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            url = getattr(settings, 'LIVE_BROKER_URL', '')
+            _broker = RedisBroker(url) if url else InProcessBroker()
+        return _broker
+
+
+def publish(channel, message_type, data):
+    """Publish a delta once the current transaction commits"""
+    message = {'type': message_type, 'data': data}
+    transaction.on_commit(lambda: get_broker().publish(channel, message), robust=True)
+
+
+def publish_to_event(event_id, message_type, data):
+    if event_id:
+        publish(event_channel(event_id), message_type, data)
+
+
+def publish_new_message(message):
+    """Notify the recipient, or the event's staff inbox for messages to Staff"""
+    if message.recipient_id:
+        channel = user_channel(message.recipient_id)
+    else:
+        channel = staff_channel(message.event_id)
+    publish(channel, 'message', {
+        'id': message.id, 'sender_id': message.sender_id, 'event_id': message.event_id
+    })
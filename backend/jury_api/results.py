@@ -0,0 +1,157 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+from .models import User, Criterion, Team, TeamScore, TeamResult
+
+
+CRITERIA_TIMEOUT = 3600
+
+
+def criteria_cache_key(event_id):
+    return f'criteria_{event_id}'
+
+
+def get_event_criteria(event_id):
+    """
+    Return ``{criterion_id: {'name', 'max_score', 'weight'}}`` for an event.
+
+    Cached per event and invalidated by the Criterion signals, so score
+    validation and weighted totals do not query the criteria table.
+    """
+    cache_key = criteria_cache_key(event_id)
+    criteria = cache.get(cache_key)
+    if criteria is None:
+        criteria = {
+            row['id']: {'name': row['name'], 'max_score': row['max_score'], 'weight': float(row['weight'])}
+            for row in Criterion.objects.filter(event_id=event_id).values('id', 'name', 'max_score', 'weight')
+        }
+        cache.set(cache_key, criteria, CRITERIA_TIMEOUT)
+    return criteria
+
+
+def get_criteria_weights(event_id):
+    """Return a {criterion_id: weight} map for an event"""
+    return {criterion_id: c['weight'] for criterion_id, c in get_event_criteria(event_id).items()}
+
+
+def clear_event_criteria(event_id):
+    if event_id:
+        cache.delete(criteria_cache_key(event_id))
+
+
+def weighted_total(scores, weights):
+    """Sum a scores dict, applying criterion weights (1.0 when unknown)"""
+    total = 0
+    for criterion_id, score in scores.items():
+        weight = weights.get(int(criterion_id), 1.0)
+        total += float(score) * float(weight)
+    return total
+
+
+def current_jury_scores(event_id):
+    """
+    The event's scores given by its current juries: a jury moved to another
+    event (or no longer a jury) keeps its rows but they stop counting.
+    """
+    return TeamScore.objects.filter(event_id=event_id, jury__role='jury', jury__event_id=event_id)
+
+
+def refresh_team_result(team_id, event_id):
+    """Recompute the TeamResult rollup of one team from its current juries' scores"""
+    totals = current_jury_scores(event_id).filter(team_id=team_id).aggregate(
+        total_score=Coalesce(Sum('weighted_total'), 0.0),
+        scores_count=Count('id'),
+        locked_count=Count('id', filter=Q(locked=True)),
+    )
+    TeamResult.objects.update_or_create(team_id=team_id, defaults={'event_id': event_id, **totals})
+
+
+def refresh_team_results(event_id, team_ids=None):
+    """
+    Rebuild the TeamResult rollups of an event (or of some of its teams)
+    from the stored weighted totals of its current juries, with one grouped
+    query. Also run when a jury joins or leaves the event (see signals.py).
+    """
+    scores = current_jury_scores(event_id)
+    results = TeamResult.objects.filter(event_id=event_id)
+    if team_ids is not None:
+        scores = scores.filter(team_id__in=team_ids)
+        results = results.filter(team_id__in=team_ids)
+    rollups = scores.values('team_id').annotate(
+        total_score=Sum('weighted_total'),
+        scores_count=Count('id'),
+        locked_count=Count('id', filter=Q(locked=True)),
+    ).order_by()
+    with transaction.atomic():
+        results.delete()
+        TeamResult.objects.bulk_create(
+            [TeamResult(event_id=event_id, **row) for row in rollups],
+            batch_size=500,
+        )
+
+
+def refresh_event_aggregates(event_id):
+    """
+    Recompute every weighted TeamScore total and TeamResult rollup of an event.
+
+    Used when criteria weights change, since every total of the event moves.
+    """
+    weights = get_criteria_weights(event_id)
+    with transaction.atomic():
+        team_scores = list(TeamScore.objects.filter(event_id=event_id).only('id', 'scores'))
+        for team_score in team_scores:
+            team_score.weighted_total = weighted_total(team_score.scores, weights)
+        TeamScore.objects.bulk_update(team_scores, ['weighted_total'], batch_size=500)
+        refresh_team_results(event_id)
+
+
+def ranked_teams(event_id):
+    """
+    The event's teams in ranking order, annotated with ``total_score`` from
+    their TeamResult rollup: the sum of the weighted totals of the current
+    juries (ties by passage order).
+    """
+    return Team.objects.filter(event_id=event_id).annotate(
+        total_score=Coalesce('result__total_score', 0.0)
+    ).order_by('-total_score', 'passage_order', 'created_at')
+
+
+def compute_event_results(event_id):
+    """
+    Build the per-team / per-jury results for an event.
+
+    Totals (the rollups) and jury breakdowns come from the same scores,
+    those of the current juries, and the ranking is sorted by the database,
+    so the number of queries does not grow with the event size.
+    """
+    teams = ranked_teams(event_id).only('id', 'name')
+    juries = list(User.objects.filter(role='jury', event_id=event_id).only('id', 'username'))
+
+    scores_by_pair = {
+        (team_id, jury_id): (scores, total)
+        for team_id, jury_id, scores, total in current_jury_scores(event_id).values_list(
+            'team_id', 'jury_id', 'scores', 'weighted_total'
+        )
+    }
+
+    results = []
+    for team in teams:
+        jury_scores = []
+        for jury in juries:
+            scores_dict, jury_total = scores_by_pair.get((team.id, jury.id), ({}, 0))
+            jury_scores.append({
+                'jury_id': jury.id,
+                'jury_name': jury.username,
+                'scores': scores_dict,
+                'total': jury_total
+            })
+
+        results.append({
+            'team_id': team.id,
+            'team_name': team.name,
+            'total_score': team.total_score,
+            'jury_scores': jury_scores
+        })
+
+    return results
@@ -0,0 +1,158 @@
+"""
+Passage order scheduling.
+
+The teams of each track are shuffled with a seeded generator (the same
+seed and teams always give the same order), the tracks are laid out one
+after the other, and the resulting sequence is dealt into time slots of
+``duration`` minutes starting at ``start``, ``rooms`` teams at a time.
+A slot that would overlap a break starts when the break ends.
+
+Every team's passage_order/passage_time is then written with a single
+bulk_update in one transaction.
+"""
+import random
+import re
+import secrets
+
+from django.db import transaction
+from .caching import bump_data_version, invalidate_results
+from .live_queue import reset_queue
+from .models import Team
+
+TIME_PATTERN = re.compile(r'^\s*(\d{1,2})\s*[:hH]\s*(\d{2})\s*$')
+MINUTES_PER_DAY = 24 * 60
+
+
+class ScheduleError(Exception):
+    pass
+
+
+def parse_time(value):
+    """Minutes since midnight of "09:00" or "09h00" """
+    match = TIME_PATTERN.match(str(value or ''))
+    if not match or int(match.group(1)) > 23 or int(match.group(2)) > 59:
+        raise ScheduleError(f"Invalid time '{value}' (expected HH:MM or HHhMM)")
+    return int(match.group(1)) * 60 + int(match.group(2))
+
+
+def format_time(minutes):
+    # Same format as the slots the admin used to compute in the browser
+    minutes %= MINUTES_PER_DAY
+    return f"{minutes // 60:02d}h{minutes % 60:02d}"
+
+
+def parse_breaks(breaks):
+    """[{"start": "10h30", "duration": 15}, ...] as sorted (start, end) minutes"""
+    parsed = []
+    for item in breaks or []:
+        if not isinstance(item, dict):
+            raise ScheduleError("Each break needs a start and a duration")
+        start = parse_time(item.get('start'))
+        try:
+            duration = int(item.get('duration'))
+        except (TypeError, ValueError):
+            duration = 0
+        if duration <= 0:
+            raise ScheduleError("Break durations must be positive numbers of minutes")
+        parsed.append((start, start + duration))
+    return sorted(parsed)
+
+
+def new_seed():
+    return secrets.randbelow(2 ** 31)
+
+
+def shuffle_by_track(teams, seed):
+    """Each track shuffled on its own, so adding a team to one track leaves the others unchanged"""
+    tracks = {}
+    for team in sorted(teams, key=lambda team: team.id):
+        tracks.setdefault(team.track or '', []).append(team)
+    ordered = []
+    for track in sorted(tracks):
+        members = tracks[track]
+        random.Random(f'{seed}:{track}').shuffle(members)
+        ordered.extend(members)
+    return ordered
+
+
+def time_slots(count, start, duration, breaks=()):
+    """Start minute of ``count`` consecutive slots, moved past the breaks they would overlap"""
+    slots = []
+    current = start
+    for _ in range(count):
+        for break_start, break_end in breaks:
+            if current < break_end and current + duration > break_start:
+                current = break_end
+        slots.append(current)
+        current += duration
+    return slots
+
+
+def plan_passages(teams, seed, start, duration, rooms=1, breaks=()):
+    """
+    The (team, passage_order, passage_time) of every team. With several
+    rooms, the teams sharing a slot share its passage_order and their
+    passage_time names the room.
+    """
+    ordered = shuffle_by_track(teams, seed)
+    slots = time_slots((len(ordered) + rooms - 1) // rooms, start, duration, breaks)
+    plan = []
+    for index, team in enumerate(ordered):
+        slot, room = divmod(index, rooms)
+        passage_time = format_time(slots[slot])
+        if rooms > 1:
+            passage_time = f"{passage_time} (salle {room + 1})"
+        plan.append((team, slot + 1 if rooms > 1 else index + 1, passage_time))
+    return plan
+
+
+def schedule_event(event, seed=None, start_time=None, duration=None, rooms=1, breaks=None, dry_run=False):
+    """
+    Plan the passages of ``event`` (start and duration default to the
+    event's presentation settings) and, unless ``dry_run``, save them.
+    Returns the seed and the planned passages.
+    """
+    start = parse_time(start_time or event.presentation_start_time or '08:00')
+    duration = duration or event.presentation_duration
+    if not duration or duration <= 0:
+        raise ScheduleError("The presentation duration must be a positive number of minutes")
+    if rooms < 1:
+        raise ScheduleError("rooms must be at least 1")
+    breaks = parse_breaks(breaks)
+    if seed is None:
+        seed = new_seed()
+
+    with transaction.atomic():
+        # Locked: a concurrent import or edit waits for the new order
+        teams = list(
+            Team.objects.select_for_update().filter(event=event).only('id', 'name', 'track', 'event_id')
+        )
+        plan = plan_passages(teams, seed, start, duration, rooms, breaks)
+        for team, passage_order, passage_time in plan:
+            team.passage_order = passage_order
+            team.passage_time = passage_time
+        if not dry_run:
+            Team.objects.bulk_update(teams, ['passage_order', 'passage_time'], batch_size=500)
+            bump_data_version('teams', event.id)
+            # Ties in the ranking are broken by passage order
+            invalidate_results(event.id)
+            reset_queue(event.id)
+
+    return {
+        'seed': seed,
+        'dry_run': dry_run,
+        'passages': [
+            {'team_id': team.id, 'name': team.name, 'track': team.track,
+             'passage_order': passage_order, 'passage_time': passage_time}
+            for team, passage_order, passage_time in plan
+        ],
+    }
+
+
+def clear_schedule(event):
+    with transaction.atomic():
+        cleared = Team.objects.filter(event=event).update(passage_order=None, passage_time=None)
+        bump_data_version('teams', event.id)
+        invalidate_results(event.id)
+        reset_queue(event.id)
+    return cleared
@@ -0,0 +1,93 @@
+from django.db import transaction
+from django.utils import timezone
+from .caching import bump_data_version
+from .models import Team, TeamScore
+from .results import get_criteria_weights, refresh_team_results, weighted_total
+from .serializers import TeamScoreSerializer
+
+UPSERT_FIELDS = ['scores', 'criterion_comments', 'global_comments', 'locked',
+                 'submitted_at', 'weighted_total', 'updated_at']
+
+
+def _team_id(entry):
+    try:
+        return int(entry.get('team'))
+    except (TypeError, ValueError):
+        return None
+
+
+def submit_score_batch(jury, event, entries):
+    """
+    Validate and upsert many scores of one jury in a single transaction.
+
+    ``entries`` is a list of ``{team, scores, criterion_comments,
+    global_comments, lock}`` dicts; omitted fields keep their stored value.
+    Teams, existing scores and criteria are each loaded once, the rows are
+    written with one upsert and the team rollups refreshed with one grouped
+    query. Returns ``(saved TeamScores, per-entry errors)``.
+
+    The existing scores are locked (select_for_update) for the rest of the
+    transaction, so a /lock/ or another device's batch landing meanwhile
+    waits, and its locked scores are seen as locked, not overwritten.
+    """
+    team_ids = {_team_id(entry) for entry in entries if isinstance(entry, dict)}
+    teams = Team.objects.filter(event=event).in_bulk([t for t in team_ids if t is not None])
+    weights = get_criteria_weights(event.id)
+    now = timezone.now()
+
+    with transaction.atomic():
+        existing = {
+            score.team_id: score
+            for score in TeamScore.objects.select_for_update(of=('self',)).filter(
+                jury=jury, team_id__in=list(teams)
+            ).select_related('jury', 'team')
+        }
+        to_save, errors = _prepare_scores(jury, event, entries, teams, existing, weights, now)
+        if to_save:
+            to_save = TeamScore.objects.bulk_create(
+                to_save,
+                update_conflicts=True,
+                unique_fields=['jury', 'team'],
+                update_fields=UPSERT_FIELDS,
+            )
+            refresh_team_results(event.id, [score.team_id for score in to_save])
+            bump_data_version('scores', event.id)
+    return to_save, errors
+
+
+def _prepare_scores(jury, event, entries, teams, existing, weights, now):
+    to_save = []
+    errors = []
+    seen = set()
+    for index, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+            errors.append({'index': index, 'team': None, 'details': ["Entry must be an object"]})
+            continue
+        team_id = _team_id(entry)
+        details = []
+        team_score = existing.get(team_id)
+        if team_id not in teams:
+            details.append(f"Team {entry.get('team')} does not exist in this event")
+        elif team_id in seen:
+            details.append("Team appears more than once in this batch")
+        elif team_score is not None and team_score.locked:
+            details.append("Cannot modify locked scores")
+        if 'scores' in entry:
+            details.extend(TeamScoreSerializer.check_scores(entry['scores'], event))
+        if details:
+            errors.append({'index': index, 'team': team_id, 'details': details})
+            continue
+        seen.add(team_id)
+
+        if team_score is None:
+            team_score = TeamScore(event=event, jury=jury, team=teams[team_id])
+        for field in ['scores', 'criterion_comments', 'global_comments']:
+            if field in entry:
+                setattr(team_score, field, entry[field])
+        if entry.get('lock'):
+            team_score.locked = True
+            team_score.submitted_at = now
+        team_score.weighted_total = weighted_total(team_score.scores, weights)
+        team_score.updated_at = now
+        to_save.append(team_score)
+    return to_save, errors
@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from .models import User, Criterion, Team, TeamScore, Event, Message
 from django.contrib.auth.password_validation import validate_password
+from .results import get_criteria_weights, get_event_criteria
+from .team_auth import make_team_password
 
 
 class EventSerializer(serializers.ModelSerializer):
@@ -10,6 +12,19 @@ class EventSerializer(serializers.ModelSerializer):
                   'has_presentations', 'presentation_start_time', 'presentation_duration', 'created_at']
         read_only_fields = ['created_at']
 
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        current_status = getattr(instance, 'current_status', None)
+        if current_status:
+            data['status'] = current_status
+        return data
+
+    def update(self, instance, validated_data):
+        instance = super().update(instance, validated_data)
+        # The annotated status predates this write
+        instance.__dict__.pop('current_status', None)
+        return instance
+
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -32,6 +47,21 @@ class UserSerializer(serializers.ModelSerializer):
         return instance
 
 
+class ProvisionAccountSerializer(serializers.Serializer):
+    name = serializers.CharField(max_length=150)
+    username = serializers.RegexField(r'^[\w.@+-]+$', max_length=140, required=False)
+    email = serializers.EmailField(required=False, allow_blank=True)
+    track = serializers.CharField(max_length=100, required=False, allow_blank=True)
+
+
+class ProvisionUsersSerializer(serializers.Serializer):
+    event = serializers.PrimaryKeyRelatedField(queryset=Event.objects.all())
+    # Team accounts come from the team login flow (linked through Team.user)
+    role = serializers.ChoiceField(choices=['jury'], default='jury')
+    track = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    accounts = ProvisionAccountSerializer(many=True, allow_empty=False, max_length=500)
+
+
 class LoginSerializer(serializers.Serializer):
     username = serializers.CharField()
     password = serializers.CharField(write_only=True)
@@ -52,6 +82,19 @@ class TeamSerializer(serializers.ModelSerializer):
             'password', 'has_logged_in', 'passage_order', 'passage_time', 'track', 'created_at'
         ]
         read_only_fields = ['created_at']
+        extra_kwargs = {
+            'password': {'write_only': True}
+        }
+
+    def validate_password(self, value):
+        # Stored hashed; an empty value lets the team generate a new one at its next login
+        return make_team_password(value) if value else value
+
+
+class TeamImportSerializer(TeamSerializer):
+    """Team rows of a bulk import; the event is set once for the whole batch"""
+    class Meta(TeamSerializer.Meta):
+        read_only_fields = ['event', 'created_at']
 
 
 class TeamScoreSerializer(serializers.ModelSerializer):
@@ -67,38 +110,58 @@ class TeamScoreSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'updated_at']
     
     def get_total(self, obj):
-        return obj.get_total()
+        # Weights are memoized per event for the whole (list) serialization
+        weights_by_event = self.context.setdefault('criteria_weights', {})
+        weights = weights_by_event.get(obj.event_id)
+        if weights is None:
+            weights = weights_by_event[obj.event_id] = get_criteria_weights(obj.event_id)
+        return obj.get_total(weights)
     
     def validate(self, data):
         # Check if already locked
         if self.instance and self.instance.locked:
             raise serializers.ValidationError("Cannot modify locked scores")
         
-        # Validate scores against criteria
+        # Validate every score against one load of the event criteria
         if 'scores' in data:
-            for criterion_id, score in data['scores'].items():
-                try:
-                    # Search specifically in the event context if provided
-                    event = data.get('event') or (self.instance.event if self.instance else None)
-                    if event:
-                        criterion = Criterion.objects.get(id=criterion_id, event=event)
-                    else:
-                        criterion = Criterion.objects.get(id=criterion_id)
-                        
-                    if score < 0 or score > criterion.max_score:
-                        raise serializers.ValidationError(
-                            f"Score for {criterion.name} must be between 0 and {criterion.max_score}"
-                        )
-                except Criterion.DoesNotExist:
-                    raise serializers.ValidationError(f"Criterion {criterion_id} does not exist in this event context")
+            event = data.get('event') or (self.instance.event if self.instance else None)
+            errors = self.check_scores(data['scores'], event)
+            if errors:
+                raise serializers.ValidationError(errors)
         
         return data
 
+    @staticmethod
+    def check_scores(scores, event):
+        """Return the list of error messages for a scores dict (empty when valid)"""
+        if not isinstance(scores, dict):
+            return ["Scores must be an object mapping criterion ids to scores"]
+        if event is not None:
+            criteria = get_event_criteria(event.pk)
+        else:
+            criteria = {
+                c.id: {'name': c.name, 'max_score': c.max_score}
+                for c in Criterion.objects.in_bulk([k for k in scores if str(k).isdigit()]).values()
+            }
+        
+        errors = []
+        for criterion_id, score in scores.items():
+            criterion = criteria.get(int(criterion_id)) if str(criterion_id).isdigit() else None
+            if criterion is None:
+                errors.append(f"Criterion {criterion_id} does not exist in this event context")
+            elif isinstance(score, bool) or not isinstance(score, (int, float)):
+                errors.append(f"Score for {criterion['name']} must be a number")
+            elif score < 0 or score > criterion['max_score']:
+                errors.append(
+                    f"Score for {criterion['name']} must be between 0 and {criterion['max_score']}"
+                )
+        return errors
+
 
 class TeamResultSerializer(serializers.Serializer):
     team_id = serializers.IntegerField()
     team_name = serializers.CharField()
-    total_score = serializers.IntegerField()
+    total_score = serializers.FloatField()
     jury_scores = serializers.ListField()
 
 
@@ -118,3 +181,19 @@ class MessageSerializer(serializers.ModelSerializer):
         extra_kwargs = {
             'recipient': {'required': False}
         }
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Multi-recipient creates represent their input data, not a Message
+        if isinstance(instance, Message) and instance.broadcast_id:
+            data['content'] = instance.broadcast.content
+        return data
+
+
+class BroadcastSerializer(serializers.Serializer):
+    """Audience of a broadcast: explicit ``recipients`` or the users of ``event``, narrowed by role/track"""
+    event = serializers.PrimaryKeyRelatedField(queryset=Event.objects.all())
+    content = serializers.CharField()
+    recipients = serializers.ListField(child=serializers.IntegerField(), required=False)
+    role = serializers.ChoiceField(choices=User.ROLE_CHOICES, required=False)
+    track = serializers.CharField(required=False)
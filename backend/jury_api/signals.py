@@ -0,0 +1,96 @@
+from django.db.models import QuerySet
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from .caching import bump_data_version, invalidate_results
+from .inbox import adjust_unread, message_inboxes
+from .live_queue import recount_juries
+from .models import Criterion, Event, Message, Team, TeamScore, User
+from .results import clear_event_criteria, refresh_event_aggregates, refresh_team_result, refresh_team_results
+
+
+def _is_parent_deletion(origin, parents):
+    """True when a delete cascades from one of ``parents`` (the aggregates go with it)"""
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return model in parents
+
+
+@receiver([post_save, post_delete], sender=Criterion)
+def criterion_changed(sender, instance, **kwargs):
+    # Covers API, admin and cascade deletes alike
+    clear_event_criteria(instance.event_id)
+    if 'origin' in kwargs and _is_parent_deletion(kwargs['origin'], (Event,)):
+        return
+    refresh_event_aggregates(instance.event_id)
+
+
+@receiver(pre_save, sender=TeamScore)
+def team_score_weighted_total(sender, instance, **kwargs):
+    instance.weighted_total = instance.get_total()
+
+
+@receiver([post_save, post_delete], sender=TeamScore)
+def team_score_changed(sender, instance, **kwargs):
+    # A deleted jury's scores are handled once, by jury_deleted
+    if 'origin' in kwargs and _is_parent_deletion(kwargs['origin'], (Event, Team, User)):
+        return
+    refresh_team_result(instance.team_id, instance.event_id)
+
+
+def juries_changed(event_id):
+    """The rollups, results and live queue only count the event's current juries"""
+    refresh_team_results(event_id)
+    invalidate_results(event_id)
+    recount_juries(event_id)
+
+
+@receiver(pre_save, sender=User)
+def user_membership_before(sender, instance, update_fields=None, **kwargs):
+    # Saves that cannot move the user (last_login on every login) skip the lookup
+    if instance.pk is None or (update_fields is not None and not {'role', 'event', 'event_id'} & set(update_fields)):
+        return
+    instance._previous_membership = User.objects.filter(pk=instance.pk).values_list('role', 'event_id').first()
+
+
+@receiver(post_save, sender=User)
+def user_membership_changed(sender, instance, created, **kwargs):
+    previous = instance.__dict__.pop('_previous_membership', None)
+    current = (instance.role, instance.event_id)
+    if previous == current or (previous is None and not created):
+        return
+    for role, event_id in {previous, current} - {None}:
+        if role == 'jury' and event_id:
+            juries_changed(event_id)
+
+
+@receiver(post_delete, sender=User)
+def jury_deleted(sender, instance, **kwargs):
+    if instance.role == 'jury' and instance.event_id:
+        juries_changed(instance.event_id)
+
+
+
+@receiver(post_save, sender=Message)
+def message_created(sender, instance, created, **kwargs):
+    if created and not instance.is_read:
+        adjust_unread({key: 1 for key in message_inboxes(instance.recipient_id, instance.event_id)})
+
+
+@receiver(post_delete, sender=Message)
+def message_deleted(sender, instance, **kwargs):
+    if not instance.is_read:
+        adjust_unread({key: -1 for key in message_inboxes(instance.recipient_id, instance.event_id)})
+
+
+def _bump_scope(scope):
+    def data_changed(sender, instance, **kwargs):
+        bump_data_version(scope, instance.event_id)
+    return data_changed
+
+
+# Stamps behind the ETags of the list endpoints (bulk writes bump them
+# explicitly). Connected per model: a sender-less receiver would disable
+# fast cascade deletes for every model.
+for model, scope in [(Team, 'teams'), (Criterion, 'criteria'), (TeamScore, 'scores'), (Message, 'messages')]:
+    receiver_function = _bump_scope(scope)
+    post_save.connect(receiver_function, sender=model, weak=False, dispatch_uid=f'bump_{scope}_on_save')
+    post_delete.connect(receiver_function, sender=model, weak=False, dispatch_uid=f'bump_{scope}_on_delete')
@@ -0,0 +1,62 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework import exceptions
+from .authentication import CachedTokenAuthentication
+from .models import Event
+from .pubsub import event_channel, get_broker, staff_channel, user_channel
+
+KEEPALIVE_SECONDS = 25
+RETRY_MILLISECONDS = 3000
+
+
+def format_sse(message):
+    data = json.dumps(message['data'], cls=DjangoJSONEncoder)
+    return f"event: {message['type']}\ndata: {data}\n\n"
+
+
+async def _event_stream(channels):
+    subscription = get_broker().subscribe(channels)
+    try:
+        yield f'retry: {RETRY_MILLISECONDS}\n\n'
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.get(), KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            yield format_sse(message)
+    finally:
+        subscription.close()
+
+
+async def event_stream_view(request, event_id):
+    """
+    Server-sent events for an event: score_locked, ranking_changed,
+    passage_order, queue and (for authenticated users) message deltas.
+
+    EventSource cannot send headers, so the auth token goes in ``?token=``.
+    Serve it through config.asgi: each idle stream is then a parked
+    coroutine instead of a blocked worker.
+    """
+    if not await Event.objects.filter(id=event_id).aexists():
+        return JsonResponse({'error': 'Event not found'}, status=404)
+
+    channels = [event_channel(event_id)]
+    key = request.GET.get('token')
+    if key:
+        # Same checks as the API (unknown, expired, inactive user), same cache
+        try:
+            user, _ = await sync_to_async(CachedTokenAuthentication().authenticate_credentials)(key)
+        except exceptions.AuthenticationFailed as e:
+            return JsonResponse({'error': str(e.detail)}, status=401)
+        channels.append(user_channel(user.id))
+        if user.role == 'admin':
+            channels.append(staff_channel(event_id))
+
+    response = StreamingHttpResponse(_event_stream(channels), content_type='text/event-stream')
+    response['X-Accel-Buffering'] = 'no'
+    return response
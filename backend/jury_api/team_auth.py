@@ -0,0 +1,87 @@
+"""
+Team logins.
+
+A team signs in with its generated email and a password generated on its
+first login. The password is stored hashed on the Team with a PBKDF2
+hasher whose cost is TEAM_PASSWORD_ITERATIONS: the passwords are random,
+so they do not need the cost of the default hasher, and the whole
+event logs in within the same few minutes.
+
+The Team is linked to its User (and token) on its first password login;
+later logins only read: the team with its user, then the token.
+"""
+import secrets
+import string
+
+from django.contrib.auth.hashers import check_password, make_password
+from .hashers import PasswordHasher
+from .models import Team, User
+
+GENERATED_PASSWORD_LENGTH = 8
+
+
+class TeamPasswordHasher(PasswordHasher):
+    """Standard pbkdf2_sha256 hashes (verified by the default hasher), with their own cost"""
+    iterations_setting = 'TEAM_PASSWORD_ITERATIONS'
+
+
+team_hasher = TeamPasswordHasher()
+
+
+def make_team_password(raw_password):
+    return make_password(raw_password, hasher=team_hasher)
+
+
+def generate_team_password():
+    alphabet = string.ascii_letters + string.digits
+    return ''.join(secrets.choice(alphabet) for _ in range(GENERATED_PASSWORD_LENGTH))
+
+
+def check_team_password(team, raw_password):
+    def rehash(raw):
+        # Only when TEAM_PASSWORD_ITERATIONS changed: one write, then reads again
+        team.password = make_team_password(raw)
+        team.save(update_fields=['password'])
+    return check_password(raw_password, team.password, setter=rehash, preferred=team_hasher)
+
+
+def find_team(email):
+    return Team.objects.select_related('user', 'event').filter(generated_email=email).first()
+
+
+def first_login(team):
+    """Generate the team's password; it is shown once and only its hash is kept"""
+    password = generate_team_password()
+    team.password = make_team_password(password)
+    team.has_logged_in = True
+    team.save(update_fields=['password', 'has_logged_in'])
+    return password
+
+
+def team_user(team):
+    """The User of ``team``, created and linked on its first login"""
+    user = team.user
+    if user is None:
+        user, created = User.objects.get_or_create(
+            username=team.generated_email or team.email,
+            defaults={
+                'role': 'team',
+                'email': team.email or team.generated_email,
+                'first_name': team.name,
+                'event': team.event
+            }
+        )
+        if created:
+            user.set_unusable_password()
+            user.save(update_fields=['password'])
+        team.user = user
+        team.save(update_fields=['user'])
+
+    # Only write when the team was renamed or moved since the last login
+    changes = {'role': 'team', 'event_id': team.event_id, 'first_name': team.name}
+    changed = [field for field, value in changes.items() if getattr(user, field) != value]
+    if changed:
+        for field in changed:
+            setattr(user, field, changes[field])
+        user.save(update_fields=changed)
+    return user
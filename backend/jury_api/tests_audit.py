@@ -0,0 +1,154 @@
+import gzip
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from . import audit
+from .audit import ACTIONS, TARGET_TYPES, AuditPipeline, log_action
+from .models import User, Event, Team, Criterion, Message, AuditLog
+
+
+def make_entry(action='TEST'):
+    return AuditLog(action=action, target_type='Test', changes={}, timestamp=timezone.now())
+
+
+class AuditPipelineTest(TestCase):
+    def test_flush_writes_in_batches(self):
+        pipeline = AuditPipeline(batch_size=2)
+        for _ in range(5):
+            pipeline.queue.put(make_entry())
+        with CaptureQueriesContext(connection) as queries:
+            pipeline.flush()
+        self.assertEqual(AuditLog.objects.count(), 5)
+        self.assertEqual(len([q for q in queries if q['sql'].startswith('INSERT')]), 3)
+
+    def test_full_queue_falls_back_to_synchronous_write(self):
+        pipeline = AuditPipeline(maxsize=1)
+        with mock.patch.object(pipeline, 'start'):
+            pipeline.submit(make_entry('QUEUED'))
+            pipeline.submit(make_entry('SYNC'))
+        self.assertEqual(list(AuditLog.objects.values_list('action', flat=True)), ['SYNC'])
+        pipeline.flush()
+        self.assertEqual(AuditLog.objects.count(), 2)
+
+    @override_settings(AUDIT_LOG_ASYNC=True)
+    def test_entries_are_queued_after_commit(self):
+        with mock.patch.object(audit.pipeline, 'submit') as submit:
+            with self.captureOnCommitCallbacks(execute=True):
+                log_action(None, "UPDATE", "Team", 1, {"name": ["a", "b"]})
+                submit.assert_not_called()
+        entry = submit.call_args.args[0]
+        self.assertEqual((entry.action, entry.target_id), ("UPDATE", "1"))
+        self.assertIsNotNone(entry.timestamp)
+
+
+class AuditWriterThreadTest(TransactionTestCase):
+    def test_background_thread_writes_entries(self):
+        pipeline = AuditPipeline(interval=0.05)
+        for _ in range(3):
+            pipeline.submit(make_entry())
+        deadline = time.monotonic() + 5
+        while AuditLog.objects.count() < 3 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(AuditLog.objects.count(), 3)
+
+
+class AuditLogPointsTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.event = Event.objects.create(name="Audit Event", date=timezone.now())
+        self.admin = User.objects.create_user(username="audit_admin", role="admin")
+        self.jury = User.objects.create_user(username="audit_jury", role="jury", event=self.event)
+        self.team = Team.objects.create(name="Audit Team", event=self.event, passage_order=1)
+        self.criterion = Criterion.objects.create(event=self.event, name="Tech", max_score=10, priority_order=1)
+
+    def test_team_edit_records_only_changed_fields(self):
+        self.client.force_authenticate(self.admin)
+        self.client.patch(f'/api/teams/{self.team.id}/', {'name': 'Renamed', 'passage_order': 1}, format='json')
+        log = AuditLog.objects.get(action="UPDATE", target_type="Team")
+        self.assertEqual(log.changes, {'name': ['Audit Team', 'Renamed']})
+
+    def test_password_changes_are_redacted(self):
+        self.client.force_authenticate(self.admin)
+        self.client.patch(f'/api/teams/{self.team.id}/', {'password': 'n3w-secret'}, format='json')
+        log = AuditLog.objects.get(action="UPDATE", target_type="Team")
+        self.assertEqual(log.changes, {'password': '***'})
+
+    def test_score_create_and_update(self):
+        self.client.force_authenticate(self.jury)
+        response = self.client.post('/api/team-scores/', {
+            'event': self.event.id, 'jury': self.jury.id, 'team': self.team.id,
+            'scores': {str(self.criterion.id): 4}
+        }, format='json')
+        self.client.patch(f"/api/team-scores/{response.data['id']}/", {
+            'scores': {str(self.criterion.id): 6}
+        }, format='json')
+        logs = dict(AuditLog.objects.filter(target_type="TeamScore").values_list('action', 'changes'))
+        self.assertEqual(logs['CREATE']['scores'], {str(self.criterion.id): 4})
+        self.assertEqual(logs['UPDATE'], {'scores': [{str(self.criterion.id): 4}, {str(self.criterion.id): 6}]})
+
+    def test_message_delete(self):
+        message = Message.objects.create(sender=self.jury, recipient=None, event=self.event, content="Oops")
+        self.client.force_authenticate(self.jury)
+        self.client.delete(f'/api/messages/{message.id}/')
+        log = AuditLog.objects.get(action="DELETE", target_type="Message")
+        self.assertEqual(log.target_id, str(message.id))
+
+
+class ArchiveAuditLogsTest(TestCase):
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output_dir)
+        user = User.objects.create_user(username="archived_admin", role="admin")
+        now = timezone.now()
+        AuditLog.objects.bulk_create(
+            [AuditLog(user=user, action="UPDATE", target_type="Team", target_id=str(i),
+                      changes={"name": ["a", "b"]}, timestamp=now - timedelta(days=400 + i)) for i in range(5)]
+            + [AuditLog(action="LOCK", target_type="TeamScore", timestamp=now - timedelta(days=1))]
+        )
+
+    def test_moves_old_entries_to_archive_in_chunks(self):
+        out = StringIO()
+        call_command('archive_audit_logs', days=365, output_dir=self.output_dir, chunk_size=2, stdout=out)
+
+        self.assertEqual(list(AuditLog.objects.values_list('action', flat=True)), ['LOCK'])
+        [name] = os.listdir(self.output_dir)
+        with gzip.open(os.path.join(self.output_dir, name), 'rt') as archive:
+            rows = [json.loads(line) for line in archive]
+        self.assertEqual([row['target_id'] for row in rows], ['4', '3', '2', '1', '0'])
+        self.assertEqual(rows[0]['username'], "archived_admin")
+        self.assertEqual(rows[0]['changes'], {"name": ["a", "b"]})
+
+    def test_dry_run_and_nothing_to_archive(self):
+        call_command('archive_audit_logs', days=365, output_dir=self.output_dir, dry_run=True, stdout=StringIO())
+        self.assertEqual(AuditLog.objects.count(), 6)
+        call_command('archive_audit_logs', days=1000, output_dir=self.output_dir, stdout=StringIO())
+        self.assertEqual(os.listdir(self.output_dir), [])
+
+    def test_admin_filters_cover_every_logged_action(self):
+        with open(os.path.join(os.path.dirname(__file__), 'views.py'), encoding='utf-8') as source:
+            calls = re.findall(r'log_action\([^,]+, "(\w+)", "(\w+)"', source.read())
+        self.assertTrue(calls)
+        for action, target_type in calls:
+            self.assertIn(action, ACTIONS)
+            self.assertIn(target_type, TARGET_TYPES)
+
+    def test_admin_changelist_filters(self):
+        admin_user = User.objects.create_superuser(username="changelist_admin", password="x", role="admin")
+        self.client.force_login(admin_user)
+        response = self.client.get('/admin/jury_api/auditlog/', {'action': 'LOCK', 'q': '42'})
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get('/admin/jury_api/auditlog/', {'action': 'UPDATE'})
+        self.assertEqual(len(response.context['cl'].result_list), 5)
@@ -0,0 +1,223 @@
+import importlib
+from datetime import timedelta
+from unittest import mock
+
+from django.db import connection
+from django.apps import apps
+from django.contrib.auth.hashers import check_password
+from django.core.cache import caches
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from .authentication import TokenCache, invalidate_user_tokens, token_cache
+from .provisioning import hash_passwords
+from .models import User, Event, Team
+
+
+class TokenCacheTest(TestCase):
+    def token(self, user_id, key):
+        return mock.Mock(user_id=user_id, key=key)
+
+    def test_lru_eviction_and_ttl(self):
+        cache = TokenCache(maxsize=2, ttl=60)
+        cache.set('a', self.token(1, 'a'))
+        cache.set('b', self.token(2, 'b'))
+        cache.get('a')
+        cache.set('c', self.token(3, 'c'))
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('a'))
+
+        with mock.patch('jury_api.authentication.time.monotonic', return_value=10 ** 9):
+            self.assertIsNone(cache.get('a'))
+
+    def test_invalidate_user(self):
+        cache = TokenCache(maxsize=10, ttl=60)
+        cache.set('a', self.token(1, 'a'))
+        cache.set('b', self.token(2, 'b'))
+        cache.invalidate_user(1)
+        self.assertIsNone(cache.get('a'))
+        self.assertIsNotNone(cache.get('b'))
+
+
+class CachedTokenAuthenticationTest(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        token_cache.clear()
+        self.addCleanup(token_cache.clear)
+        self.event = Event.objects.create(name="Auth Event", date=timezone.now())
+        self.admin = User.objects.create_user(username="auth_admin", role="admin")
+        self.jury = User.objects.create_user(username="auth_jury", password="secret", role="jury", event=self.event)
+        self.token = Token.objects.create(user=self.jury)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def count_queries(self, url='/api/messages/unread-count/'):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_repeated_requests_skip_the_token_query(self):
+        first = self.count_queries()
+        self.assertEqual(self.count_queries(), first - 1)
+
+    def test_logout_invalidates(self):
+        self.count_queries()
+        self.client.post('/api/auth/logout/')
+        self.assertEqual(self.client.get('/api/messages/unread-count/').status_code, 401)
+
+    def test_user_update_invalidates(self):
+        self.count_queries()
+        admin_client = APIClient()
+        admin_client.force_authenticate(self.admin)
+        User.objects.filter(id=self.jury.id).update(is_active=False)
+        # Still served from the cache until the user endpoint evicts it
+        self.assertEqual(self.client.get('/api/messages/unread-count/').status_code, 200)
+        admin_client.patch(f'/api/users/{self.jury.id}/', {'track': 'B'}, format='json')
+        self.assertEqual(self.client.get('/api/messages/unread-count/').status_code, 401)
+
+    def test_invalidation_reaches_the_other_workers(self):
+        self.count_queries()
+        User.objects.filter(id=self.jury.id).update(is_active=False)
+        # Handled by another worker: this one's LRU is left alone
+        with mock.patch.object(token_cache, 'invalidate_user'):
+            with self.captureOnCommitCallbacks(execute=True):
+                invalidate_user_tokens(self.jury.id)
+        self.assertIsNotNone(token_cache.get(self.token.key))
+        self.assertEqual(self.client.get('/api/messages/unread-count/').status_code, 401)
+
+    @override_settings(AUTH_TOKEN_EXPIRY_HOURS=1)
+    def test_expired_tokens_are_refused_and_replaced_on_login(self):
+        Token.objects.filter(key=self.token.key).update(created=timezone.now() - timedelta(hours=2))
+        self.assertEqual(self.client.get('/api/messages/unread-count/').status_code, 401)
+        self.assertFalse(Token.objects.filter(key=self.token.key).exists())
+
+        response = APIClient().post('/api/auth/login/', {'username': 'auth_jury', 'password': 'secret'})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.data['token'], self.token.key)
+
+
+class TeamLoginTest(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.addCleanup(token_cache.clear)
+        self.event = Event.objects.create(name="Team Login Event", date=timezone.now())
+        self.team = Team.objects.create(
+            name="Login Team", event=self.event, email="team@example.com", generated_email="team+login@example.com"
+        )
+        self.client = APIClient()
+
+    def login(self, password=None):
+        data = {'email': self.team.generated_email}
+        if password:
+            data['password'] = password
+        return self.client.post('/api/auth/team-login/', data)
+
+    def test_first_login_stores_a_hash(self):
+        response = self.login()
+        self.assertTrue(response.data['isFirstLogin'])
+        password = response.data['generatedPassword']
+        self.team.refresh_from_db()
+        self.assertTrue(self.team.has_logged_in)
+        self.assertTrue(self.team.password.startswith('pbkdf2_sha256$'))
+        self.assertNotIn(password, self.team.password)
+
+        response = self.login(password)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('password', response.data['team'])
+        self.assertEqual(response.data['user']['role'], 'team')
+        self.assertEqual(User.objects.get(team=self.team).username, self.team.generated_email)
+
+    def test_repeated_login_only_reads(self):
+        password = self.login().data['generatedPassword']
+        self.login(password)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.login(password)
+        self.assertEqual(response.status_code, 200)
+        writes = [q['sql'] for q in queries if q['sql'].split()[0] in ('INSERT', 'UPDATE', 'DELETE')]
+        self.assertEqual(writes, [])
+
+    def test_wrong_password(self):
+        self.login()
+        self.assertEqual(self.login('wrong').status_code, 401)
+
+    def test_legacy_plaintext_passwords_get_the_team_cost(self):
+        migration = importlib.import_module('jury_api.migrations.0016_team_user')
+        Team.objects.filter(id=self.team.id).update(password='legacy1', has_logged_in=True)
+        migration.hash_passwords_and_link_users(apps, None)
+        self.team.refresh_from_db()
+        self.assertTrue(self.team.password.startswith(f'pbkdf2_sha256${settings.TEAM_PASSWORD_ITERATIONS}$'))
+
+        self.login('legacy1')
+        # Linked on that first login; the next one reads only (no rehash)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.login('legacy1').status_code, 200)
+        self.assertFalse([q for q in queries if q['sql'].startswith('UPDATE')])
+
+    def test_admin_set_password_is_hashed(self):
+        admin = User.objects.create_user(username="team_login_admin", role="admin")
+        self.client.force_authenticate(admin)
+        self.client.patch(f'/api/teams/{self.team.id}/', {'password': 'chosen1'}, format='json')
+        self.client.force_authenticate(None)
+        self.team.refresh_from_db()
+        self.assertNotEqual(self.team.password, 'chosen1')
+        self.assertEqual(self.login('chosen1').status_code, 200)
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class ProvisionUsersTest(TestCase):
+    def setUp(self):
+        self.event = Event.objects.create(name="Provision Event", date=timezone.now())
+        self.admin = User.objects.create_user(username="provision_admin", role="admin")
+        User.objects.create_user(username="alice01", role="jury")
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    @override_settings(PROVISIONING_HASH_WORKERS=2)
+    def test_hashes_in_a_process_pool(self):
+        hashes = hash_passwords(['a', 'b', 'c', 'd'])
+        self.assertTrue(all(h.startswith('pbkdf2_sha256$1000$') for h in hashes))
+        self.assertTrue(check_password('c', hashes[2]))
+        self.assertEqual(len(set(hashes)), 4)
+
+    @override_settings(PROVISIONING_HASH_WORKERS=1)
+    def test_provision_returns_credentials(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/users/provision/', {
+                'event': self.event.id, 'role': 'jury', 'track': 'A',
+                'accounts': [{'name': 'Alice'}, {'name': 'Alice'}, {'name': 'Bob', 'username': 'bob', 'track': 'B'}]
+            }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len([q for q in queries if q['sql'].startswith('INSERT INTO "users"')]), 1)
+        users = response.data['users']
+        self.assertEqual([u['username'] for u in users], ['alice02', 'alice03', 'bob'])
+        self.assertEqual([u['track'] for u in users], ['A', 'A', 'B'])
+
+        login = APIClient().post('/api/auth/login/', {'username': 'bob', 'password': users[2]['password']})
+        self.assertEqual(login.status_code, 200)
+        self.assertEqual(User.objects.get(username='bob').event, self.event)
+
+    def test_taken_username_creates_nothing(self):
+        response = self.client.post('/api/users/provision/', {
+            'event': self.event.id, 'role': 'jury', 'accounts': [{'name': 'Carol'}, {'name': 'A', 'username': 'alice01'}]
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(User.objects.filter(first_name='Carol').exists())
+
+    def test_team_accounts_are_not_provisioned(self):
+        # Teams get their User through the team login flow, linked to their Team
+        response = self.client.post('/api/users/provision/', {
+            'event': self.event.id, 'role': 'team', 'accounts': [{'name': 'Team Dave'}]
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(User.objects.filter(role='team').exists())
+
+    def test_admin_only(self):
+        self.client.force_authenticate(User.objects.get(username="alice01"))
+        response = self.client.post('/api/users/provision/', {
+            'event': self.event.id, 'role': 'jury', 'accounts': [{'name': 'Eve'}]
+        }, format='json')
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,167 @@
+import multiprocessing
+import shutil
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from .caching import (
+    acquire_lock, bump_results_version, get_or_compute_results, get_results_version,
+    release_lock, results_cache_key, results_lock_key, set_cached_results,
+)
+from .models import User, Event, Team, Criterion, TeamScore
+
+
+def _worker(action, event_id, queue):
+    """Runs in a forked process, standing in for another gunicorn worker"""
+    from django.core.cache import caches
+    caches['default'].close()
+    if action == 'read':
+        queue.put(cache.get(results_cache_key(event_id)))
+    elif action == 'bump':
+        bump_results_version(event_id)
+        queue.put(True)
+
+
+class SharedResultsCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        override = override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': self.cache_dir,
+        }})
+        override.enable()
+        self.addCleanup(override.disable)
+        self.addCleanup(shutil.rmtree, self.cache_dir, True)
+
+    def run_in_other_process(self, action, event_id):
+        context = multiprocessing.get_context('fork')
+        queue = context.Queue()
+        process = context.Process(target=_worker, args=(action, event_id, queue))
+        process.start()
+        result = queue.get(timeout=10)
+        process.join(10)
+        return result
+
+    def test_entry_is_visible_to_other_workers(self):
+        set_cached_results(7, [{'team_id': 1}])
+        self.assertEqual(self.run_in_other_process('read', 7), [{'team_id': 1}])
+
+    def test_bump_in_other_worker_invalidates_entry(self):
+        set_cached_results(7, [{'team_id': 1}])
+        version = get_results_version(7)
+
+        self.run_in_other_process('bump', 7)
+
+        self.assertNotEqual(get_results_version(7), version)
+        self.assertIsNone(cache.get(results_cache_key(7)))
+        self.assertIsNone(self.run_in_other_process('read', 7))
+
+    def test_concurrent_bumps_never_share_a_version(self):
+        version = get_results_version(7)
+        context = multiprocessing.get_context('fork')
+        queue = context.Queue()
+        processes = [context.Process(target=_worker, args=('bump', 7, queue)) for _ in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            queue.get(timeout=10)
+            process.join(10)
+        self.assertNotEqual(get_results_version(7), version)
+
+        # No read-modify-write: the stamp does not depend on the stored value
+        cache.set('results_version_7', 10 ** 30)
+        bump_results_version(7)
+        self.assertLess(get_results_version(7), 10 ** 30)
+
+    def test_lost_version_counter_does_not_resurrect_old_entries(self):
+        set_cached_results(7, [{'team_id': 1}])
+        cache.delete('results_version_7')
+        self.assertIsNone(cache.get(results_cache_key(7)))
+
+
+class ResultsStampedeTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        release_lock(results_lock_key(3))
+        self.addCleanup(release_lock, results_lock_key(3))
+
+    def test_concurrent_misses_compute_once(self):
+        calls = []
+
+        def slow_compute(event_id):
+            calls.append(event_id)
+            time.sleep(0.2)
+            return [{'team_id': 1}]
+
+        outcomes = []
+        with mock.patch('jury_api.caching.compute_event_results', side_effect=slow_compute):
+            threads = [
+                threading.Thread(target=lambda: outcomes.append(get_or_compute_results(3)))
+                for _ in range(8)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(outcomes, [([{'team_id': 1}], False)] * 8)
+
+    def test_serves_last_known_value_while_rebuilding(self):
+        set_cached_results(3, [{'team_id': 1}])
+        bump_results_version(3)
+        acquire_lock(results_lock_key(3), 30)
+
+        with mock.patch('jury_api.caching.compute_event_results') as compute:
+            results, is_stale = get_or_compute_results(3)
+
+        compute.assert_not_called()
+        self.assertEqual(results, [{'team_id': 1}])
+        self.assertTrue(is_stale)
+
+    @mock.patch('jury_api.caching.WAIT_TIMEOUT', 0.1)
+    def test_computes_when_lock_holder_never_finishes(self):
+        acquire_lock(results_lock_key(3), 30)
+        with mock.patch('jury_api.caching.compute_event_results', return_value=[]) as compute:
+            self.assertEqual(get_or_compute_results(3), ([], False))
+        compute.assert_called_once_with(3)
+
+    @override_settings(RESULTS_REBUILD_DELAY=0.05)
+    def test_invalidation_burst_triggers_one_background_rebuild(self):
+        from .caching import _invalidate_now
+        with mock.patch('jury_api.caching.compute_event_results', return_value=[]) as compute:
+            for _ in range(5):
+                _invalidate_now(3)
+            time.sleep(0.3)
+        compute.assert_called_once_with(3)
+        self.assertEqual(cache.get(results_cache_key(3)), [])
+
+
+@override_settings(RESULTS_REBUILD_DELAY=None)
+class ResultsInvalidationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.event = Event.objects.create(name="Cache Event", date=timezone.now())
+        self.jury = User.objects.create_user(username="cache_jury", role="jury", event=self.event)
+        self.team = Team.objects.create(name="Team", event=self.event)
+        self.crit = Criterion.objects.create(event=self.event, name="Pitch", max_score=20)
+        self.score = TeamScore.objects.create(event=self.event, jury=self.jury, team=self.team,
+                                              scores={str(self.crit.id): 5})
+
+    def test_lock_invalidates_results_after_commit(self):
+        first = self.client.get('/api/results/', {'event_id': self.event.id})
+        self.assertEqual(first.data[0]['total_score'], 5.0)
+
+        self.client.force_authenticate(self.jury)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'/api/team-scores/{self.score.id}/',
+                              {'scores': {str(self.crit.id): 9}}, format='json')
+
+        second = self.client.get('/api/results/', {'event_id': self.event.id})
+        self.assertEqual(second.data[0]['total_score'], 9.0)
@@ -0,0 +1,120 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from .imports import import_teams
+from .models import User, Event, Team, Criterion, TeamScore, Message
+
+
+@override_settings(RESULTS_REBUILD_DELAY=None)
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.event = Event.objects.create(name="ETag Event", date=timezone.now())
+        self.admin = User.objects.create_user(username="etag_admin", role="admin")
+        self.jury = User.objects.create_user(username="etag_jury", role="jury", event=self.event)
+        self.team = Team.objects.create(name="ETag Team", event=self.event)
+        self.criterion = Criterion.objects.create(event=self.event, name="Tech", max_score=10, priority_order=1)
+
+    def get(self, url, etag=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get(url, {'event_id': self.event.id}, **headers)
+
+    def test_unchanged_list_is_not_modified(self):
+        first = self.get('/api/teams/')
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('ETag', first)
+        self.assertEqual(first['Cache-Control'], 'no-cache')
+
+        with self.assertNumQueries(0):
+            second = self.get('/api/teams/', first['ETag'])
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_writes_change_the_etag(self):
+        etag = self.get('/api/teams/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Team.objects.create(name="Another", event=self.event)
+        response = self.get('/api/teams/', etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 2)
+
+        etag = response['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            import_teams(self.event, [{'name': 'Imported'}])
+        self.assertEqual(self.get('/api/teams/', etag).status_code, 200)
+
+    def test_other_events_keep_their_etag(self):
+        etag = self.get('/api/criteria/')['ETag']
+        other = Event.objects.create(name="Other", date=timezone.now())
+        with self.captureOnCommitCallbacks(execute=True):
+            Criterion.objects.create(event=other, name="Design", max_score=10, priority_order=1)
+        self.assertEqual(self.get('/api/criteria/', etag).status_code, 304)
+
+    def test_scores_follow_criteria_weights(self):
+        self.client.force_authenticate(self.jury)
+        TeamScore.objects.create(event=self.event, jury=self.jury, team=self.team, scores={str(self.criterion.id): 5})
+        response = self.get('/api/team-scores/')
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.criterion.weight = 2
+            self.criterion.save()
+        response = self.get('/api/team-scores/', response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['total'], 10)
+
+    def test_etag_depends_on_the_user(self):
+        self.client.force_authenticate(self.jury)
+        etag = self.get('/api/team-scores/')['ETag']
+        self.client.force_authenticate(self.admin)
+        self.assertEqual(self.get('/api/team-scores/', etag).status_code, 200)
+
+    def test_mark_as_read_changes_messages_etag(self):
+        Message.objects.create(sender=self.jury, recipient=self.admin, event=self.event, content="Hi")
+        self.client.force_authenticate(self.admin)
+        etag = self.client.get('/api/messages/')['ETag']
+        event_etag = self.get('/api/messages/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/messages/mark_as_read/')
+        response = self.client.get('/api/messages/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['results'][0]['is_read'])
+        # The event-scoped list too
+        response = self.get('/api/messages/', event_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['results'][0]['is_read'])
+
+    def test_event_messages_list_only_that_event(self):
+        other = Event.objects.create(name="Other ETag Event", date=timezone.now())
+        Message.objects.create(sender=self.jury, recipient=self.admin, event=self.event, content="Here")
+        self.client.force_authenticate(self.admin)
+        etag = self.get('/api/messages/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/messages/', {'recipient': self.jury.id, 'event': other.id, 'content': "There"},
+                             format='json')
+
+        # The other event's message neither changes nor appears in this list
+        self.assertEqual(self.get('/api/messages/', etag).status_code, 304)
+        response = self.get('/api/messages/')
+        self.assertEqual([m['content'] for m in response.data['results']], ["Here"])
+        self.assertEqual(len(self.client.get('/api/messages/').data['results']), 2)
+
+    def test_results_follow_the_results_version(self):
+        etag = self.get('/api/results/')['ETag']
+        self.assertEqual(self.get('/api/results/', etag).status_code, 304)
+
+        self.client.force_authenticate(self.jury)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/team-scores/', {
+                'event': self.event.id, 'jury': self.jury.id, 'team': self.team.id,
+                'scores': {str(self.criterion.id): 7}
+            }, format='json')
+        self.client.force_authenticate(None)
+        self.assertEqual(self.get('/api/results/', etag).status_code, 200)
+
+    def test_unversioned_responses_stay_uncached(self):
+        response = self.client.get('/api/ping/')
+        self.assertNotIn('ETag', response)
+        self.assertEqual(response['Cache-Control'], 'no-store, no-cache, must-revalidate, max-age=0')
@@ -0,0 +1,41 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.utils import timezone
+from rest_framework.test import APIClient
+from .models import Event
+
+
+class EventStatusTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        now = timezone.now()
+        self.past = Event.objects.create(name="Past", date=now - timedelta(days=3), status='ongoing')
+        self.today = Event.objects.create(name="Today", date=now, status='upcoming')
+        self.future = Event.objects.create(name="Future", date=now + timedelta(days=3), status='ongoing')
+        self.closed = Event.objects.create(name="Closed", date=now + timedelta(days=5), status='completed')
+
+    def test_list_derives_status_with_read_only_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/events/')
+
+        self.assertTrue(all(q['sql'].startswith('SELECT') for q in queries.captured_queries))
+        statuses = {e['name']: e['status'] for e in response.data['results']}
+        self.assertEqual(statuses, {
+            'Past': 'completed', 'Today': 'ongoing', 'Future': 'upcoming', 'Closed': 'completed',
+        })
+        self.past.refresh_from_db()
+        self.assertEqual(self.past.status, 'ongoing')
+
+    def test_command_persists_statuses_in_bulk(self):
+        out = StringIO()
+        call_command('update_event_statuses', stdout=out)
+        self.assertIn("Updated 3 event(s)", out.getvalue())
+        self.assertEqual(
+            dict(Event.objects.values_list('name', 'status')),
+            {'Past': 'completed', 'Today': 'ongoing', 'Future': 'upcoming', 'Closed': 'completed'},
+        )
@@ -0,0 +1,94 @@
+import csv
+from io import BytesIO, StringIO
+from unittest import skipUnless
+
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from .models import User, Event, Team, Criterion, TeamScore
+from .exports import iter_results_rows
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+
+class ResultsExportTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.admin = User.objects.create_user(username="export_admin", role="admin")
+        self.client.force_authenticate(self.admin)
+        self.event = Event.objects.create(name="Export Event", date=timezone.now())
+        self.pitch = Criterion.objects.create(event=self.event, name="Pitch", max_score=20, weight=1, priority_order=1)
+        self.tech = Criterion.objects.create(event=self.event, name="Tech", max_score=20, weight=2, priority_order=2)
+        self.juries = [
+            User.objects.create_user(username=f"export_jury{i}", role="jury", event=self.event)
+            for i in range(2)
+        ]
+        self.low = Team.objects.create(name="Low", event=self.event, track="AI")
+        self.high = Team.objects.create(name="High", event=self.event)
+        for jury in self.juries:
+            TeamScore.objects.create(event=self.event, jury=jury, team=self.low,
+                                     scores={str(self.pitch.id): 5, str(self.tech.id): 1})
+            TeamScore.objects.create(event=self.event, jury=jury, team=self.high, locked=True,
+                                     scores={str(self.pitch.id): 10, str(self.tech.id): 5})
+
+    def test_rows_are_ranked_with_breakdowns_and_totals(self):
+        rows = list(iter_results_rows(self.event.id))
+        self.assertEqual(rows[0], ['Rang', 'Projet', 'Track', 'Jury', 'Pitch', 'Tech', 'Total pondéré', 'Verrouillé'])
+        self.assertEqual(rows[1], [1, 'High', '', 'export_jury0', 10, 5, 20.0, 'oui'])
+        self.assertEqual(rows[3], [1, 'High', '', 'TOTAL', 20, 10, 40.0, '2/2'])
+        self.assertEqual(rows[6], [2, 'Low', 'AI', 'TOTAL', 10, 2, 14.0, '0/2'])
+        self.assertEqual(len(rows), 7)
+
+    def test_rows_follow_the_results_ranking(self):
+        # Not scored yet, and tied with a team only a former jury scored
+        Team.objects.create(name="Idle", event=self.event, passage_order=1)
+        former = User.objects.create_user(username="export_former", role="jury", event=self.event)
+        late = Team.objects.create(name="Late", event=self.event, passage_order=2)
+        TeamScore.objects.create(event=self.event, jury=former, team=late, scores={str(self.pitch.id): 20})
+        former.event = None
+        former.save()
+
+        rows = list(iter_results_rows(self.event.id))
+        self.assertEqual(rows[7], [3, 'Idle', '', 'TOTAL', 0, 0, 0.0, '0/0'])
+        self.assertEqual(rows[8], [4, 'Late', '', 'TOTAL', 0, 0, 0.0, '0/0'])
+        ranking = [row[1] for row in rows if row[3] == 'TOTAL']
+        results = self.client.get('/api/results/', {'event_id': self.event.id}).data
+        self.assertEqual(ranking, [result['team_name'] for result in results])
+
+    def test_csv_is_streamed(self):
+        response = self.client.get('/api/results/export/', {'event_id': self.event.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode('utf-8-sig')
+        rows = list(csv.reader(StringIO(content), delimiter=';'))
+        self.assertEqual(rows[3][3], 'TOTAL')
+        self.assertEqual(len(rows), 7)
+
+    @skipUnless(openpyxl, "openpyxl is not installed")
+    def test_xlsx_export(self):
+        response = self.client.get('/api/results/export/', {'event_id': self.event.id, 'file_format': 'xlsx'})
+        self.assertEqual(response.status_code, 200)
+        workbook = openpyxl.load_workbook(BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(workbook.active.max_row, 7)
+
+    async def test_csv_is_streamed_asynchronously_under_asgi(self):
+        # Otherwise Django's ASGI handler reads the whole body before sending it
+        token = await Token.objects.acreate(user=self.admin)
+        response = await AsyncClient().get(
+            '/api/results/export/', {'event_id': self.event.id}, headers={'Authorization': f'Token {token.key}'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        content = b''.join([chunk async for chunk in response.streaming_content]).decode('utf-8-sig')
+        self.assertEqual(len(list(csv.reader(StringIO(content), delimiter=';'))), 7)
+
+    def test_requires_admin(self):
+        self.client.force_authenticate(self.juries[0])
+        response = self.client.get('/api/results/export/', {'event_id': self.event.id})
+        self.assertEqual(response.status_code, 403)
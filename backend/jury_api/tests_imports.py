@@ -0,0 +1,140 @@
+import os
+import tempfile
+from io import BytesIO
+from unittest import mock, skipUnless
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from .models import User, Event, Team
+from .imports import ImportFileError, extract_teams, import_teams, run_team_import
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+
+class TeamImportTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(username="import_admin", role="admin")
+        self.client.force_authenticate(self.admin)
+        self.event = Event.objects.create(name="Import Event", date=timezone.now())
+        Team.objects.create(name="Existing", event=self.event, generated_email="a+Existing@x.com")
+
+    def test_bulk_create_reports_row_errors_and_duplicates(self):
+        response = self.client.post('/api/teams/bulk_create/', {
+            'event_id': self.event.id,
+            'teams': [
+                {'name': "New One", 'email': "a@x.com", 'generated_email': "a+New_One@x.com"},
+                {'name': "", 'email': "a@x.com"},
+                {'name': "existing"},
+                {'name': "Other", 'generated_email': "A+NEW_ONE@x.com"},
+                {'name': "Bad Email", 'email': "not-an-email"},
+            ]
+        }, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created_count'], 1)
+        self.assertEqual(response.data['teams'][0]['event'], self.event.id)
+        self.assertIsNotNone(response.data['teams'][0]['id'])
+        self.assertEqual([e['index'] for e in response.data['errors']], [1, 2, 3, 4])
+        self.assertIn('name', response.data['errors'][1]['details'])
+        self.assertIn('generated_email', response.data['errors'][2]['details'])
+        self.assertEqual(Team.objects.filter(event=self.event).count(), 2)
+
+    def test_dry_run_writes_nothing(self):
+        response = self.client.post('/api/teams/bulk_create/', {
+            'event_id': self.event.id,
+            'dry_run': True,
+            'teams': [{'name': "Dry"}]
+        }, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['dry_run'])
+        self.assertEqual(response.data['created_count'], 1)
+        self.assertFalse(Team.objects.filter(name="Dry").exists())
+
+    def test_query_count_does_not_grow_with_rows(self):
+        rows = [{'name': f"Team {i}"} for i in range(50)]
+        # Duplicate lookup, plus the insert and its savepoint
+        with self.assertNumQueries(4):
+            report = import_teams(self.event, rows, batch_size=100)
+        self.assertEqual(report['created_count'], 50)
+
+
+class InlineThread:
+    """Runs the background import synchronously inside the test transaction"""
+    def __init__(self, target, daemon=None):
+        self.target = target
+
+    def start(self):
+        # A real thread closes its own connections; here that is the test's
+        with mock.patch('jury_api.imports.connections.close_all'):
+            self.target()
+
+
+class TeamFileImportTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(username="file_admin", role="admin")
+        self.client.force_authenticate(self.admin)
+        self.event = Event.objects.create(name="File Event", date=timezone.now())
+
+    def write_csv(self, content):
+        handle = tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8')
+        handle.write(content)
+        handle.close()
+        return handle.name
+
+    def test_extract_teams_mirrors_frontend_mapping(self):
+        rows = [["Projet", "", "Contact Mail"], ["Team One", "x", "lead@uni.mg"], ["", "", ""]]
+        self.assertEqual(list(extract_teams(rows)), [{
+            'name': "Team One", 'email': "lead@uni.mg", 'generated_email': "lead+Team_One@uni.mg",
+        }])
+        with self.assertRaises(ImportFileError):
+            list(extract_teams(rows, name_column="Missing"))
+
+    def test_csv_is_imported_in_batches(self):
+        lines = ["Nom;Email"] + [f"Team {i};t{i}@uni.mg" for i in range(7)] + ["Team 0;other@uni.mg"]
+        path = self.write_csv("\n".join(lines))
+
+        with mock.patch('jury_api.imports._save_import_job') as save:
+            job = run_team_import('job', self.event.id, path, '.csv', {}, batch_size=3)
+
+        self.assertEqual(job['status'], 'completed')
+        self.assertEqual((job['processed_count'], job['created_count'], job['errors_count']), (8, 7, 1))
+        self.assertEqual(job['errors'][0]['index'], 7)
+        # Started, one update per batch of 3, then finished
+        self.assertEqual(save.call_count, 1 + 3 + 1)
+        self.assertEqual(Team.objects.get(name="Team 3").imported_from, 'excel')
+        self.assertFalse(os.path.exists(path))
+
+    @skipUnless(openpyxl, "openpyxl is not installed")
+    def test_xlsx_upload_and_status_poll(self):
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.append(["Name", "Track"])
+        sheet.append(["Xlsx Team", "AI"])
+        buffer = BytesIO()
+        workbook.save(buffer)
+        upload = SimpleUploadedFile("teams.xlsx", buffer.getvalue())
+
+        with mock.patch('jury_api.imports.threading.Thread', InlineThread):
+            response = self.client.post('/api/teams/import/', {
+                'file': upload, 'event_id': self.event.id, 'track_column': "Track",
+            }, format='multipart')
+        self.assertEqual(response.status_code, 202)
+
+        status = self.client.get(f"/api/teams/import/{response.data['job_id']}/")
+        self.assertEqual(status.data['status'], 'completed')
+        self.assertEqual(Team.objects.get(event=self.event).track, "AI")
+
+    def test_rejects_unsupported_files(self):
+        upload = SimpleUploadedFile("teams.xls", b"legacy")
+        response = self.client.post('/api/teams/import/', {
+            'file': upload, 'event_id': self.event.id,
+        }, format='multipart')
+        self.assertEqual(response.status_code, 400)
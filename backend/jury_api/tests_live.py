@@ -0,0 +1,146 @@
+import asyncio
+import threading
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from .authentication import token_cache
+from .models import User, Event, Team, Criterion, TeamScore, Message
+from .pubsub import InProcessBroker, event_channel, get_broker, staff_channel, user_channel
+from .streams import format_sse
+
+
+class InProcessBrokerTest(TestCase):
+    async def test_fan_out_to_every_subscriber(self):
+        broker = InProcessBroker()
+        first = broker.subscribe([event_channel(1)])
+        second = broker.subscribe([event_channel(1), user_channel(7)])
+        other = broker.subscribe([event_channel(2)])
+
+        broker.publish(event_channel(1), {'type': 'score_locked', 'data': {}})
+        self.assertEqual((await first.get())['type'], 'score_locked')
+        self.assertEqual((await second.get())['type'], 'score_locked')
+        await asyncio.sleep(0)
+        self.assertTrue(other.queue.empty())
+
+    async def test_publish_from_another_thread(self):
+        broker = InProcessBroker()
+        subscription = broker.subscribe([event_channel(1)])
+        thread = threading.Thread(
+            target=broker.publish, args=(event_channel(1), {'type': 'ranking_changed', 'data': {}})
+        )
+        thread.start()
+        message = await asyncio.wait_for(subscription.get(), 1)
+        thread.join()
+        self.assertEqual(message['type'], 'ranking_changed')
+
+    async def test_slow_subscriber_keeps_the_latest_messages(self):
+        broker = InProcessBroker()
+        subscription = broker.subscribe([event_channel(1)])
+        for index in range(subscription.queue.maxsize + 5):
+            broker.publish(event_channel(1), {'type': 'passage_order', 'data': {'n': index}})
+        await asyncio.sleep(0)
+        self.assertEqual((await subscription.get())['data']['n'], 5)
+
+    async def test_close_unsubscribes(self):
+        broker = InProcessBroker()
+        subscription = broker.subscribe([event_channel(1), user_channel(2)])
+        self.assertEqual(broker.subscriber_count(event_channel(1)), 1)
+        subscription.close()
+        self.assertEqual(broker.subscriber_count(event_channel(1)), 0)
+        self.assertEqual(broker.subscriber_count(user_channel(2)), 0)
+
+
+class EventStreamViewTest(TestCase):
+    def setUp(self):
+        self.event = Event.objects.create(name="Live Event", date=timezone.now())
+        self.admin = User.objects.create_user(username="live_admin", role="admin")
+        self.token = Token.objects.create(user=self.admin)
+        token_cache.clear()
+        self.addCleanup(token_cache.clear)
+
+    async def test_streams_published_deltas(self):
+        response = await self.async_client.get(
+            f'/api/events/{self.event.id}/stream/', {'token': self.token.key}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        content = aiter(response.streaming_content)
+        self.assertTrue((await anext(content)).startswith(b'retry:'))
+
+        get_broker().publish(staff_channel(self.event.id), {'type': 'message', 'data': {'id': 3}})
+        chunk = await asyncio.wait_for(anext(content), 1)
+        self.assertEqual(chunk.decode(), format_sse({'type': 'message', 'data': {'id': 3}}))
+        await content.aclose()
+
+    async def test_unknown_event(self):
+        response = await self.async_client.get('/api/events/999999/stream/')
+        self.assertEqual(response.status_code, 404)
+
+    async def test_invalid_token(self):
+        response = await self.async_client.get(f'/api/events/{self.event.id}/stream/', {'token': 'nope'})
+        self.assertEqual(response.status_code, 401)
+
+    @override_settings(AUTH_TOKEN_EXPIRY_HOURS=1)
+    async def test_expired_token(self):
+        await Token.objects.filter(key=self.token.key).aupdate(created=timezone.now() - timedelta(hours=2))
+        response = await self.async_client.get(f'/api/events/{self.event.id}/stream/', {'token': self.token.key})
+        self.assertEqual(response.status_code, 401)
+
+    async def test_inactive_user(self):
+        await User.objects.filter(id=self.admin.id).aupdate(is_active=False)
+        response = await self.async_client.get(f'/api/events/{self.event.id}/stream/', {'token': self.token.key})
+        self.assertEqual(response.status_code, 401)
+
+
+@override_settings(RESULTS_REBUILD_DELAY=None)
+class LivePublishTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.event = Event.objects.create(name="Publish Event", date=timezone.now())
+        self.admin = User.objects.create_user(username="pub_admin", role="admin")
+        self.jury = User.objects.create_user(username="pub_jury", role="jury", event=self.event)
+        self.team = Team.objects.create(name="Pub Team", event=self.event)
+        self.criterion = Criterion.objects.create(event=self.event, name="Tech", max_score=10, priority_order=1)
+        self.client = APIClient()
+        self.broker = mock.Mock()
+        patcher = mock.patch('jury_api.pubsub.get_broker', return_value=self.broker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def published(self):
+        return [(call.args[0], call.args[1]['type']) for call in self.broker.publish.call_args_list]
+
+    def test_lock_publishes_after_commit(self):
+        score = TeamScore.objects.create(
+            event=self.event, jury=self.jury, team=self.team, scores={str(self.criterion.id): 5}
+        )
+        self.client.force_authenticate(self.jury)
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            response = self.client.post(f'/api/team-scores/{score.id}/lock/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.published(), [])
+
+        for callback in callbacks:
+            callback()
+        self.assertIn((event_channel(self.event.id), 'score_locked'), self.published())
+
+    def test_passage_order_update(self):
+        self.client.force_authenticate(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f'/api/teams/{self.team.id}/', {'passage_order': 4}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn((event_channel(self.event.id), 'passage_order'), self.published())
+
+    def test_message_to_staff(self):
+        self.client.force_authenticate(self.jury)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/messages/', {'content': 'Help', 'event': self.event.id}, format='json')
+        self.assertEqual(response.status_code, 201)
+        message = Message.objects.get()
+        self.assertEqual(self.published(), [(staff_channel(self.event.id), 'message')])
+        self.assertEqual(self.broker.publish.call_args.args[1]['data']['id'], message.id)
@@ -0,0 +1,221 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from .models import User, Event, Message, Broadcast
+from .inbox import unread_count
+from .conversations import conversation_summaries
+
+
+class MessageListQueryTest(TestCase):
+    def setUp(self):
+        self.event = Event.objects.create(name="Message Event", date=timezone.now())
+        self.admin = User.objects.create_user(username="msg_admin", role="admin")
+        self.client.force_login(self.admin)
+
+    def add_messages(self, count):
+        for i in range(count):
+            sender = User.objects.create_user(username=f"msg_jury_{count}_{i}", role="jury", event=self.event)
+            Message.objects.create(sender=sender, recipient=self.admin, event=self.event, content=f"Hello {i}")
+
+    def count_list_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/messages/')
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_is_flat(self):
+        self.add_messages(2)
+        small = self.count_list_queries()
+        self.add_messages(20)
+        self.assertEqual(self.count_list_queries(), small)
+
+
+class UnreadCountTest(TestCase):
+    def setUp(self):
+        self.event = Event.objects.create(name="Unread Event", date=timezone.now())
+        self.other_event = Event.objects.create(name="Other Event", date=timezone.now())
+        self.admin = User.objects.create_user(username="unread_admin", role="admin")
+        self.jury = User.objects.create_user(username="unread_jury", role="jury", event=self.event)
+
+    def get_count(self, user, **params):
+        self.client.force_login(user)
+        response = self.client.get('/api/messages/unread-count/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()['unread_count']
+
+    def test_counts_direct_and_staff_messages(self):
+        Message.objects.create(sender=self.admin, recipient=self.jury, event=self.event, content="To jury")
+        Message.objects.create(sender=self.jury, recipient=None, event=self.event, content="To staff")
+        Message.objects.create(sender=self.jury, recipient=None, event=self.other_event, content="Elsewhere")
+        Message.objects.create(sender=self.jury, recipient=self.admin, event=self.event, content="To admin")
+
+        self.assertEqual(self.get_count(self.jury), 1)
+        self.assertEqual(self.get_count(self.admin), 3)
+        self.assertEqual(self.get_count(self.admin, event_id=self.event.id), 2)
+
+    def test_poll_is_a_single_lookup(self):
+        Message.objects.create(sender=self.admin, recipient=self.jury, event=self.event, content="Hi")
+        with self.assertNumQueries(1):
+            self.assertEqual(unread_count(self.jury), 1)
+
+    def test_mark_as_read_and_clear_conversation(self):
+        for i in range(3):
+            Message.objects.create(sender=self.jury, recipient=None, event=self.event, content=f"Staff {i}")
+        Message.objects.create(sender=self.jury, recipient=self.admin, event=self.event, content="Direct")
+        other = User.objects.create_user(username="unread_other", role="jury", event=self.event)
+        Message.objects.create(sender=other, recipient=None, event=self.event, content="Other")
+
+        self.client.force_login(self.admin)
+        response = self.client.post('/api/messages/mark_as_read/', {'sender_id': self.jury.id})
+        self.assertEqual(response.json()['marked_as_read'], 4)
+        self.assertEqual(self.get_count(self.admin), 1)
+
+        self.client.delete(f'/api/messages/clear-conversation/{other.id}/')
+        self.assertEqual(self.get_count(self.admin), 0)
+        self.assertEqual(self.get_count(self.admin, event_id=self.event.id), 0)
+
+    def test_requires_authentication(self):
+        response = self.client.get('/api/messages/unread-count/')
+        self.assertIn(response.status_code, (401, 403))
+
+
+class BroadcastTest(TestCase):
+    def setUp(self):
+        self.event = Event.objects.create(name="Broadcast Event", date=timezone.now())
+        self.admin = User.objects.create_user(username="bc_admin", role="admin")
+        self.client.force_login(self.admin)
+
+    def make_users(self, count, role='jury', track=None, prefix='bc'):
+        return [
+            User.objects.create_user(username=f"{prefix}_{role}_{track}_{i}", role=role, event=self.event, track=track)
+            for i in range(count)
+        ]
+
+    def send(self, recipients):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/messages/', {
+                'content': 'Announcement', 'event': self.event.id, 'recipients': recipients
+            }, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        return len(queries)
+
+    def test_multi_recipient_send_is_flat(self):
+        few = self.send([user.id for user in self.make_users(2, prefix='few')])
+        many = self.send([user.id for user in self.make_users(20, prefix='many')] + [999999])
+        self.assertEqual(few, many)
+        self.assertEqual(Message.objects.count(), 22)
+
+    def test_selectors_and_skipped_ids(self):
+        track_a = self.make_users(3, track='A')
+        self.make_users(2, track='B')
+        self.make_users(2, role='team', track='A')
+
+        response = self.client.post('/api/messages/broadcast/', {
+            'content': 'Track A juries', 'event': self.event.id, 'role': 'jury', 'track': 'A'
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['sent_count'], 3)
+        self.assertEqual(
+            set(Message.objects.values_list('recipient_id', flat=True)), {user.id for user in track_a}
+        )
+
+        response = self.client.post('/api/messages/broadcast/', {
+            'content': 'Explicit', 'event': self.event.id, 'recipients': [track_a[0].id, 424242]
+        }, content_type='application/json')
+        self.assertEqual(response.json()['skipped'], [424242])
+
+    def test_no_matching_recipient(self):
+        response = self.client.post('/api/messages/broadcast/', {
+            'content': 'Nobody', 'event': self.event.id, 'track': 'Z'
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_large_audience_shares_one_broadcast_row(self):
+        users = self.make_users(4)
+        with mock.patch('jury_api.messaging.BROADCAST_CONTENT_THRESHOLD', 2):
+            response = self.client.post('/api/messages/broadcast/', {
+                'content': 'Everyone', 'event': self.event.id
+            }, content_type='application/json')
+
+        broadcast = Broadcast.objects.get(id=response.json()['broadcast_id'])
+        self.assertEqual(broadcast.recipients_count, 4)
+        self.assertFalse(Message.objects.exclude(content='').exists())
+
+        self.client.force_login(users[0])
+        self.assertEqual(self.client.get('/api/messages/unread-count/').json()['unread_count'], 1)
+        listed = self.client.get('/api/messages/').json()['results']
+        self.assertEqual([message['content'] for message in listed], ['Everyone'])
+
+
+class ConversationTest(TestCase):
+    def setUp(self):
+        self.event = Event.objects.create(name="Conversation Event", date=timezone.now())
+        self.other_event = Event.objects.create(name="Other Event", date=timezone.now())
+        self.admin = User.objects.create_user(username="conv_admin", role="admin")
+        self.jury = User.objects.create_user(username="conv_jury", role="jury", event=self.event)
+        self.team = User.objects.create_user(username="conv_team", role="team", event=self.event)
+
+    def send(self, sender, recipient, content, event=None):
+        return Message.objects.create(sender=sender, recipient=recipient, event=event or self.event, content=content)
+
+    def get(self, user, counterpart, **params):
+        self.client.force_login(user)
+        response = self.client.get(
+            f'/api/messages/conversations/{counterpart}/', {'event_id': self.event.id, **params}
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_keyset_pages_and_incremental_refresh(self):
+        for i in range(5):
+            self.send(self.jury if i % 2 else self.admin, None if i % 2 else self.jury, f"m{i}")
+        self.send(self.jury, None, "elsewhere", event=self.other_event)
+
+        page = self.get(self.admin, self.jury.id, limit=2)
+        self.assertEqual([m['content'] for m in page['results']], ['m3', 'm4'])
+        self.assertTrue(page['has_more'])
+        page = self.get(self.admin, self.jury.id, limit=2, before=page['before'])
+        self.assertEqual([m['content'] for m in page['results']], ['m1', 'm2'])
+        page = self.get(self.admin, self.jury.id, limit=2, before=page['before'])
+        self.assertEqual([m['content'] for m in page['results']], ['m0'])
+        self.assertFalse(page['has_more'])
+
+        latest = self.get(self.jury, 'staff')
+        self.assertEqual(len(latest['results']), 5)
+        self.send(self.admin, self.jury, "new")
+        since = self.get(self.jury, 'staff', after=latest['after'])
+        self.assertEqual([m['content'] for m in since['results']], ['new'])
+
+    def test_summary_in_one_query(self):
+        self.send(self.jury, None, "jury 1")
+        self.send(self.admin, self.jury, "reply")
+        self.send(self.team, None, "team 1")
+        self.send(self.team, None, "team 2")
+        self.send(self.team, None, "elsewhere", event=self.other_event)
+
+        with self.assertNumQueries(1):
+            summaries = conversation_summaries(self.admin, self.event.id)
+        self.assertEqual(
+            [(m.counterpart, m.content, m.unread_count) for m in summaries],
+            [(self.team.id, "team 2", 2), (self.jury.id, "reply", 1)]
+        )
+
+        self.client.force_login(self.jury)
+        response = self.client.get('/api/messages/conversations/', {'event_id': self.event.id})
+        self.assertEqual(response.json(), [{
+            'counterpart': None, 'counterpart_username': 'Staff', 'unread_count': 1,
+            'last_message': response.json()[0]['last_message'],
+        }])
+        self.assertEqual(response.json()[0]['last_message']['content'], "reply")
+
+    def test_access_and_validation(self):
+        self.client.force_login(self.jury)
+        response = self.client.get(f'/api/messages/conversations/{self.team.id}/', {'event_id': self.event.id})
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get('/api/messages/conversations/staff/', {'event_id': self.event.id, 'after': 'bogus'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/messages/conversations/')
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,106 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from .models import User, Event, Team, TeamScore, Criterion, QueueState
+
+
+class LiveQueueTest(TestCase):
+    def setUp(self):
+        self.event = Event.objects.create(name="Queue Event", date=timezone.now())
+        self.admin = User.objects.create_user(username="queue_admin", role="admin")
+        self.juries = [
+            User.objects.create_user(username=f"queue_jury{i}", role="jury", event=self.event) for i in range(2)
+        ]
+        self.criterion = Criterion.objects.create(event=self.event, name="Pitch", max_score=10)
+        self.teams = [
+            Team.objects.create(name=f"Team {i}", event=self.event, passage_order=i + 1, passage_time=f"09h{i}0")
+            for i in range(4)
+        ]
+        self.client = APIClient()
+        self.url = f'/api/events/{self.event.id}/queue/'
+
+    def lock(self, jury, team):
+        score = TeamScore.objects.create(
+            event=self.event, jury=jury, team=team, scores={str(self.criterion.id): 5}
+        )
+        client = APIClient()
+        client.force_authenticate(jury)
+        self.assertEqual(client.post(f'/api/team-scores/{score.id}/lock/').status_code, 200)
+
+    def test_snapshot(self):
+        response = self.client.get(self.url, {'upcoming': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['current_order'], 1)
+        self.assertEqual(response.data['jury_count'], 2)
+        self.assertEqual([team['id'] for team in response.data['current']], [self.teams[0].id])
+        self.assertEqual([team['name'] for team in response.data['next']], ["Team 1", "Team 2"])
+
+    def test_poll_reads_the_state_row_only(self):
+        first = self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(queries), 1)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url)
+        self.assertLessEqual(len(queries), 3)
+
+    def test_moves_on_once_every_jury_has_locked(self):
+        etag = self.client.get(self.url)['ETag']
+        self.lock(self.juries[0], self.teams[0])
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['current_order'], 1)
+        self.assertEqual(response.data['current'][0]['locked_count'], 1)
+
+        self.lock(self.juries[1], self.teams[0])
+        self.assertEqual(self.client.get(self.url).data['current_order'], 2)
+
+    def test_follows_the_event_juries(self):
+        self.lock(self.juries[1], self.teams[0])
+        etag = self.client.get(self.url)['ETag']
+        other_event = Event.objects.create(name="Other Queue Event", date=timezone.now())
+
+        # Its lock no longer counts, and the remaining jury has not scored
+        self.juries[1].event = other_event
+        self.juries[1].save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['jury_count'], 1)
+        self.assertEqual(response.data['current'][0]['locked_count'], 0)
+        self.assertFalse(response.data['current'][0]['complete'])
+
+        User.objects.create_user(username="queue_jury_new", role="jury", event=self.event)
+        self.assertEqual(self.client.get(self.url).data['jury_count'], 2)
+
+    def test_moves_on_when_the_last_missing_jury_leaves(self):
+        self.lock(self.juries[0], self.teams[0])
+        self.juries[1].delete()
+        self.assertEqual(self.client.get(self.url).data['current_order'], 2)
+
+    def test_admin_advance(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.post(f'{self.url}advance/', {'direction': 'next'}, format='json')
+        self.assertEqual(response.data['current_order'], 2)
+        response = self.client.post(f'{self.url}advance/', {'passage_order': 4}, format='json')
+        self.assertEqual(response.data['next'], [])
+        response = self.client.post(f'{self.url}advance/', {}, format='json')
+        self.assertIsNone(response.data['current_order'])
+        response = self.client.post(f'{self.url}advance/', {'direction': 'previous'}, format='json')
+        self.assertEqual(response.data['current_order'], 4)
+
+        self.client.force_authenticate(self.juries[0])
+        self.assertEqual(self.client.post(f'{self.url}advance/', {}, format='json').status_code, 403)
+
+    def test_rescheduling_restarts_the_queue(self):
+        self.client.force_authenticate(self.admin)
+        self.client.post(f'{self.url}advance/', {'passage_order': 3}, format='json')
+        self.client.post('/api/teams/schedule/', {'event_id': self.event.id, 'seed': 1}, format='json')
+        self.assertFalse(QueueState.objects.filter(event=self.event).exists())
+        self.assertEqual(self.client.get(self.url).data['current_order'], 1)
+
+    def test_unknown_event(self):
+        self.assertEqual(self.client.get('/api/events/999999/queue/').status_code, 404)
@@ -0,0 +1,188 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from .models import User, Event, Team, Criterion, TeamScore, TeamResult
+from .results import compute_event_results
+
+
+class ResultsEngineTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.event = Event.objects.create(name="Results Event", date=timezone.now())
+        self.crit = Criterion.objects.create(
+            event=self.event, name="Innovation", max_score=20, priority_order=1
+        )
+
+    def _populate(self, teams_count, juries_count):
+        teams = [
+            Team.objects.create(name=f"Team {i}", event=self.event, passage_order=i)
+            for i in range(teams_count)
+        ]
+        juries = [
+            User.objects.create_user(username=f"jury_{teams_count}_{i}", role="jury", event=self.event)
+            for i in range(juries_count)
+        ]
+        for t_index, team in enumerate(teams):
+            for j_index, jury in enumerate(juries):
+                # Leave one pair unscored to exercise the missing-score branch
+                if t_index == 0 and j_index == 0:
+                    continue
+                TeamScore.objects.create(
+                    event=self.event, jury=jury, team=team,
+                    scores={str(self.crit.id): (t_index + j_index) % 20}
+                )
+        return teams, juries
+
+    def test_results_payload(self):
+        teams, juries = self._populate(2, 2)
+        results = compute_event_results(self.event.id)
+
+        self.assertEqual([r['team_id'] for r in results], [teams[1].id, teams[0].id])
+        top = results[0]
+        self.assertEqual(top['total_score'], 1 + 2)
+        self.assertEqual([s['jury_id'] for s in top['jury_scores']], [j.id for j in juries])
+
+        missing = results[1]['jury_scores'][0]
+        self.assertEqual(missing, {
+            'jury_id': juries[0].id,
+            'jury_name': juries[0].username,
+            'scores': {},
+            'total': 0
+        })
+
+    def test_query_count_is_independent_of_event_size(self):
+        self._populate(2, 2)
+        with self.assertNumQueries(3):
+            compute_event_results(self.event.id)
+
+        self._populate(10, 5)
+        with self.assertNumQueries(3):
+            compute_event_results(self.event.id)
+
+    def test_results_view_uses_cache(self):
+        self._populate(3, 2)
+        response = self.client.get('/api/results/', {'event_id': self.event.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 3)
+
+        with self.assertNumQueries(0):
+            cached = self.client.get('/api/results/', {'event_id': self.event.id})
+        self.assertEqual(cached.data, response.data)
+
+
+class ScoreAggregateTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.event = Event.objects.create(name="Aggregate Event", date=timezone.now())
+        self.jury = User.objects.create_user(username="agg_jury", role="jury", event=self.event)
+        self.alpha = Team.objects.create(name="Alpha", event=self.event, passage_order=1)
+        self.beta = Team.objects.create(name="Beta", event=self.event, passage_order=2)
+        self.light = Criterion.objects.create(event=self.event, name="Pitch", max_score=20, weight=1)
+        self.heavy = Criterion.objects.create(event=self.event, name="Tech", max_score=20, weight=3)
+
+    def test_results_apply_criterion_weights(self):
+        # Raw sums would rank Alpha first (15 vs 10)
+        TeamScore.objects.create(event=self.event, jury=self.jury, team=self.alpha,
+                                 scores={str(self.light.id): 15})
+        TeamScore.objects.create(event=self.event, jury=self.jury, team=self.beta,
+                                 scores={str(self.heavy.id): 10})
+
+        results = compute_event_results(self.event.id)
+        self.assertEqual([r['team_name'] for r in results], ["Beta", "Alpha"])
+        self.assertEqual(results[0]['total_score'], 30.0)
+        self.assertEqual(results[0]['jury_scores'][0]['total'], 30.0)
+
+    def test_totals_only_count_current_juries(self):
+        other_event = Event.objects.create(name="Other Event", date=timezone.now())
+        moved = User.objects.create_user(username="agg_moved", role="jury", event=self.event)
+        TeamScore.objects.create(event=self.event, jury=self.jury, team=self.alpha,
+                                 scores={str(self.light.id): 5})
+        TeamScore.objects.create(event=self.event, jury=moved, team=self.beta,
+                                 scores={str(self.light.id): 9})
+        admin = User.objects.create_user(username="agg_mover", role="admin")
+        client = APIClient()
+        client.force_authenticate(admin)
+        self.assertEqual(client.get('/api/results/', {'event_id': self.event.id}).data[0]['team_name'], "Beta")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            client.patch(f'/api/users/{moved.id}/', {'event': other_event.id}, format='json')
+
+        results = client.get('/api/results/', {'event_id': self.event.id}).data
+        self.assertEqual([r['team_name'] for r in results], ["Alpha", "Beta"])
+        for result in results:
+            self.assertEqual([s['jury_id'] for s in result['jury_scores']], [self.jury.id])
+            self.assertEqual(result['total_score'], sum(s['total'] for s in result['jury_scores']))
+
+    def test_rollup_follows_save_lock_and_reset(self):
+        team_score = TeamScore.objects.create(event=self.event, jury=self.jury, team=self.alpha,
+                                              scores={str(self.heavy.id): 4})
+        self.assertEqual(self.alpha.result.total_score, 12.0)
+
+        team_score.locked = True
+        team_score.save()
+        self.alpha.result.refresh_from_db()
+        self.assertEqual(self.alpha.result.locked_count, 1)
+
+        team_score.locked = False
+        team_score.scores = {}
+        team_score.save()
+        self.alpha.result.refresh_from_db()
+        self.assertEqual((self.alpha.result.total_score, self.alpha.result.locked_count), (0.0, 0))
+
+    def test_weight_change_refreshes_aggregates(self):
+        team_score = TeamScore.objects.create(event=self.event, jury=self.jury, team=self.alpha,
+                                              scores={str(self.heavy.id): 4})
+        self.heavy.weight = 2
+        self.heavy.save()
+
+        team_score.refresh_from_db()
+        self.alpha.result.refresh_from_db()
+        self.assertEqual(team_score.weighted_total, 8.0)
+        self.assertEqual(self.alpha.result.total_score, 8.0)
+
+    def test_deleting_team_removes_its_rollup(self):
+        TeamScore.objects.create(event=self.event, jury=self.jury, team=self.alpha,
+                                 scores={str(self.light.id): 4})
+        self.alpha.delete()
+        self.assertFalse(TeamResult.objects.filter(event=self.event).exists())
+
+    def test_completion_reads_locked_rollups(self):
+        admin = User.objects.create_user(username="agg_admin", role="admin")
+        TeamScore.objects.create(event=self.event, jury=self.jury, team=self.alpha, locked=True)
+        TeamScore.objects.create(event=self.event, jury=self.jury, team=self.beta)
+
+        client = APIClient()
+        client.force_authenticate(admin)
+        response = client.get('/api/check-completion/', {'event_id': self.event.id})
+        self.assertEqual(response.data['scores_count'], 1)
+        self.assertFalse(response.data['all_complete'])
+
+    def test_rollups_follow_the_current_juries(self):
+        admin = User.objects.create_user(username="agg_admin", role="admin")
+        leaving = User.objects.create_user(username="agg_leaving", role="jury", event=self.event)
+        TeamScore.objects.create(event=self.event, jury=leaving, team=self.alpha, locked=True,
+                                 scores={str(self.light.id): 5})
+        TeamScore.objects.create(event=self.event, jury=leaving, team=self.beta, locked=True)
+        TeamScore.objects.create(event=self.event, jury=self.jury, team=self.beta, locked=True)
+
+        def locked_count(team):
+            return sum(TeamResult.objects.filter(team=team).values_list('locked_count', flat=True))
+
+        leaving.event = Event.objects.create(name="Next Event", date=timezone.now())
+        leaving.save()
+        self.assertEqual(locked_count(self.alpha), 0)
+
+        client = APIClient()
+        client.force_authenticate(admin)
+        response = client.get('/api/check-completion/', {'event_id': self.event.id})
+        self.assertEqual((response.data['scores_count'], response.data['required_scores']), (1, 2))
+        self.assertFalse(response.data['all_complete'])
+
+        # Back in the event, then deleted along with its scores
+        leaving.event = self.event
+        leaving.save()
+        self.assertEqual(locked_count(self.alpha), 1)
+        leaving.delete()
+        self.assertEqual(locked_count(self.alpha), 0)
@@ -0,0 +1,85 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from .models import User, Event, Team
+from .scheduling import ScheduleError, parse_breaks, parse_time, time_slots
+
+
+class SlotTest(TestCase):
+    def test_parse_time(self):
+        self.assertEqual(parse_time('09h30'), 570)
+        self.assertEqual(parse_time('9:05'), 545)
+        with self.assertRaises(ScheduleError):
+            parse_time('25:00')
+
+    def test_slots_skip_breaks(self):
+        breaks = parse_breaks([{'start': '09h25', 'duration': 20}])
+        self.assertEqual(time_slots(4, parse_time('09h00'), 10, breaks), [540, 550, 585, 595])
+
+
+class ScheduleEndpointTest(TestCase):
+    def setUp(self):
+        self.event = Event.objects.create(
+            name="Schedule Event", date=timezone.now(), presentation_start_time='09:00', presentation_duration=10
+        )
+        self.admin = User.objects.create_user(username="schedule_admin", role="admin")
+        self.teams = [
+            Team.objects.create(name=f"Team {i}", event=self.event, track='A' if i < 4 else 'B')
+            for i in range(6)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def schedule(self, **data):
+        return self.client.post('/api/teams/schedule/', {'event_id': self.event.id, **data}, format='json')
+
+    def saved(self):
+        return list(Team.objects.filter(event=self.event).order_by('passage_order').values_list(
+            'id', 'passage_order', 'passage_time'
+        ))
+
+    def test_seeded_schedule_is_reproducible_and_written_at_once(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.schedule(seed=42)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len([q for q in queries if q['sql'].startswith('UPDATE "teams"')]), 1)
+
+        first = self.saved()
+        self.assertEqual([order for _, order, _ in first], [1, 2, 3, 4, 5, 6])
+        self.assertEqual([time for _, _, time in first], ['09h00', '09h10', '09h20', '09h30', '09h40', '09h50'])
+        # Track A first, then track B
+        self.assertEqual({team_id for team_id, _, _ in first[:4]}, {team.id for team in self.teams[:4]})
+
+        self.schedule(seed=42)
+        self.assertEqual(self.saved(), first)
+
+    def test_parallel_rooms_and_breaks(self):
+        response = self.schedule(seed=1, rooms=2, start_time='10h00', breaks=[{'start': '10h15', 'duration': 30}])
+        passages = response.data['passages']
+        self.assertEqual([p['passage_order'] for p in passages], [1, 1, 2, 2, 3, 3])
+        self.assertEqual(
+            [p['passage_time'] for p in passages[:4]],
+            ['10h00 (salle 1)', '10h00 (salle 2)', '10h45 (salle 1)', '10h45 (salle 2)']
+        )
+        self.assertEqual(passages[4]['passage_time'], '10h55 (salle 1)')
+
+    def test_dry_run_and_clear(self):
+        response = self.schedule(seed=3, dry_run=True)
+        self.assertEqual(len(response.data['passages']), 6)
+        self.assertTrue(all(order is None for _, order, _ in self.saved()))
+
+        self.schedule()
+        response = self.client.delete(f'/api/teams/schedule/?event_id={self.event.id}')
+        self.assertEqual(response.data['cleared'], 6)
+        self.assertTrue(all(order is None for _, order, _ in self.saved()))
+
+    def test_invalid_input_and_permissions(self):
+        self.assertEqual(self.schedule(start_time='noon').status_code, 400)
+        self.assertEqual(self.schedule(rooms=0).status_code, 400)
+
+        self.client.force_authenticate(None)
+        self.assertEqual(self.schedule().status_code, 401)
+        response = self.client.patch(f'/api/teams/{self.teams[0].id}/', {'passage_order': 1}, format='json')
+        self.assertEqual(response.status_code, 401)
@@ -1,9 +1,18 @@
-from django.test import TestCase
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
+from rest_framework.test import APIClient
 from .models import User, Event, Team, Criterion, TeamScore
+from .results import get_criteria_weights
+from .serializers import TeamScoreSerializer
 
 class ScoreCalculationTest(TestCase):
     def setUp(self):
+        cache.clear()
         self.event = Event.objects.create(
             name="Test Event", 
             date=timezone.now()
@@ -64,3 +73,199 @@ class ScoreCalculationTest(TestCase):
         )
         # Should fallback to weight 1.0
         self.assertEqual(team_score.get_total(), 10.0)
+
+    def test_weight_change_invalidates_cache(self):
+        """Totals follow criterion weight updates"""
+        team_score = TeamScore.objects.create(
+            event=self.event,
+            jury=self.jury,
+            team=self.team,
+            scores={str(self.crit2.id): 10}
+        )
+        self.assertEqual(team_score.get_total(), 25.0)
+
+        self.crit2.weight = 3
+        self.crit2.save()
+        self.assertEqual(team_score.get_total(), 30.0)
+
+    def test_serializer_totals_without_per_row_queries(self):
+        """Listing scores loads the event weights once, not once per row"""
+        for i in range(10):
+            team = Team.objects.create(name=f"Team {i}", event=self.event)
+            TeamScore.objects.create(
+                event=self.event,
+                jury=self.jury,
+                team=team,
+                scores={str(self.crit1.id): i, str(self.crit2.id): 2}
+            )
+        queryset = TeamScore.objects.select_related('jury', 'team').order_by('id')
+        cache.clear()
+
+        # One query for the scores, one for the criteria weights
+        with self.assertNumQueries(2):
+            data = TeamScoreSerializer(queryset, many=True).data
+        self.assertEqual([row['total'] for row in data], [i + 5.0 for i in range(10)])
+
+
+class TeamScoreListQueryTest(TestCase):
+    def setUp(self):
+        self.event = Event.objects.create(name="List Event", date=timezone.now())
+        self.admin = User.objects.create_user(username="list_admin", role="admin")
+        self.criterion = Criterion.objects.create(event=self.event, name="Pitch", max_score=20)
+        self.client.force_login(self.admin)
+
+    def add_scores(self, count):
+        jury = User.objects.create_user(username=f"list_jury_{count}", role="jury", event=self.event)
+        for i in range(count):
+            team = Team.objects.create(name=f"Team {count}-{i}", event=self.event)
+            TeamScore.objects.create(event=self.event, jury=jury, team=team,
+                                     scores={str(self.criterion.id): i})
+
+    def count_list_queries(self):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/team-scores/', {'event_id': self.event.id})
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_is_flat(self):
+        self.add_scores(2)
+        small = self.count_list_queries()
+        self.add_scores(20)
+        self.assertEqual(self.count_list_queries(), small)
+
+
+class TeamScoreValidationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.event = Event.objects.create(name="Validation Event", date=timezone.now())
+        self.jury = User.objects.create_user(username="val_jury", role="jury", event=self.event)
+        self.team = Team.objects.create(name="Team", event=self.event)
+        self.criteria = [
+            Criterion.objects.create(event=self.event, name=f"C{i}", max_score=10, priority_order=i)
+            for i in range(12)
+        ]
+
+    def payload(self, scores):
+        return {'event': self.event.id, 'jury': self.jury.id, 'team': self.team.id, 'scores': scores}
+
+    def test_criteria_loaded_once_for_all_scores(self):
+        scores = {str(c.id): 5 for c in self.criteria}
+        TeamScoreSerializer.check_scores(scores, self.event)  # warm the per-event cache
+        serializer = TeamScoreSerializer(data=self.payload(scores))
+        # Only the event/jury/team lookups and the unique_together check remain
+        with self.assertNumQueries(4):
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+
+    def test_reports_every_invalid_score(self):
+        other_event = Event.objects.create(name="Other", date=timezone.now())
+        foreign = Criterion.objects.create(event=other_event, name="Foreign", max_score=10)
+        serializer = TeamScoreSerializer(data=self.payload({
+            str(self.criteria[0].id): 11,
+            str(self.criteria[1].id): -1,
+            str(self.criteria[2].id): 4,
+            str(foreign.id): 3,
+        }))
+
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(serializer.errors['non_field_errors'], [
+            "Score for C0 must be between 0 and 10",
+            "Score for C1 must be between 0 and 10",
+            f"Criterion {foreign.id} does not exist in this event context",
+        ])
+
+
+@override_settings(RESULTS_REBUILD_DELAY=None)
+class TeamScoreBatchTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.event = Event.objects.create(name="Batch Event", date=timezone.now())
+        self.jury = User.objects.create_user(username="batch_jury", role="jury", event=self.event)
+        self.client.force_authenticate(self.jury)
+        self.criterion = Criterion.objects.create(event=self.event, name="Pitch", max_score=20, weight=2)
+        self.teams = [Team.objects.create(name=f"Team {i}", event=self.event) for i in range(4)]
+        self.existing = TeamScore.objects.create(
+            event=self.event, jury=self.jury, team=self.teams[0],
+            scores={str(self.criterion.id): 1}, global_comments="keep me"
+        )
+
+    def post(self, entries):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post('/api/team-scores/batch/', {'entries': entries}, format='json')
+
+    def test_upserts_locks_and_reports_errors(self):
+        key = str(self.criterion.id)
+        with mock.patch('jury_api.caching.bump_results_version') as bump:
+            response = self.post([
+                {'team': self.teams[0].id, 'scores': {key: 10}},
+                {'team': str(self.teams[1].id), 'scores': {key: 15}, 'lock': True},
+                {'team': self.teams[2].id, 'scores': {key: 99}},
+                {'team': 123456, 'scores': {key: 1}},
+            ])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['saved_count'], 2)
+        self.assertEqual([e['index'] for e in response.data['errors']], [2, 3])
+        bump.assert_called_once_with(self.event.id)
+
+        self.existing.refresh_from_db()
+        self.assertEqual((self.existing.scores, self.existing.global_comments), ({key: 10}, "keep me"))
+        self.assertEqual(self.existing.weighted_total, 20.0)
+        created = TeamScore.objects.get(team=self.teams[1])
+        self.assertTrue(created.locked)
+        self.assertIsNotNone(created.submitted_at)
+        self.assertEqual(self.teams[1].result.total_score, 30.0)
+        self.assertEqual(self.teams[1].result.locked_count, 1)
+
+    def test_locked_scores_are_not_overwritten(self):
+        self.existing.locked = True
+        self.existing.save()
+        response = self.post([{'team': self.teams[0].id, 'scores': {str(self.criterion.id): 20}}])
+
+        self.assertEqual(response.data['saved_count'], 0)
+        self.assertEqual(response.data['errors'][0]['details'], ["Cannot modify locked scores"])
+
+    def test_query_count_does_not_grow_with_entries(self):
+        def count(entries):
+            TeamScore.objects.exclude(pk=self.existing.pk).delete()
+            with CaptureQueriesContext(connection) as queries:
+                self.post(entries)
+            return len(queries)
+
+        key = str(self.criterion.id)
+        # Both lock: locks also move the live queue, once per batch (the
+        # first one creates the event's queue state)
+        count([{'team': self.teams[1].id, 'scores': {key: 1}, 'lock': True}])
+        one = count([{'team': self.teams[1].id, 'scores': {key: 1}, 'lock': True}])
+        three = count([{'team': team.id, 'scores': {key: 1}, 'lock': True} for team in self.teams[1:]])
+        self.assertEqual(one, three)
+
+    def test_juries_only_score_their_own_event(self):
+        other = Event.objects.create(name="Other Batch Event", date=timezone.now())
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/team-scores/batch/', {
+                'event': other.id, 'entries': [{'team': self.teams[1].id, 'scores': {str(self.criterion.id): 5}}]
+            }, format='json')
+        self.assertEqual(response.data['saved_count'], 1)
+        self.assertFalse(TeamScore.objects.filter(event=other).exists())
+
+        response = self.client.post('/api/team-scores/batch/', {
+            'event': 'abc', 'entries': [{'team': self.teams[1].id, 'scores': {}}]
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_scores_locked_meanwhile_are_not_overwritten(self):
+        # The score gets locked (from another device) while the batch is
+        # being prepared: the batch must see it locked
+        def lock_elsewhere(event_id):
+            TeamScore.objects.filter(pk=self.existing.pk).update(locked=True)
+            return get_criteria_weights(event_id)
+
+        with mock.patch('jury_api.scoring.get_criteria_weights', side_effect=lock_elsewhere):
+            response = self.post([{'team': self.teams[0].id, 'scores': {str(self.criterion.id): 20}}])
+
+        self.assertEqual(response.data['saved_count'], 0)
+        self.assertEqual(response.data['errors'][0]['details'], ["Cannot modify locked scores"])
+        self.existing.refresh_from_db()
+        self.assertEqual((self.existing.locked, self.existing.scores), (True, {str(self.criterion.id): 1}))
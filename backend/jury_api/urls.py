@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import views, streams
 
 router = DefaultRouter()
 router.register(r'events', views.EventViewSet)
@@ -16,7 +16,9 @@ urlpatterns = [
     path('auth/logout/', views.logout_view, name='logout'),
     path('auth/team-login/', views.team_login_view, name='team-login'),
     path('ping/', views.ping_view, name='ping'),
+    path('events/<int:event_id>/stream/', streams.event_stream_view, name='event-stream'),
     path('results/', views.results_view, name='results'),
+    path('results/export/', views.results_export_view, name='results-export'),
     path('check-completion/', views.check_completion_view, name='check-completion'),
     path('jury-progress/<int:jury_id>/', views.jury_progress_view, name='jury-progress'),
 ]
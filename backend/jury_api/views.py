@@ -1,18 +1,42 @@
+import os
+
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
-from rest_framework.authtoken.models import Token
 from django.contrib.auth import authenticate
+from django.http import StreamingHttpResponse
+from django.db import IntegrityError
 from django.db.models import Sum, Q
+from django.db.models.functions import Coalesce
 from django.utils import timezone
-from django.core.cache import cache
-from .models import User, Criterion, Team, TeamScore, Event, Message
+from .models import User, Criterion, Team, TeamScore, TeamResult, Event, Message
 from .serializers import (
     UserSerializer, LoginSerializer, CriterionSerializer,
     TeamSerializer, TeamScoreSerializer, TeamResultSerializer,
-    EventSerializer, MessageSerializer
+    EventSerializer, MessageSerializer, BroadcastSerializer, ProvisionUsersSerializer
+)
+from .audit import changed_fields, log_action
+from .authentication import invalidate_user_tokens, issue_token
+from .team_auth import check_team_password, find_team, first_login, team_user
+from .provisioning import ProvisioningError, provision_users
+from .scheduling import ScheduleError, clear_schedule, schedule_event
+from .live_queue import (
+    DEFAULT_UPCOMING, MAX_UPCOMING, advance_queue, get_queue_state, queue_snapshot, recount_juries, scores_changed
+)
+from .scoring import submit_score_batch
+from .pubsub import publish_to_event, publish_new_message
+from .inbox import mark_read, unread_count
+from .messaging import broadcast_message, resolve_recipients
+from .conversations import (
+    CONVERSATION_PAGE_SIZE, InvalidCursor, conversation_messages, conversation_page,
+    conversation_summaries, encode_cursor
+)
+from .imports import import_teams, start_team_import, get_import_job, ImportFileError
+from .exports import (
+    CSV_BATCH_SIZE, FILE_BATCH_SIZE, iter_file, iter_results_csv, streaming_body, write_results_xlsx
 )
-from .utils import log_action
+from .caching import get_or_compute_results, get_results_version, invalidate_results
+from .conditional import ConditionalGetMixin, data_etag, not_modified, request_event_id
 
 
 class IsAdmin(permissions.BasePermission):
@@ -40,7 +64,7 @@ def login_view(request):
             password=serializer.validated_data['password']
         )
         if user:
-            token, _ = Token.objects.get_or_create(user=user)
+            token = issue_token(user)
             return Response({
                 'token': token.key,
                 'user': UserSerializer(user).data
@@ -53,6 +77,7 @@ def login_view(request):
 @permission_classes([permissions.AllowAny])
 def logout_view(request):
     if request.user.is_authenticated:
+        invalidate_user_tokens(request.user.id)
         try:
             request.user.auth_token.delete()
         except:
@@ -74,51 +99,27 @@ def team_login_view(request):
         return Response({'error': 'Email is required'}, status=status.HTTP_400_BAD_REQUEST)
     
     try:
-        # Find the team by email
-        from .models import Team
-        team = Team.objects.filter(generated_email=email).first()
+        # Find the team by email (with its linked user, if any)
+        team = find_team(email)
         
         if not team:
             return Response({'error': 'Team not found'}, status=status.HTTP_404_NOT_FOUND)
         
         # First login - no password provided AND team has no password
         if not password and not team.password:
-            import random
-            import string
-            new_password = ''.join(random.choices(string.ascii_letters + string.digits, k=8))
-            team.password = new_password
-            team.has_logged_in = True
-            team.save()
             return Response({
                 'success': True,
                 'isFirstLogin': True,
-                'generatedPassword': new_password
+                'generatedPassword': first_login(team)
             })
         
         # Verify password
-        if not password or team.password != password:
+        if not password or not check_team_password(team, password):
             return Response({'error': 'Invalid password'}, status=status.HTTP_401_UNAUTHORIZED)
         
-        # Create or get User object for the team
-        user, created = User.objects.get_or_create(
-            username=team.generated_email or team.email,
-            defaults={
-                'role': 'team',
-                'email': team.email or team.generated_email,
-                'first_name': team.name,
-                'event': team.event
-            }
-        )
-        
-        # If user already exists, update their info
-        if not created:
-            user.role = 'team'
-            user.event = team.event
-            user.first_name = team.name
-            user.save()
-        
-        # Get or create auth token
-        token, _ = Token.objects.get_or_create(user=user)
+        # Linked on the first login; later logins only read
+        user = team_user(team)
+        token = issue_token(user)
         
         return Response({
             'success': True,
@@ -137,37 +138,56 @@ class EventViewSet(viewsets.ModelViewSet):
     serializer_class = EventSerializer
 
     def get_queryset(self):
-        queryset = super().get_queryset()
-        self._update_event_statuses(queryset)
-        return queryset
-
-    def _update_event_statuses(self, queryset):
-        now = timezone.now().date()
-        for event in queryset:
-            if event.status == 'completed':
-                continue
-            
-            event_date = event.date.date()
-            new_status = event.status
-            
-            if event_date < now:
-                new_status = 'completed'
-            elif event_date == now:
-                new_status = 'ongoing'
-            else:
-                new_status = 'upcoming'
-            
-            if new_status != event.status:
-                event.status = new_status
-                event.save(update_fields=['status'])
+        # Status is derived at query time; see the update_event_statuses command
+        return super().get_queryset().with_current_status()
 
     def get_permissions(self):
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'queue']:
             permission_classes = [permissions.AllowAny]
         else:
             permission_classes = [IsAdmin]
         return [permission() for permission in permission_classes]
 
+    @action(detail=True, methods=['get'])
+    def queue(self, request, pk=None):
+        """Slot on stage, the next teams and their jury completion; cheap to poll (ETag)"""
+        state = get_queue_state(pk)
+        if state is None:
+            return Response({'error': 'Event not found'}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            upcoming = min(int(request.query_params.get('upcoming', DEFAULT_UPCOMING)), MAX_UPCOMING)
+        except ValueError:
+            return Response({'error': 'upcoming must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+        etag = data_etag(request, ('teams',), pk, [state.version])
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+        response = Response(queue_snapshot(state, max(upcoming, 0)))
+        response['ETag'] = etag
+        return response
+
+    @action(detail=True, methods=['post'], url_path='queue/advance')
+    def queue_advance(self, request, pk=None):
+        """Move the queue: {"direction": "next"|"previous"} or {"passage_order": n}"""
+        if get_queue_state(pk) is None:
+            return Response({'error': 'Event not found'}, status=status.HTTP_404_NOT_FOUND)
+        passage_order = request.data.get('passage_order')
+        direction = request.data.get('direction', 'next')
+        if passage_order not in (None, ''):
+            try:
+                passage_order = int(passage_order)
+            except (TypeError, ValueError):
+                return Response({'error': 'passage_order must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            passage_order = None
+            if direction not in ('next', 'previous'):
+                return Response({'error': 'direction must be next or previous'}, status=status.HTTP_400_BAD_REQUEST)
+
+        state = advance_queue(pk, direction, passage_order)
+        log_action(request.user, "ADVANCE_QUEUE", "Event", pk, {"current_order": state.current_order})
+        return Response(queue_snapshot(state))
+
 
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
@@ -189,10 +209,48 @@ class UserViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(event_id=event_id)
         return queryset
 
+    @action(detail=False, methods=['post'])
+    def provision(self, request):
+        """Create the accounts of an event in one go; returns their generated passwords"""
+        serializer = ProvisionUsersSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        try:
+            users, passwords = provision_users(data['event'], data['role'], data['accounts'], data.get('track'))
+        except ProvisioningError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except IntegrityError:
+            return Response({'error': 'Username already exists'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # bulk_create sends no signals: the new juries' result columns and queue count
+        invalidate_results(data['event'].id)
+        recount_juries(data['event'].id)
+        log_action(request.user, "PROVISION", "User", None, {
+            'event': data['event'].id, 'role': data['role'], 'usernames': [user.username for user in users]
+        })
+        return Response({
+            'count': len(users),
+            'users': [
+                {**UserSerializer(user).data, 'password': password}
+                for user, password in zip(users, passwords)
+            ]
+        }, status=status.HTTP_201_CREATED)
+
+    def perform_update(self, serializer):
+        instance = serializer.save()
+        # Cached authentications carry the old role/password/active flag
+        invalidate_user_tokens(instance.id)
+
+    def perform_destroy(self, instance):
+        user_id = instance.id
+        instance.delete()
+        invalidate_user_tokens(user_id)
 
-class CriterionViewSet(viewsets.ModelViewSet):
+
+class CriterionViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Criterion.objects.all()
     serializer_class = CriterionSerializer
+    etag_scopes = ('criteria',)
     
     def get_permissions(self):
         if self.action in ['list', 'retrieve']:
@@ -209,8 +267,7 @@ class CriterionViewSet(viewsets.ModelViewSet):
         return queryset
 
     def clear_results_cache(self, event_id):
-        if event_id:
-            cache.delete(f'results_{event_id}')
+        invalidate_results(event_id)
 
     def perform_create(self, serializer):
         instance = serializer.save()
@@ -218,9 +275,10 @@ class CriterionViewSet(viewsets.ModelViewSet):
         log_action(self.request.user, "CREATE", "Criterion", instance.id, serializer.data)
 
     def perform_update(self, serializer):
+        changes = changed_fields(serializer.instance, serializer.validated_data)
         instance = serializer.save()
         self.clear_results_cache(instance.event_id)
-        log_action(self.request.user, "UPDATE", "Criterion", instance.id, serializer.data)
+        log_action(self.request.user, "UPDATE", "Criterion", instance.id, changes)
 
     def perform_destroy(self, instance):
         id = instance.id
@@ -231,46 +289,129 @@ class CriterionViewSet(viewsets.ModelViewSet):
         log_action(self.request.user, "DELETE", "Criterion", id, {"name": name})
 
 
-class TeamViewSet(viewsets.ModelViewSet):
+class TeamViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Team.objects.all()
     serializer_class = TeamSerializer
+    etag_scopes = ('teams',)
     
     def get_permissions(self):
-        if self.action in ['list', 'retrieve', 'partial_update']:
+        if self.action in ['list', 'retrieve']:
             return [permissions.AllowAny()]
         else:
             permission_classes = [IsAdmin]
             return [permission() for permission in permission_classes]
+
+    def perform_update(self, serializer):
+        changes = changed_fields(serializer.instance, serializer.validated_data)
+        instance = serializer.save()
+        log_action(self.request.user, "UPDATE", "Team", instance.id, changes)
+        if {'passage_order', 'passage_time'} & set(serializer.validated_data):
+            publish_to_event(instance.event_id, 'passage_order', {
+                'team_id': instance.id,
+                'passage_order': instance.passage_order,
+                'passage_time': instance.passage_time
+            })
+
+    def perform_destroy(self, instance):
+        team_id = instance.id
+        name = instance.name
+        instance.delete()
+        log_action(self.request.user, "DELETE", "Team", team_id, {"name": name})
         
     @action(detail=False, methods=['post'], permission_classes=[IsAdmin])
     def bulk_create(self, request):
         teams_data = request.data.get('teams', [])
         event_id = request.data.get('event_id')
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true')
         
         if not event_id:
             return Response({'error': 'event_id is required'}, status=status.HTTP_400_BAD_REQUEST)
+        event = Event.objects.filter(id=event_id).first()
+        if not event:
+            return Response({'error': 'Event not found'}, status=status.HTTP_404_NOT_FOUND)
+        if not isinstance(teams_data, list):
+            return Response({'error': 'teams must be a list'}, status=status.HTTP_400_BAD_REQUEST)
             
-        created_teams = []
-        errors = []
-        for index, team_data in enumerate(teams_data):
-            team_data['event'] = event_id
-            serializer = self.get_serializer(data=team_data)
-            if serializer.is_valid():
-                serializer.save()
-                created_teams.append(serializer.data)
-            else:
-                errors.append({
-                    'index': index,
-                    'name': team_data.get('name', 'Unknown'),
-                    'details': serializer.errors
-                })
-                
-        return Response({
-            'created_count': len(created_teams),
-            'teams': created_teams,
-            'errors_count': len(errors),
-            'errors': errors if errors else None
-        }, status=status.HTTP_201_CREATED)
+        report = import_teams(event, teams_data, dry_run=dry_run)
+        return Response(report, status=status.HTTP_200_OK if dry_run else status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post', 'delete'], permission_classes=[IsAdmin])
+    def schedule(self, request):
+        """
+        POST: draw the passage order of an event's teams (seeded shuffle per
+        track, time slots with breaks and parallel rooms) and save it.
+        DELETE: clear it.
+        """
+        event_id = request.data.get('event_id') or request.query_params.get('event_id')
+        if not event_id:
+            return Response({'error': 'event_id is required'}, status=status.HTTP_400_BAD_REQUEST)
+        event = Event.objects.filter(id=event_id).first()
+        if not event:
+            return Response({'error': 'Event not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        if request.method == 'DELETE':
+            cleared = clear_schedule(event)
+            log_action(request.user, "CLEAR_SCHEDULE", "Event", event.id, {"teams": cleared})
+            publish_to_event(event.id, 'passage_order', {'cleared': True})
+            return Response({'cleared': cleared})
+
+        try:
+            seed = request.data.get('seed')
+            seed = int(seed) if seed not in (None, '') else None
+            duration = request.data.get('duration')
+            duration = int(duration) if duration not in (None, '') else None
+            rooms = request.data.get('rooms')
+            rooms = int(rooms) if rooms not in (None, '') else 1
+        except (TypeError, ValueError):
+            return Response({'error': 'seed, duration and rooms must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true')
+
+        try:
+            report = schedule_event(
+                event, seed=seed, start_time=request.data.get('start_time'), duration=duration,
+                rooms=rooms, breaks=request.data.get('breaks'), dry_run=dry_run
+            )
+        except ScheduleError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not dry_run:
+            log_action(request.user, "SCHEDULE", "Event", event.id, {
+                "seed": report['seed'], "rooms": rooms, "teams": len(report['passages'])
+            })
+            publish_to_event(event.id, 'passage_order', {'seed': report['seed']})
+        return Response(report)
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAdmin], url_path='import')
+    def import_file(self, request):
+        """Upload a CSV/XLSX file; it is imported in the background (poll import_status)"""
+        uploaded_file = request.FILES.get('file')
+        event_id = request.data.get('event_id')
+        
+        if not uploaded_file or not event_id:
+            return Response({'error': 'file and event_id are required'}, status=status.HTTP_400_BAD_REQUEST)
+        event = Event.objects.filter(id=event_id).first()
+        if not event:
+            return Response({'error': 'Event not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        options = {
+            key: request.data.get(key) or None
+            for key in ['name_column', 'description_column', 'email_column', 'track_column']
+        }
+        options['generate_emails'] = str(request.data.get('generate_emails', 'true')).lower() in ('1', 'true')
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true')
+        
+        try:
+            job_id = start_team_import(event, uploaded_file, options, dry_run=dry_run)
+        except ImportFileError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(get_import_job(job_id), status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAdmin], url_path='import/(?P<job_id>[0-9a-f]+)')
+    def import_status(self, request, job_id=None):
+        job = get_import_job(job_id)
+        if not job:
+            return Response({'error': 'Import not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(job)
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -285,9 +426,11 @@ class TeamViewSet(viewsets.ModelViewSet):
         return queryset
 
 
-class TeamScoreViewSet(viewsets.ModelViewSet):
+class TeamScoreViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = TeamScore.objects.all()
     serializer_class = TeamScoreSerializer
+    # Totals depend on the criteria weights, team names are embedded
+    etag_scopes = ('scores', 'criteria', 'teams')
     
     def get_permissions(self):
         if self.action in ['list', 'retrieve']:
@@ -297,7 +440,7 @@ class TeamScoreViewSet(viewsets.ModelViewSet):
         return [permission() for permission in permission_classes]
     
     def get_queryset(self):
-        queryset = super().get_queryset()
+        queryset = super().get_queryset().select_related('jury', 'team')
         jury_id = self.request.query_params.get('jury_id')
         team_id = self.request.query_params.get('team_id')
         event_id = self.request.query_params.get('event_id')
@@ -315,20 +458,23 @@ class TeamScoreViewSet(viewsets.ModelViewSet):
         return queryset
     
     def clear_results_cache(self, event_id):
-        if event_id:
-            cache.delete(f'results_{event_id}')
+        invalidate_results(event_id)
 
     def perform_create(self, serializer):
-        instance = serializer.save()
-        self.clear_results_cache(instance.event_id)
         if self.request.user.role == 'jury':
-            serializer.save(jury=self.request.user)
+            instance = serializer.save(jury=self.request.user)
         else:
-            serializer.save()
+            instance = serializer.save()
+        self.clear_results_cache(instance.event_id)
+        log_action(self.request.user, "CREATE", "TeamScore", instance.id, {
+            "team": instance.team_id, "jury": instance.jury_id, "scores": instance.scores
+        })
     
     def perform_update(self, serializer):
+        changes = changed_fields(serializer.instance, serializer.validated_data)
         instance = serializer.save()
         self.clear_results_cache(instance.event_id)
+        log_action(self.request.user, "UPDATE", "TeamScore", instance.id, changes)
 
     def update(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -339,6 +485,50 @@ class TeamScoreViewSet(viewsets.ModelViewSet):
             )
         return super().update(request, *args, **kwargs)
     
+    @action(detail=False, methods=['post'], permission_classes=[IsJury | IsAdmin])
+    def batch(self, request):
+        """Save (and optionally lock) many scores of one jury in one request"""
+        entries = request.data.get('entries')
+        if not isinstance(entries, list) or not entries:
+            return Response({'error': 'entries must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            jury_id = int(request.data['jury']) if request.data.get('jury') not in (None, '') else None
+            event_id = int(request.data['event']) if request.data.get('event') not in (None, '') else None
+        except (TypeError, ValueError):
+            return Response({'error': 'jury and event must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if request.user.role == 'jury':
+            jury = request.user
+            # A jury only ever scores its own event
+            event_id = jury.event_id
+        else:
+            jury = User.objects.filter(id=jury_id, role='jury').first()
+            if not jury:
+                return Response({'error': 'jury is required'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        event = Event.objects.filter(id=event_id or jury.event_id).first()
+        if not event:
+            return Response({'error': 'Event not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        saved, errors = submit_score_batch(jury, event, entries)
+        if saved:
+            self.clear_results_cache(event.id)
+            locked = [score.team_id for score in saved if score.locked]
+            if locked:
+                publish_to_event(event.id, 'score_locked', {'jury_id': jury.id, 'team_ids': locked})
+                scores_changed(event.id, locked)
+            log_action(request.user, "BATCH_SAVE", "TeamScore", None, {
+                "jury": jury.username, "saved": len(saved), "locked_teams": locked
+            })
+        
+        return Response({
+            'saved_count': len(saved),
+            'scores': self.get_serializer(saved, many=True).data,
+            'errors_count': len(errors),
+            'errors': errors if errors else None
+        })
+
     @action(detail=True, methods=['post'])
     def lock(self, request, pk=None):
         """Lock the score permanently"""
@@ -351,6 +541,10 @@ class TeamScoreViewSet(viewsets.ModelViewSet):
         team_score.save()
         
         self.clear_results_cache(team_score.event_id)
+        publish_to_event(team_score.event_id, 'score_locked', {
+            'jury_id': team_score.jury_id, 'team_ids': [team_score.team_id]
+        })
+        scores_changed(team_score.event_id, [team_score.team_id])
         
         log_action(request.user, "LOCK", "TeamScore", team_score.id, {"team": team_score.team.name})
         
@@ -373,6 +567,8 @@ class TeamScoreViewSet(viewsets.ModelViewSet):
         team_score.save()
         
         self.clear_results_cache(team_score.event_id)
+        if old_data["locked"]:
+            scores_changed(team_score.event_id, [team_score.team_id])
         
         log_action(request.user, "RESET", "TeamScore", team_score.id, old_data)
         
@@ -388,52 +584,54 @@ def results_view(request):
     if not event_id:
         return Response({'error': 'event_id parameter is required'}, status=status.HTTP_400_BAD_REQUEST)
         
-    cache_key = f'results_{event_id}'
-    cached_data = cache.get(cache_key)
-    if cached_data:
-        return Response(cached_data)
+    etag = data_etag(request, ('teams', 'criteria'), event_id, [get_results_version(event_id)])
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
 
-    teams = Team.objects.filter(event_id=event_id)
-    juries = User.objects.filter(role='jury', event_id=event_id)
-    criteria = Criterion.objects.filter(event_id=event_id)
-    
-    results = []
-    for team in teams:
-        team_result = {
-            'team_id': team.id,
-            'team_name': team.name,
-            'total_score': 0,
-            'jury_scores': []
-        }
-        
-        for jury in juries:
-            try:
-                team_score = TeamScore.objects.get(jury=jury, team=team, event_id=event_id)
-                scores_dict = team_score.scores
-                jury_total = sum(scores_dict.values())
-                
-                team_result['jury_scores'].append({
-                    'jury_id': jury.id,
-                    'jury_name': jury.username,
-                    'scores': scores_dict,
-                    'total': jury_total
-                })
-                team_result['total_score'] += jury_total
-            except TeamScore.DoesNotExist:
-                team_result['jury_scores'].append({
-                    'jury_id': jury.id,
-                    'jury_name': jury.username,
-                    'scores': {},
-                    'total': 0
-                })
-        
-        results.append(team_result)
-    
-    # Sort by total score descending
-    results.sort(key=lambda x: x['total_score'], reverse=True)
-    
-    cache.set(cache_key, results, 300) # Cache for 5 minutes
-    return Response(results)
+    results, is_stale = get_or_compute_results(event_id)
+    response = Response(results)
+    if is_stale:
+        response['X-Results-Stale'] = 'true'
+    else:
+        response['ETag'] = etag
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([IsAdmin])
+def results_export_view(request):
+    """Stream the detailed results of an event as CSV (default) or XLSX"""
+    event_id = request.query_params.get('event_id')
+    export_format = request.query_params.get('file_format', 'csv')
+    if not event_id:
+        return Response({'error': 'event_id parameter is required'}, status=status.HTTP_400_BAD_REQUEST)
+    if not Event.objects.filter(id=event_id).exists():
+        return Response({'error': 'Event not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    filename = f'resultats_event_{event_id}'
+    if export_format == 'xlsx':
+        try:
+            handle = write_results_xlsx(event_id)
+        except ImportError:
+            return Response({'error': 'XLSX export requires the openpyxl package'}, status=status.HTTP_400_BAD_REQUEST)
+        size = os.fstat(handle.fileno()).st_size
+        response = StreamingHttpResponse(
+            streaming_body(request._request, iter_file(handle), FILE_BATCH_SIZE),
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        )
+        response['Content-Length'] = size
+        response['Content-Disposition'] = f'attachment; filename="{filename}.xlsx"'
+        return response
+    if export_format != 'csv':
+        return Response({'error': 'file_format must be csv or xlsx'}, status=status.HTTP_400_BAD_REQUEST)
+
+    response = StreamingHttpResponse(
+        streaming_body(request._request, iter_results_csv(event_id), CSV_BATCH_SIZE),
+        content_type='text/csv; charset=utf-8'
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
 
 
 @api_view(['GET'])
@@ -457,7 +655,10 @@ def check_completion_view(request):
         })
     
     required_scores = teams_count * juries_count
-    completed_scores = TeamScore.objects.filter(locked=True, event_id=event_id).count()
+    # The rollups only count the current juries' scores
+    completed_scores = TeamResult.objects.filter(event_id=event_id).aggregate(
+        locked=Coalesce(Sum('locked_count'), 0)
+    )['locked']
     
     return Response({
         'all_complete': completed_scores == required_scores,
@@ -498,17 +699,23 @@ def ping_view(request):
     return Response({'status': 'ok', 'timestamp': timezone.now()})
 
 
-class MessageViewSet(viewsets.ModelViewSet):
+class MessageViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = MessageSerializer
     permission_classes = [permissions.AllowAny]
+    etag_scopes = ('messages',)
 
     def get_queryset(self):
         user = self.request.user
         if not user or not user.is_authenticated:
             return Message.objects.none()
+        queryset = Message.objects.select_related('sender', 'recipient', 'broadcast')
+        # Same scope as the ETag, which follows the event's messages stamp
+        event_id = request_event_id(self.request)
+        if event_id:
+            queryset = queryset.filter(event_id=event_id)
         if user.role == 'admin':
-            return Message.objects.all()
-        return Message.objects.filter(Q(sender=user) | Q(recipient=user))
+            return queryset
+        return queryset.filter(Q(sender=user) | Q(recipient=user))
 
     def perform_create(self, serializer):
         sender = self.request.user
@@ -525,25 +732,19 @@ class MessageViewSet(viewsets.ModelViewSet):
                     from rest_framework.exceptions import ValidationError
                     raise ValidationError("You can only send messages to Staff (Admins).")
             # If recipient is None, it's valid (to Staff)
-            serializer.save(sender=sender)
+            publish_new_message(serializer.save(sender=sender))
             
         elif sender.role == 'admin':
             if recipients:
-                # Create a message for each recipient
-                for recipient_id in recipients:
-                    try:
-                        user = User.objects.get(id=recipient_id)
-                        Message.objects.create(
-                            sender=sender,
-                            recipient=user,
-                            event=serializer.validated_data.get('event'),
-                            content=serializer.validated_data.get('content')
-                        )
-                    except User.DoesNotExist:
-                        continue # Skip invalid users
+                # One query for the recipients, one INSERT for the messages (invalid ids are skipped)
+                users, _ = resolve_recipients(ids=recipients)
+                broadcast_message(
+                    sender, serializer.validated_data.get('event'),
+                    serializer.validated_data.get('content'), users
+                )
             else:
                 # Single message
-                serializer.save(sender=sender)
+                publish_new_message(serializer.save(sender=sender))
 
     def destroy(self, request, *args, **kwargs):
         message = self.get_object()
@@ -552,7 +753,11 @@ class MessageViewSet(viewsets.ModelViewSet):
         # Admin can delete any message
         # Others can only delete messages they sent
         if user.role == 'admin' or message.sender == user:
-            return super().destroy(request, *args, **kwargs)
+            response = super().destroy(request, *args, **kwargs)
+            log_action(user, "DELETE", "Message", message.id, {
+                "sender": message.sender_id, "recipient": message.recipient_id, "event": message.event_id
+            })
+            return response
         
         from rest_framework import exceptions
         raise exceptions.PermissionDenied("You can only delete your own messages.")
@@ -570,9 +775,100 @@ class MessageViewSet(viewsets.ModelViewSet):
         if sender_id:
             queryset = queryset.filter(sender_id=sender_id)
             
-        count = queryset.update(is_read=True)
+        count = mark_read(queryset)
         return Response({'marked_as_read': count}, status=status.HTTP_200_OK)
 
+    @action(detail=False, methods=['post'], permission_classes=[IsAdmin])
+    def broadcast(self, request):
+        """Send one message to a selection of users (ids, or role/track within the event)"""
+        serializer = BroadcastSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        event = data['event']
+
+        users, skipped = resolve_recipients(
+            ids=data.get('recipients'),
+            role=data.get('role'),
+            event_id=None if 'recipients' in data else event.id,
+            track=data.get('track'),
+        )
+        if not users:
+            return Response({'error': 'No recipient matches this selection', 'skipped': skipped},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        broadcast, messages = broadcast_message(request.user, event, data['content'], users)
+        return Response({
+            'sent_count': len(messages),
+            'skipped': skipped,
+            'broadcast_id': broadcast.id if broadcast else None
+        }, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
+    def conversations(self, request):
+        """Conversations of the current user in an event: last message and unread count of each"""
+        event_id = request.query_params.get('event_id')
+        if not event_id or not event_id.isdigit():
+            return Response({'error': 'event_id parameter is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        data = []
+        for message in conversation_summaries(request.user, event_id):
+            if message.counterpart is None:
+                username = 'Staff'
+            elif message.counterpart == message.sender_id:
+                username = message.sender.username
+            else:
+                username = message.recipient.username
+            data.append({
+                'counterpart': message.counterpart,
+                'counterpart_username': username,
+                'unread_count': message.unread_count,
+                'last_message': MessageSerializer(message).data,
+            })
+        return Response(data)
+
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated],
+            url_path=r'conversations/(?P<counterpart>staff|\d+)')
+    def conversation(self, request, counterpart=None):
+        """
+        One conversation, oldest first, cut with keyset cursors: pass ``before``
+        to load older messages or ``after`` to fetch only the new ones.
+        """
+        event_id = request.query_params.get('event_id')
+        if not event_id or not event_id.isdigit():
+            return Response({'error': 'event_id parameter is required'}, status=status.HTTP_400_BAD_REQUEST)
+        counterpart_id = None if counterpart == 'staff' else int(counterpart)
+        if request.user.role != 'admin' and counterpart_id is not None:
+            return Response({'error': 'Conversation not found'}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            limit = int(request.query_params.get('limit', CONVERSATION_PAGE_SIZE))
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+        before = request.query_params.get('before')
+        after = request.query_params.get('after')
+        try:
+            page, has_more = conversation_page(
+                conversation_messages(request.user, event_id, counterpart_id),
+                before=before, after=after, limit=limit
+            )
+        except InvalidCursor as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'results': MessageSerializer(page, many=True).data,
+            'has_more': has_more,
+            'before': encode_cursor(page[0]) if page else before,
+            'after': encode_cursor(page[-1]) if page else after,
+        })
+
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated], url_path='unread-count')
+    def unread_count(self, request):
+        """Unread messages of the current user (plus the Staff inbox for admins, optionally of one event)"""
+        event_id = request.query_params.get('event_id')
+        if event_id and not event_id.isdigit():
+            return Response({'error': 'event_id must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'unread_count': unread_count(request.user, event_id)})
+
     @action(detail=False, methods=['delete'], url_path='clear-conversation/(?P<user_id>[^/.]+)')
     def clear_conversation(self, request, user_id=None):
         if request.user.role != 'admin':
@@ -585,5 +881,6 @@ class MessageViewSet(viewsets.ModelViewSet):
         )
         count = messages.count()
         messages.delete()
+        log_action(request.user, "CLEAR_CONVERSATION", "User", user_id, {"deleted": count})
         
         return Response({'message': f'Deleted {count} messages.', 'count': count}, status=status.HTTP_200_OK)
@@ -1,7 +1,7 @@
 import { createContext, useContext, useState, useEffect } from 'react';
 import type { ReactNode } from 'react';
 import type { User, Team, Criterion, TeamScore, Event } from '../types';
-import { eventApi, userApi, teamApi, criteriaApi, scoreApi, messageApi } from '../services/api';
+import { eventApi, userApi, teamApi, criteriaApi, scoreApi, messageApi, liveApi } from '../services/api';
 
 interface DataContextType {
     events: Event[];
@@ -129,30 +129,11 @@ export const DataProvider = ({ children }: DataProviderProps) => {
     }, [currentEventId]);
 
     const fetchUnreadCount = async () => {
+        // Nothing to count before login
+        if (!sessionStorage.getItem('auth_token')) return;
         try {
-            const response = await messageApi.list();
-            const messages = Array.isArray(response.data) ? response.data : (response.data.results || []);
-            // Get current user from session since auth context is separate
-            const userStr = sessionStorage.getItem('current_user');
-            if (userStr) {
-                const user = JSON.parse(userStr);
-                const unreadMessages = messages.filter((m: any) => {
-                    const isDirectlyForMe = Number(m.recipient) === Number(user.id);
-                    const isForStaff = user.role === 'admin' && m.recipient === null;
-                    return (isDirectlyForMe || isForStaff) && !m.is_read;
-                });
-
-                const count = unreadMessages.length;
-
-                if (count > 0) {
-                    console.log('[Unread Debug] Unread messages:', unreadMessages);
-                }
-
-                if (count !== unreadMessagesCount) {
-                    console.log(`[UnreadCount] Updating count to ${count} for user ${user.username} (Role: ${user.role})`);
-                }
-                setUnreadMessagesCount(count);
-            }
+            const response = await messageApi.unreadCount();
+            setUnreadMessagesCount(response.data.unread_count);
         } catch (error) {
             console.error('Failed to fetch unread count:', error);
         }
@@ -160,7 +141,8 @@ export const DataProvider = ({ children }: DataProviderProps) => {
 
     useEffect(() => {
         fetchUnreadCount();
-        const interval = setInterval(fetchUnreadCount, 15000); // Check every 15s
+        // Slow fallback poll; new messages are pushed by the event stream
+        const interval = setInterval(fetchUnreadCount, 120000);
         return () => clearInterval(interval);
     }, []);
 
@@ -199,6 +181,15 @@ export const DataProvider = ({ children }: DataProviderProps) => {
         }
     };
 
+    useEffect(() => {
+        if (!currentEventId) return;
+        const stream = liveApi.openEventStream(currentEventId);
+        stream.addEventListener('message', () => fetchUnreadCount());
+        stream.addEventListener('score_locked', () => refresh());
+        stream.addEventListener('passage_order', () => refresh());
+        return () => stream.close();
+    }, [currentEventId]);
+
     const setCurrentEventId = (id: string | null) => {
         setCurrentEventIdState(id);
         if (id) {
@@ -1,3 +1,4 @@
+import { useEffect, useState } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { useAuth } from '../../contexts/AuthContext';
 import { useData } from '../../contexts/DataContext';
@@ -5,11 +6,14 @@ import { DashboardLayout } from '../../components/layouts/DashboardLayout';
 import { Card } from '../../components/ui/Card';
 import { Button } from '../../components/ui/Button';
 import { Users, Clock, Play, CheckCircle } from 'lucide-react';
+import { liveApi, queueApi } from '../../services/api';
+import type { QueueSnapshot } from '../../services/api';
 
 export const LiveQueue = () => {
     const { user, logout } = useAuth();
     const navigate = useNavigate();
-    const { teams, users, teamScores, events, currentEventId } = useData();
+    const { teams, events, currentEventId } = useData();
+    const [queue, setQueue] = useState<QueueSnapshot | null>(null);
 
     const currentEvent = events.find(e => e.id === currentEventId);
 
@@ -18,24 +22,35 @@ export const LiveQueue = () => {
         navigate('/');
     };
 
-    const orderedTeams = [...teams].sort((a, b) => (a.passage_order || 999) - (b.passage_order || 999));
+    const fetchQueue = async () => {
+        if (!currentEventId) return;
+        const response = await queueApi.get(currentEventId);
+        setQueue(response.data);
+    };
+
+    useEffect(() => {
+        if (!currentEventId) return;
+        fetchQueue();
+        // The server moves the queue when every jury has locked the slot
+        const stream = liveApi.openEventStream(currentEventId);
+        stream.addEventListener('queue', () => fetchQueue());
+        stream.addEventListener('passage_order', () => fetchQueue());
+        return () => stream.close();
+    }, [currentEventId]);
 
-    // Find "current" team (first one with passage_order and not fully scored)
-    const currentTeam = orderedTeams.find(team => {
-        const scoredCount = teamScores.filter(ts => ts.team === team.id && ts.locked).length;
-        const juriesCount = users.filter(u => u.role === 'jury').length;
-        return team.passage_order && scoredCount < juriesCount;
-    });
+    const handleAdvance = async (direction: 'next' | 'previous') => {
+        if (!currentEventId) return;
+        const response = await queueApi.advance(currentEventId, { direction });
+        setQueue(response.data);
+    };
 
-    const nextTeams = orderedTeams.filter(team =>
-        team.passage_order &&
-        (!currentTeam || team.passage_order > (currentTeam.passage_order || 0))
-    ).slice(0, 5);
+    const currentTeam = queue?.current[0];
+    const nextTeams = queue?.next ?? [];
 
-    const completedTeams = orderedTeams.filter(team => {
-        const scoredCount = teamScores.filter(ts => ts.team === team.id && ts.locked).length;
-        const juriesCount = users.filter(u => u.role === 'jury').length;
-        return team.passage_order && scoredCount >= juriesCount;
+    // Every slot before the one on stage (all of them once the queue has moved past the last)
+    const completedTeams = teams.filter(team => {
+        if (!team.passage_order || !queue) return false;
+        return queue.current_order === null ? queue.version > 0 : team.passage_order < queue.current_order;
     }).sort((a, b) => (b.passage_order || 0) - (a.passage_order || 0));
 
     if (currentEvent && currentEvent.has_presentations === false) {
@@ -62,9 +77,17 @@ export const LiveQueue = () => {
                     <h1 className="text-3xl font-bold text-slate-900 tracking-tight">Live Queue</h1>
                     <p className="text-slate-500 mt-1 uppercase text-xs font-black tracking-widest">Suivi des passages en temps réel</p>
                 </div>
-                <Button variant="outline" onClick={() => navigate('/admin/event-dashboard')}>
-                    ← Dashboard
-                </Button>
+                <div className="flex gap-2">
+                    <Button variant="outline" onClick={() => handleAdvance('previous')}>
+                        Précédent
+                    </Button>
+                    <Button onClick={() => handleAdvance('next')}>
+                        Équipe suivante
+                    </Button>
+                    <Button variant="outline" onClick={() => navigate('/admin/event-dashboard')}>
+                        ← Dashboard
+                    </Button>
+                </div>
             </div>
 
             <div className="grid grid-cols-1 lg:grid-cols-3 gap-8">
@@ -92,7 +115,9 @@ export const LiveQueue = () => {
                                         </div>
                                     ))}
                                 </div>
-                                <span className="text-indigo-100 text-sm font-medium">L'équipe est en cours d'évaluation...</span>
+                                <span className="text-indigo-100 text-sm font-medium">
+                                    L'équipe est en cours d'évaluation... ({currentTeam.locked_count}/{queue?.jury_count} jurys)
+                                </span>
                             </div>
                         </Card>
                     ) : (
@@ -9,8 +9,8 @@ import { Card } from '../../components/ui/Card';
 import { Input } from '../../components/ui/Input';
 import { Modal } from '../../components/ui/Modal';
 import { ImportExcelModal } from '../../components/ImportExcelModal';
-import { assignPassageOrder, clearPassageOrder } from '../../utils/randomizer';
 import { exportTeamsToExcel } from '../../utils/excelExport';
+import { teamApi } from '../../services/api';
 
 const generatePlatformEmail = (baseEmail: string, teamName: string): string => {
     if (!baseEmail || !baseEmail.includes('@')) return '';
@@ -90,28 +90,14 @@ export const ManageTeams = () => {
 
     const handleRandomize = async () => {
         if (!currentEventId) return;
-        const currentEvent = (events as any[]).find(e => e.id === currentEventId);
-        const startTime = currentEvent?.presentation_start_time || '08:00';
-        const duration = currentEvent?.presentation_duration || 15;
-
-        const ordered = assignPassageOrder(teams, startTime, duration);
-        for (const team of ordered) {
-            await updateTeam(team.id, {
-                passage_order: team.passage_order,
-                passage_time: team.passage_time
-            });
-        }
+        // Start time and slot duration come from the event's presentation settings
+        await teamApi.schedule({ event_id: currentEventId });
         await refresh();
     };
 
     const handleClearOrder = async () => {
-        const cleared = clearPassageOrder(teams);
-        for (const team of cleared) {
-            await updateTeam(team.id, {
-                passage_order: null,
-                passage_time: null
-            });
-        }
+        if (!currentEventId) return;
+        await teamApi.clearSchedule(currentEventId);
         await refresh();
     };
 
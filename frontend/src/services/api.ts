@@ -57,6 +57,13 @@ export const userApi = {
     create: (data: Omit<User, 'id'>) => api.post<User>('/users/', data),
     update: (id: string, data: Partial<User>) => api.patch<User>(`/users/${id}/`, data),
     delete: (id: string) => api.delete(`/users/${id}/`),
+    // Creates the accounts in one request; the generated passwords are only returned here
+    provision: (data: {
+        event: string;
+        role?: 'jury';
+        track?: string;
+        accounts: { name: string; username?: string; email?: string; track?: string }[];
+    }) => api.post<{ count: number; users: (User & { password: string })[] }>('/users/provision/', data),
 };
 
 export const criteriaApi = {
@@ -71,6 +78,19 @@ export const teamApi = {
     create: (data: Omit<Team, 'id' | 'created_at'>) => api.post<Team>('/teams/', data),
     bulkCreate: (data: { event_id: string; teams: Array<Omit<Team, 'id' | 'created_at'>> }) =>
         api.post<{ created_count: number; teams: Team[] }>('/teams/bulk_create/', data),
+    importFile: (data: FormData) => api.post('/teams/import/', data, { headers: { 'Content-Type': 'multipart/form-data' } }),
+    importStatus: (jobId: string) => api.get(`/teams/import/${jobId}/`),
+    // Draws and saves the passage order of every team of the event in one request
+    schedule: (data: {
+        event_id: string;
+        seed?: number;
+        start_time?: string;
+        duration?: number;
+        rooms?: number;
+        breaks?: { start: string; duration: number }[];
+        dry_run?: boolean;
+    }) => api.post('/teams/schedule/', data),
+    clearSchedule: (eventId: string) => api.delete('/teams/schedule/', { params: { event_id: eventId } }),
     update: (id: string, data: Partial<Team>) => api.patch<Team>(`/teams/${id}/`, data),
     delete: (id: string) => api.delete(`/teams/${id}/`),
 };
@@ -84,14 +104,53 @@ export const scoreApi = {
         return api.post<TeamScore>('/team-scores/', data);
     },
     lock: (id: string) => api.post<TeamScore>(`/team-scores/${id}/lock/`),
+    batch: (entries: Array<{ team: string; scores?: Record<string, number>; criterion_comments?: Record<string, string>; global_comments?: string; lock?: boolean }>) =>
+        api.post<{ saved_count: number; scores: TeamScore[]; errors: any[] | null }>('/team-scores/batch/', { entries }),
 };
 
 export const reportApi = {
     getResults: (eventId: string) => api.get('/results/', { params: { event_id: eventId } }),
+    exportResults: (eventId: string, fileFormat: 'csv' | 'xlsx' = 'csv') =>
+        api.get<Blob>('/results/export/', { params: { event_id: eventId, file_format: fileFormat }, responseType: 'blob' }),
     checkCompletion: (eventId: string) => api.get('/check-completion/', { params: { event_id: eventId } }),
     getJuryProgress: (juryId: string) => api.get(`/jury-progress/${juryId}/`),
 };
 
+export const liveApi = {
+    // Server-sent events: score_locked, ranking_changed, passage_order, queue, message
+    openEventStream: (eventId: string) => {
+        const token = sessionStorage.getItem('auth_token');
+        const query = token ? `?token=${encodeURIComponent(token)}` : '';
+        return new EventSource(`${API_URL}/events/${eventId}/stream/${query}`);
+    },
+};
+
+export interface QueueTeam {
+    id: number;
+    name: string;
+    track: string | null;
+    passage_order: number;
+    passage_time: string | null;
+    locked_count: number;
+    complete: boolean;
+}
+
+export interface QueueSnapshot {
+    event_id: number;
+    current_order: number | null;
+    jury_count: number;
+    version: number;
+    current: QueueTeam[];
+    next: QueueTeam[];
+}
+
+export const queueApi = {
+    get: (eventId: string, upcoming = 5) =>
+        api.get<QueueSnapshot>(`/events/${eventId}/queue/`, { params: { upcoming } }),
+    advance: (eventId: string, data: { direction?: 'next' | 'previous'; passage_order?: number } = {}) =>
+        api.post<QueueSnapshot>(`/events/${eventId}/queue/advance/`, data),
+};
+
 export const messageApi = {
     list: () => api.get<any>('/messages/'),
     send: (data: { content: string; event: string; recipient?: number | null; recipients?: number[] }) =>
@@ -99,6 +158,15 @@ export const messageApi = {
     delete: (id: number) => api.delete(`/messages/${id}/`),
     clearConversation: (userId: number) => api.delete(`/messages/clear-conversation/${userId}/`),
     markAsRead: (senderId?: number) => api.post('/messages/mark_as_read/', { sender_id: senderId }),
+    unreadCount: () => api.get<{ unread_count: number }>('/messages/unread-count/'),
+    conversations: (eventId: string) => api.get<any[]>('/messages/conversations/', { params: { event_id: eventId } }),
+    // counterpart: a user id (admins) or 'staff'; pass `after` to fetch only new messages, `before` for older ones
+    conversation: (eventId: string, counterpart: number | 'staff', cursor: { before?: string; after?: string; limit?: number } = {}) =>
+        api.get<{ results: Message[]; has_more: boolean; before: string | null; after: string | null }>(
+            `/messages/conversations/${counterpart}/`, { params: { event_id: eventId, ...cursor } }
+        ),
+    broadcast: (data: { content: string; event: string; recipients?: number[]; role?: string; track?: string }) =>
+        api.post<{ sent_count: number; skipped: number[]; broadcast_id: number | null }>('/messages/broadcast/', data),
 };
 
 export default api;